@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Shared Browser Pool for Beat by Beat Generators
+Launches Chromium once and lends pages to the PDF and TTS generators
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # Only browser rendering needs Playwright (the "pdf" extra)
+    async_playwright = None
+
+
+# Number of browser contexts that may be open at the same time
+DEFAULT_POOL_SIZE = 4
+
+
+class BrowserPool:
+    """A single long-lived Chromium instance shared by every render step
+
+    Use as an async context manager, then borrow pages with `pool.page()`.
+    At most `size` contexts are open at once; extra borrowers wait their turn.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE):
+        if size < 1:
+            raise ValueError(f'Browser pool size must be at least 1, got {size}')
+        self.size = size
+        self._slots = asyncio.Semaphore(size)
+        self._playwright = None
+        self._browser = None
+
+    async def __aenter__(self):
+        if async_playwright is None:
+            raise RuntimeError('Browser rendering needs Playwright: run ./scripts/setup.sh '
+                               'or uv sync --all-extras')
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._browser.close()
+        await self._playwright.stop()
+
+    @asynccontextmanager
+    async def page(self, viewport=None, device_scale_factor=None):
+        """Borrow a page in a fresh context with the given viewport and scale"""
+        if self._browser is None:
+            raise RuntimeError('BrowserPool must be entered with "async with" before use')
+
+        # Each borrower gets its own context, since sprite sheets and card
+        # backs need different viewports and device scale factors
+        options = {}
+        if viewport is not None:
+            options['viewport'] = viewport
+        if device_scale_factor is not None:
+            options['device_scale_factor'] = device_scale_factor
+
+        async with self._slots:
+            context = await self._browser.new_context(**options)
+            try:
+                yield await context.new_page()
+            finally:
+                await context.close()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Incremental Build Cache for Beat by Beat Generators
+Records a content hash of every output artifact's inputs in a manifest so
+unchanged HTML, PDF and TTS artifacts are skipped on the next run
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+
+MANIFEST_NAME = '.build-manifest.json'
+
+
+def _update(digest, part):
+    """Feed one input into a hash, length-prefixed so parts can't run together"""
+    if isinstance(part, (list, tuple)):
+        digest.update(f'[{len(part)}'.encode())
+        for item in part:
+            _update(digest, item)
+        digest.update(b']')
+        return
+
+    if dataclasses.is_dataclass(part):
+        # Card records (card_model) hash by class and field values
+        data = json.dumps([type(part).__name__, dataclasses.astuple(part)]).encode()
+    elif isinstance(part, dict):
+        data = json.dumps(part, sort_keys=True).encode()
+    elif isinstance(part, bytes):
+        data = part
+    elif isinstance(part, Path):
+        data = part.read_bytes()
+    else:
+        data = str(part).encode()
+    digest.update(f'{len(data)}:'.encode())
+    digest.update(data)
+
+
+def hash_inputs(*parts):
+    """Hash an artifact's inputs into a hex digest
+
+    Parts may be strings, bytes, numbers, dicts of render parameters, card
+    records, lists of any of these, or Paths (hashed by file contents). Card HTML fragments
+    are hashed rather than raw CSV rows: each fragment already embeds its
+    row's values and icon SVGs, and also changes when a card template does.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """Input hashes of previously built artifacts, stored under output/
+
+    Artifacts are identified by a key, normally their path relative to the
+    output directory. With force=True every artifact is reported stale.
+    """
+
+    def __init__(self, output_dir, force=False):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.force = force
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # A corrupt manifest just means a full rebuild
+                self.entries = {}
+
+    def key(self, path):
+        """Manifest key for an output path"""
+        return Path(path).relative_to(self.output_dir).as_posix()
+
+    def is_fresh(self, key, digest, outputs=()):
+        """True if `key` was last built from `digest` and its outputs still exist"""
+        if self.force or self.entries.get(key) != digest:
+            return False
+        return all(Path(output).exists() for output in outputs)
+
+    def record(self, key, digest):
+        """Remember that `key` is now built from `digest`"""
+        self.entries[key] = digest
+
+    def write_stream(self, path, chunks):
+        """Stream text chunks into `path`, replacing it only if the content changed
+
+        Chunks are encoded, hashed and written to a temp file beside `path`
+        one at a time, so the whole document is never held in memory. The
+        digest of the written bytes is the manifest entry; when it matches
+        the last build the temp file is dropped and `path` is left untouched.
+        Returns True if `path` was (re)written.
+        """
+        path = Path(path)
+        key = self.key(path)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    data = chunk.encode('utf-8')
+                    digest.update(data)
+                    f.write(data)
+            if self.is_fresh(key, digest.hexdigest(), [path]):
+                os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.record(key, digest.hexdigest())
+        return True
+
+    def save(self):
+        """Write the manifest back to disk"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
@@ -2,28 +2,29 @@
 """
 Calculate percentages of move types in the pool deck
 This is used to add helpful statistics to rhythm cards
+(thin wrapper over deck_stats, which also checks the rhythm cards,
+counting directly when NumPy isn't installed)
 """
 
-import csv
 from pathlib import Path
 from collections import Counter
+from card_model import load_card_set
+import deck_stats
 
-def calculate_move_percentages():
+def calculate_move_percentages(card_set=None):
     """Calculate percentage of each move type in pool deck"""
-    base_dir = Path(__file__).parent.parent
-    moves_csv = base_dir / 'card-data' / 'moves.csv'
+    if card_set is None:
+        base_dir = Path(__file__).parent.parent
+        card_set = load_card_set(base_dir / 'card-data')
 
     # Count move types in pool deck only
-    type_counts = Counter()
-    total_pool_moves = 0
-
-    with open(moves_csv, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['deck_type'] == 'pool':
-                move_type = row['type']
-                type_counts[move_type] += 1
-                total_pool_moves += 1
+    if deck_stats.np is not None:
+        stats = deck_stats.move_crosstab(card_set, 'pool', ('type',))
+        return stats.percentages('type'), stats.total
+
+    pool_moves = card_set.pool_moves
+    type_counts = Counter(move.type for move in pool_moves)
+    total_pool_moves = len(pool_moves)
 
     # Calculate percentages
     percentages = {}
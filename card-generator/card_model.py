@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Card Model for Beat by Beat
+Typed, compact records for every card in card-data/, parsed and validated
+once per process and shared by the HTML, TTS and statistics generators
+
+`python card_model.py` compiles the CSVs into a column-oriented binary
+card database, which load_card_set() prefers while it is newer than them.
+"""
+
+import argparse
+import csv
+import gc
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+
+
+# Move types and dance styles; the simulators use these orders for bitmasks
+MOVE_TYPES = ('Step', 'Spin', 'Jump', 'Pose', 'Flow', 'Pop')
+STYLES = ('Latin', 'Ballroom', 'Classical', 'Jazz', 'Street')
+
+
+class Card:
+    """Base for the card records: frozen, slotted and picklable
+
+    Subclasses are frozen dataclasses with a hand-written `__slots__`
+    (dataclass(slots=True) needs Python 3.10). Pickling goes through the
+    constructor, since frozen slotted instances can't restore state with
+    setattr, and the TTS renderer ships cards to worker processes.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+
+@dataclass(frozen=True)
+class Move(Card):
+    """A starter or pool move card (moves.csv)"""
+
+    __slots__ = ('name', 'cost', 'type', 'style', 'bonus', 'deck_type', 'recovery_action', 'image_file')
+    name: str
+    cost: int
+    type: str
+    style: str
+    bonus: int
+    deck_type: str
+    recovery_action: str
+    image_file: str
+
+    @property
+    def styles(self):
+        """Individual styles of a (possibly multi-style, "A/B") move"""
+        return [s.strip() for s in self.style.split('/')] if self.style else []
+
+
+@dataclass(frozen=True)
+class Rhythm(Card):
+    """A rhythm card (rhythm-cards.csv); blank rhythms have no effect"""
+
+    __slots__ = ('name', 'effect', 'condition', 'category', 'copies', 'flavor_text')
+    name: str
+    effect: str
+    condition: str
+    category: str
+    copies: int
+    flavor_text: str
+
+
+@dataclass(frozen=True)
+class Judge(Card):
+    """A judge card (judge-cards.csv)"""
+
+    __slots__ = ('name', 'title', 'difficulty', 'requirement', 'reward_points', 'ongoing_effect',
+                 'flavor_quote', 'image_file')
+    name: str
+    title: str
+    difficulty: int
+    requirement: str
+    reward_points: int
+    ongoing_effect: str
+    flavor_quote: str
+    image_file: str
+
+
+@dataclass(frozen=True)
+class Stumble(Card):
+    """A stumble card (stumble-cards.csv)"""
+
+    __slots__ = ('name', 'copies', 'flavor_text', 'image_file')
+    name: str
+    copies: int
+    flavor_text: str
+    image_file: str
+
+
+class CardSet:
+    """Every card record from card-data/, grouped by kind"""
+
+    __slots__ = ('moves', 'rhythms', 'judges', 'stumbles')
+
+    def __init__(self, moves, rhythms, judges, stumbles):
+        self.moves = tuple(moves)
+        self.rhythms = tuple(rhythms)
+        self.judges = tuple(judges)
+        self.stumbles = tuple(stumbles)
+
+    @property
+    def starter_moves(self):
+        return tuple(move for move in self.moves if move.deck_type == 'starter')
+
+    @property
+    def pool_moves(self):
+        return tuple(move for move in self.moves if move.deck_type == 'pool')
+
+    @property
+    def rhythm_count(self):
+        """Rhythm cards in the deck, counting every copy"""
+        return sum(rhythm.copies for rhythm in self.rhythms)
+
+    @property
+    def stumble_count(self):
+        """Stumble cards in the supply, counting every copy"""
+        return sum(stumble.copies for stumble in self.stumbles)
+
+
+# Columns that default when missing or blank, for older CSVs
+DEFAULTS = {
+    'copies': '1',
+    'recovery_action': 'Stamina',
+}
+
+
+def read_cards(csv_path, card_class):
+    """Parse a CSV into `card_class` records, converting int fields
+
+    Raises ValueError naming the file and line for a missing column or a
+    value that is not an integer.
+    """
+    csv_path = Path(csv_path)
+    records = []
+    with open(csv_path, 'r') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            values = {}
+            for field in fields(card_class):
+                raw = row.get(field.name)
+                if not raw and field.name in DEFAULTS:
+                    raw = DEFAULTS[field.name]
+                if raw is None:
+                    if field.type is int:
+                        raise ValueError(f'{csv_path.name}:{reader.line_num}: missing column "{field.name}"')
+                    raw = ''
+                if field.type is int:
+                    try:
+                        values[field.name] = int(raw)
+                    except ValueError:
+                        raise ValueError(f'{csv_path.name}:{reader.line_num}: {field.name} must be an '
+                                         f'integer, got {raw!r}') from None
+                else:
+                    values[field.name] = raw
+            records.append(card_class(**values))
+    return records
+
+
+# Source CSV and record type for each CardSet attribute, in database order
+SOURCES = {
+    'moves': ('moves.csv', Move),
+    'rhythms': ('rhythm-cards.csv', Rhythm),
+    'judges': ('judge-cards.csv', Judge),
+    'stumbles': ('stumble-cards.csv', Stumble),
+}
+
+
+# --- Compiled card database --------------------------------------------------
+#
+# Layout (little-endian):
+#   header   magic, format version, schema digest (SHA-256 of SOURCES' fields)
+#   strings  count, count + 1 uint32 code point offsets into a UTF-8 blob,
+#            blob size in bytes, blob
+#   tables   per SOURCES entry: row count, then one column per field, each an
+#            array of uint32 string ids (str fields) or int32 values
+#
+# Every distinct string is stored once, so repeated types, styles and
+# recovery actions cost four bytes per card.
+
+CARD_DB_NAME = '.cards.db'
+DB_MAGIC = b'BBCARDDB'
+DB_VERSION = 1
+DB_HEADER = struct.Struct('<8sI32s')
+DB_COUNT = struct.Struct('<I')
+
+
+def _schema_digest():
+    """Digest of the record layouts, so a database from older code is ignored"""
+    layout = ';'.join(f'{name}:' + ','.join(f'{field.name}/{field.type.__name__}' for field in fields(cls))
+                      for name, (_, cls) in SOURCES.items())
+    return hashlib.sha256(layout.encode()).digest()
+
+
+def _column(typecode, values):
+    column = array(typecode, values)
+    assert column.itemsize == 4, f'array({typecode!r}) must be 4 bytes'
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def card_db_path(data_dir):
+    return Path(data_dir) / CARD_DB_NAME
+
+
+def card_db_is_fresh(data_dir):
+    """True if the compiled database exists and is newer than every CSV"""
+    db_path = card_db_path(data_dir)
+    try:
+        db_mtime = db_path.stat().st_mtime_ns
+        return all(db_mtime >= (Path(data_dir) / filename).stat().st_mtime_ns
+                   for filename, _ in SOURCES.values())
+    except FileNotFoundError:
+        return False
+
+
+def compile_card_db(data_dir, db_path=None):
+    """Parse and validate the CSVs in `data_dir` and write the binary database
+
+    Returns the CardSet that was compiled.
+    """
+    data_dir = Path(data_dir)
+    db_path = Path(db_path) if db_path else card_db_path(data_dir)
+    card_set = load_csv_card_set(data_dir)
+
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    tables = []
+    for name, (_, cls) in SOURCES.items():
+        records = getattr(card_set, name)
+        columns = []
+        for field in fields(cls):
+            values = [getattr(record, field.name) for record in records]
+            if field.type is int:
+                columns.append(_column('i', values))
+            else:
+                columns.append(_column('I', [intern(value) for value in values]))
+        tables.append((len(records), columns))
+
+    # Offsets count code points, so the reader decodes the blob once and slices it
+    offsets = [0]
+    for value in strings:
+        offsets.append(offsets[-1] + len(value))
+    blob = ''.join(strings).encode('utf-8')
+
+    # Write atomically, so a reader never sees a half-written database
+    fd, tmp_path = tempfile.mkstemp(dir=db_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(DB_HEADER.pack(DB_MAGIC, DB_VERSION, _schema_digest()))
+            f.write(DB_COUNT.pack(len(strings)))
+            f.write(_column('I', offsets).tobytes())
+            f.write(DB_COUNT.pack(len(blob)))
+            f.write(blob)
+            for count, columns in tables:
+                f.write(DB_COUNT.pack(count))
+                for column in columns:
+                    f.write(column.tobytes())
+        os.replace(tmp_path, db_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return card_set
+
+
+def _build_records(cls, count, columns):
+    """Create `count` records from per-field columns without calling __init__
+
+    Each slot's member descriptor stores a whole column in one C-level map,
+    which is several times faster than the frozen dataclass __init__. The
+    values were validated when the database was compiled.
+    """
+    records = list(map(object.__new__, repeat(cls, count)))
+    for field, column in zip(fields(cls), columns):
+        deque(map(getattr(cls, field.name).__set__, records, column), maxlen=0)
+    return records
+
+
+def read_card_db(db_path):
+    """Load a CardSet from a compiled database
+
+    Raises ValueError if the file is not a database for this card layout,
+    or is truncated or damaged.
+    """
+    data = memoryview(Path(db_path).read_bytes())
+    magic, version, schema = DB_HEADER.unpack_from(data)
+    if magic != DB_MAGIC or version != DB_VERSION or schema != _schema_digest():
+        raise ValueError(f'{db_path}: not a compatible card database, recompile it')
+    pos = DB_HEADER.size
+
+    def read_column(typecode, count):
+        nonlocal pos
+        column = array(typecode)
+        column.frombytes(data[pos:pos + 4 * count])
+        if len(column) != count:
+            raise ValueError(f'{db_path}: truncated card database, recompile it')
+        if sys.byteorder == 'big':
+            column.byteswap()
+        pos += 4 * count
+        return column
+
+    def read_count():
+        nonlocal pos
+        (count,) = DB_COUNT.unpack_from(data, pos)
+        pos += DB_COUNT.size
+        return count
+
+    num_strings = read_count()
+    offsets = read_column('I', num_strings + 1)
+    blob_size = read_count()
+    if pos + blob_size > len(data):
+        raise ValueError(f'{db_path}: truncated card database, recompile it')
+    text = str(data[pos:pos + blob_size], 'utf-8')
+    pos += blob_size
+    if offsets[-1] != len(text):
+        raise ValueError(f'{db_path}: damaged card database, recompile it')
+    strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+    # Building many small acyclic objects only triggers useless collections
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        tables = {}
+        for name, (_, cls) in SOURCES.items():
+            count = read_count()
+            columns = []
+            for field in fields(cls):
+                if field.type is int:
+                    columns.append(read_column('i', count))
+                else:
+                    columns.append(list(map(strings.__getitem__, read_column('I', count))))
+            tables[name] = _build_records(cls, count, columns)
+        if pos != len(data):
+            raise ValueError(f'{db_path}: damaged card database, recompile it')
+        return CardSet(**tables)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def load_csv_card_set(data_dir):
+    """Parse and validate every card CSV in `data_dir`"""
+    data_dir = Path(data_dir)
+    return CardSet(**{name: read_cards(data_dir / filename, cls)
+                      for name, (filename, cls) in SOURCES.items()})
+
+
+@lru_cache(maxsize=None)
+def load_card_set(data_dir):
+    """Load every card in `data_dir` (cached per directory)
+
+    Uses the compiled database when it is newer than all the CSVs, and
+    falls back to parsing them otherwise.
+    """
+    if card_db_is_fresh(data_dir):
+        try:
+            return read_card_db(card_db_path(data_dir))
+        except (OSError, ValueError, IndexError, struct.error):
+            # A stale-format or damaged database just means parsing the CSVs
+            pass
+    return load_csv_card_set(data_dir)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile card-data/*.csv into a binary card database')
+    parser.add_argument('--force', action='store_true',
+                        help='recompile even if the database is newer than the CSVs')
+    args = parser.parse_args()
+
+    data_dir = Path(__file__).parent.parent / 'card-data'
+    if card_db_is_fresh(data_dir) and not args.force:
+        print(f'Up to date: {CARD_DB_NAME}')
+    else:
+        card_set = compile_card_db(data_dir)
+        print(f'Compiled: {CARD_DB_NAME} ({len(card_set.moves)} moves, {len(card_set.rhythms)} rhythms, '
+              f'{len(card_set.judges)} judges, {len(card_set.stumbles)} stumbles, '
+              f'{card_db_path(data_dir).stat().st_size} bytes)')
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Deck Statistics for Beat by Beat
+Cross-tabulates move cards over type, style, cost, bonus and recovery
+action with NumPy, and checks the pool percentages quoted on rhythm cards
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from card_model import load_card_set
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for deck statistics (the "stats" extra)
+    np = None
+
+
+# Move attributes cross-tabulated by default, in axis order
+MOVE_DIMS = ('type', 'style', 'cost', 'bonus', 'recovery_action')
+
+# Rhythm conditions quote pool shares like "Step moves (33% of pool)"
+POOL_SHARE = re.compile(r'(\w+) moves \((\d+)% of pool\)')
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('Deck statistics need NumPy: uv sync --extra stats')
+
+
+class CrossTab:
+    """Weighted card counts over every combination of some move attributes
+
+    `counts` is an ndarray with one axis per dimension; `labels[dim]` holds
+    the sorted distinct values along that axis.
+    """
+
+    def __init__(self, dims, labels, counts):
+        self.dims = tuple(dims)
+        self.labels = labels
+        self.counts = counts
+
+    @property
+    def total(self):
+        return self.counts.sum().item()
+
+    def marginal(self, *dims):
+        """Counts summed over every dimension except `dims` (kept in the given order)"""
+        axes = [self.dims.index(dim) for dim in dims]
+        other = tuple(i for i in range(len(self.dims)) if i not in axes)
+        summed = self.counts.sum(axis=other)
+        # sum() leaves the kept axes in ascending order; put them in `dims` order
+        return np.transpose(summed, np.argsort(np.argsort(axes)))
+
+    def distribution(self, dim):
+        """Dict of value -> count along one dimension"""
+        return dict(zip(self.labels[dim], self.marginal(dim).tolist()))
+
+    def percentages(self, dim):
+        """Dict of value -> whole-number percentage of the total along one dimension (all 0 if empty)"""
+        total = self.total
+        return {value: round((count / total) * 100) if total else 0
+                for value, count in self.distribution(dim).items()}
+
+
+def move_columns(moves, dims=MOVE_DIMS):
+    """One array per dimension, in move order"""
+    _require_numpy()
+    return {dim: np.array([getattr(move, dim) for move in moves]) for dim in dims}
+
+
+def crosstab(columns, dims=MOVE_DIMS, weights=None):
+    """Cross-tabulate `columns` (dim -> array) in a single vectorized pass
+
+    Each column is encoded to integer codes, the codes are folded into one
+    flat cell index, and a (weighted) bincount counts every cell at once.
+    `weights` gives a copy count per row and defaults to one copy each.
+    """
+    _require_numpy()
+    labels = {}
+    codes = []
+    for dim in dims:
+        values, inverse = np.unique(columns[dim], return_inverse=True)
+        labels[dim] = values.tolist()
+        codes.append(inverse.ravel())
+
+    shape = tuple(len(labels[dim]) for dim in dims)
+    if not codes or len(codes[0]) == 0:
+        return CrossTab(dims, labels, np.zeros(shape, dtype=np.int64))
+
+    cells = np.ravel_multi_index(codes, shape)
+    counts = np.bincount(cells, weights=weights, minlength=int(np.prod(shape)))
+    if weights is None:
+        counts = counts.astype(np.int64)
+    return CrossTab(dims, labels, counts.reshape(shape))
+
+
+def move_crosstab(card_set, deck='pool', dims=MOVE_DIMS):
+    """Cross-tabulate the moves of one deck ('starter', 'pool', or None for all)"""
+    moves = card_set.moves if deck is None else [move for move in card_set.moves if move.deck_type == deck]
+    return crosstab(move_columns(moves, dims), dims)
+
+
+def check_rhythm_percentages(card_set, pool_stats=None):
+    """Compare pool shares quoted in rhythm conditions with the live pool
+
+    Returns a list of (rhythm name, move type, quoted %, actual %) for
+    every quote that no longer matches.
+    """
+    if pool_stats is None:
+        pool_stats = move_crosstab(card_set, 'pool', ('type',))
+    actual = pool_stats.percentages('type')
+
+    mismatches = []
+    for rhythm in card_set.rhythms:
+        for move_type, quoted in POOL_SHARE.findall(rhythm.condition):
+            live = actual.get(move_type, 0)
+            if int(quoted) != live:
+                mismatches.append((rhythm.name, move_type, int(quoted), live))
+    return mismatches
+
+
+def format_table(stats, row_dim, col_dim):
+    """Render a two-dimensional marginal of `stats` as a text table"""
+    table = stats.marginal(row_dim, col_dim)
+    rows, cols = stats.labels[row_dim], stats.labels[col_dim]
+    width = max(len(str(label)) for label in rows + [row_dim])
+    col_widths = [max(len(str(label)), 3) for label in cols]
+
+    lines = [f'{row_dim:<{width}}  ' + '  '.join(f'{str(c):>{w}}' for c, w in zip(cols, col_widths)) + '  total']
+    for label, counts in zip(rows, table):
+        cells = '  '.join(f'{count:>{w}}' for count, w in zip(counts.tolist(), col_widths))
+        lines.append(f'{str(label):<{width}}  {cells}  {counts.sum():>5}')
+    return '\n'.join(lines)
+
+
+def main(deck='pool', rows='type', cols='style', check=False):
+    """Print move statistics for a deck and check the rhythm card percentages
+
+    Returns 1 if `check` is set and any quoted percentage is out of date.
+    """
+    base_dir = Path(__file__).parent.parent
+    card_set = load_card_set(base_dir / 'card-data')
+
+    stats = move_crosstab(card_set, deck)
+
+    print('📊 Beat by Beat - Deck Statistics')
+    print('=' * 50)
+    print()
+    print(f'{(deck or "all").title()} moves: {stats.total}')
+    print()
+
+    distribution = stats.distribution('type')
+    percentages = stats.percentages('type')
+    for move_type in sorted(distribution):
+        print(f'{move_type:8} {distribution[move_type]:3} cards ({percentages[move_type]:2}%)')
+    print()
+
+    print(format_table(stats, rows, cols))
+    print()
+
+    mismatches = check_rhythm_percentages(card_set)
+    if not mismatches:
+        print('✅ Rhythm card pool percentages match moves.csv')
+        return 0
+
+    print(f'⚠️  {len(mismatches)} rhythm card percentage(s) out of date:')
+    for name, move_type, quoted, live in mismatches:
+        print(f'  - {name}: {move_type} moves quoted at {quoted}%, pool has {live}%')
+    return 1 if check else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cross-tabulate move cards and check rhythm percentages')
+    parser.add_argument('--deck', choices=['starter', 'pool', 'all'], default='pool',
+                        help='which moves to tabulate (default: pool)')
+    parser.add_argument('--rows', choices=MOVE_DIMS, default='type', help='table rows (default: type)')
+    parser.add_argument('--cols', choices=MOVE_DIMS, default='style', help='table columns (default: style)')
+    parser.add_argument('--check', action='store_true',
+                        help='exit non-zero if rhythm card percentages are out of date')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(None if args.deck == 'all' else args.deck, args.rows, args.cols, args.check))
+    except RuntimeError as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
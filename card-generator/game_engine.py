@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+Game Engine for Beat by Beat
+Headless simulation of the rules in docs/beat-by-beat-rulebook.md, driven
+by the card data, with pluggable bot policies for balance testing
+
+Cards are integer IDs into a CardTable of flat per-attribute lists, and
+decks, hands and discard piles are plain lists of IDs, so the per-beat
+hot path is list indexing and integer arithmetic.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from card_model import load_card_set
+from judge_rules import STYLE_INDEX, TYPE_INDEX, RoundCounts, compile_judge_rules
+from rhythm_effects import (ACTIONS, DRAW_ONE, INSPIRATION, NO_EFFECT, REFINEMENT, STAMINA, TYPE_BITS,
+                            R_BONUS, R_BONUS_NEW_STYLE, R_CHAIN_BONUS, R_COST, R_CROWD_MIN_COST, R_CROWD_TIES,
+                            R_CROWD_UNDERDOG, R_DUAL_ACTION, R_EXTRA_ACTION, R_STAMINA_DRAW,
+                            compile_rhythm_table, style_mask)
+
+
+# Card ID of the Stumble card; move IDs start at 1
+STUMBLE = 0
+
+ROUNDS = 6
+BEATS = 8
+HAND_SIZE = 5
+JUDGES_OUT = {2: 3, 3: 4, 4: 5}
+PLACEMENT_POINTS = [8, 4, 2]
+INITIAL_DRAFT = (5, 3)      # Draw 5 from the pool, keep 3
+INSPIRATION_DRAFT = (3, 2)  # Draw 3 from the pool, keep 2
+
+
+class CardTable:
+    """Move cards as flat per-attribute lists indexed by integer card ID
+
+    ID 0 is the Stumble card, then the starter moves, then the pool moves.
+    """
+
+    __slots__ = ('names', 'cost', 'bonus', 'type_bits', 'style_bits', 'type_index', 'style_indices',
+                 'recovery', 'starter_ids', 'pool_ids', 'moves')
+
+    def __init__(self, card_set):
+        moves = [None] + list(card_set.starter_moves) + list(card_set.pool_moves)
+        self.moves = moves
+        self.names = ['Stumble'] + [move.name for move in moves[1:]]
+        self.cost = [0] + [move.cost for move in moves[1:]]
+        self.bonus = [0] + [move.bonus for move in moves[1:]]
+        self.type_bits = [0] + [TYPE_BITS[move.type] for move in moves[1:]]
+        self.style_bits = [0] + [style_mask(move.styles) for move in moves[1:]]
+        self.type_index = [0] + [TYPE_INDEX[move.type] for move in moves[1:]]
+        self.style_indices = [()] + [tuple(STYLE_INDEX[style] for style in move.styles) for move in moves[1:]]
+        self.recovery = [DRAW_ONE] + [ACTIONS.get(move.recovery_action, STAMINA) for move in moves[1:]]
+        num_starters = len(card_set.starter_moves)
+        self.starter_ids = list(range(1, num_starters + 1))
+        self.pool_ids = list(range(num_starters + 1, len(moves)))
+
+    def __len__(self):
+        return len(self.cost)
+
+
+# --- Players and policies ----------------------------------------------------
+
+class Player:
+    """One dancer's cards, score, per-round tallies and per-card game totals
+
+    `plays`, `successes`, `favor` and `points` are indexed by card ID and
+    count the game's plays, successful executions, crowd favor wins and
+    bonus points scored of each card.
+    """
+
+    __slots__ = ('seat', 'policy', 'deck', 'hand', 'discard', 'score', 'judges', 'game_styles',
+                 'plays', 'successes', 'favor', 'points',
+                 'chain', 'crowd_energy', 'counts', 'wins', 'failed', 'styles_played', 'round_bonus',
+                 'bonus_styles', 'bonus_types', 'cost_types',
+                 'polyglot', 'minimalist', 'machine', 'showstopper')
+
+    def __init__(self, seat, policy, num_cards):
+        self.seat = seat
+        self.policy = policy
+        self.deck = []
+        self.hand = []
+        self.discard = []
+        self.score = 0
+        self.judges = 0       # Bitmask of claimed judge indices
+        self.game_styles = 0  # Bitmask of styles executed this game
+        self.plays = [0] * num_cards
+        self.successes = [0] * num_cards
+        self.favor = [0] * num_cards
+        self.points = [0] * num_cards
+        self.bonus_styles = self.bonus_types = self.cost_types = 0
+        self.polyglot = self.minimalist = self.machine = self.showstopper = False
+        self.start_round()
+
+    def start_round(self):
+        self.chain = 0
+        self.crowd_energy = 0
+        self.counts = RoundCounts()
+        self.wins = 0
+        self.failed = 0
+        self.styles_played = 0
+        self.round_bonus = 0
+
+    def claim(self, judge):
+        self.judges |= 1 << judge.index
+        self.score += judge.reward
+        self.bonus_styles |= judge.bonus_styles
+        self.bonus_types |= judge.bonus_types
+        self.cost_types |= judge.cost_types
+        self.polyglot |= judge.polyglot
+        self.minimalist |= judge.minimalist
+        self.machine |= judge.machine
+        self.showstopper |= judge.showstopper
+
+    @property
+    def deck_size(self):
+        return len(self.deck) + len(self.hand) + len(self.discard)
+
+
+class Policy:
+    """Bot decisions; subclass and override to plug in a strategy
+
+    Every method gets the Game and the deciding Player. The defaults are
+    simple heuristics, so a policy only needs to override what it changes.
+    """
+
+    name = 'base'
+
+    def choose_play(self, game, player):
+        """Index into player.hand of the card to play this beat"""
+        return 0
+
+    def choose_discards(self, game, player, count):
+        """Indices into player.hand of `count` cards to pay an execution cost"""
+        cost = game.cards.cost
+        order = sorted(range(len(player.hand)), key=lambda i: cost[player.hand[i]])
+        return order[:count]
+
+    def choose_draft(self, game, player, offered, keep):
+        """The `keep` card IDs to take from `offered` pool cards"""
+        return offered[:keep]
+
+    def choose_trash(self, game, player):
+        """A card ID to remove with Refinement (from hand, else discard), or None"""
+        for pile in (player.hand, player.discard):
+            if STUMBLE in pile:
+                return STUMBLE
+        starters = [card for card in player.hand + player.discard if card in game.starter_set]
+        return min(starters, key=game.cards.cost.__getitem__) if starters else None
+
+    def choose_second_action(self, game, player, first):
+        """The other recovery action for Dancer's Choice (must differ from `first`)"""
+        return STAMINA if first != STAMINA else INSPIRATION
+
+
+class RandomPolicy(Policy):
+    """Uniformly random plays, payments and drafts"""
+
+    name = 'random'
+
+    def choose_play(self, game, player):
+        return game.rng.randrange(len(player.hand))
+
+    def choose_discards(self, game, player, count):
+        return game.rng.sample(range(len(player.hand)), count)
+
+    def choose_draft(self, game, player, offered, keep):
+        return game.rng.sample(offered, keep)
+
+
+class GreedyPolicy(Policy):
+    """Play the highest Technique affordable without breaking the hand
+
+    Prefers moves that cost no discards, keeps chains going, and drafts
+    the cards with the best Technique plus bonus. Subclasses can change
+    just the ranking with play_key() and draft_key().
+    """
+
+    name = 'greedy'
+
+    def choose_play(self, game, player):
+        best, best_key = 0, None
+        for i, card in enumerate(player.hand):
+            key = self.play_key(game, player, card)
+            if best_key is None or key > best_key:
+                best, best_key = i, key
+        return best
+
+    def play_key(self, game, player, card):
+        """Rank of playing `card` from hand; the first highest is played"""
+        need = game.discards_needed(player, card)
+        cost = game.cards.cost[card]
+        affordable = need <= len(player.hand) - 1
+        return (affordable, need == 0, cost if affordable else -cost)
+
+    def choose_draft(self, game, player, offered, keep):
+        return sorted(offered, key=lambda card: self.draft_key(game, player, card), reverse=True)[:keep]
+
+    def draft_key(self, game, player, card):
+        """Rank of drafting `card`; the highest are kept"""
+        return game.cards.cost[card] + 2 * game.cards.bonus[card]
+
+
+POLICIES = {policy.name: policy for policy in (Policy, RandomPolicy, GreedyPolicy)}
+
+
+# --- Game --------------------------------------------------------------------
+
+class GameResult:
+    """Final scores and winners of one game, with per-seat details
+
+    `judges` and `styles` are per-seat bitmasks of claimed judge indices
+    and executed styles. `card_stats` lists, per seat, a (card ID, plays,
+    successes, crowd favor wins, points) tuple for every card played.
+    `seen` is a bitmask of the pool card IDs drawn from the pool; a pool
+    card outside it never affected the game.
+    """
+
+    __slots__ = ('seed', 'scores', 'winners', 'judges', 'styles', 'deck_sizes', 'card_stats', 'seen')
+
+    def __init__(self, seed, players, seen=0):
+        self.seed = seed
+        self.seen = seen
+        self.scores = [player.score for player in players]
+        self.judges = [player.judges for player in players]
+        self.styles = [player.game_styles for player in players]
+        self.deck_sizes = [player.deck_size for player in players]
+        self.card_stats = [[(card, plays, player.successes[card], player.favor[card], player.points[card])
+                            for card, plays in enumerate(player.plays) if plays]
+                           for player in players]
+        # Highest score wins; ties go to the smaller deck, and are shared after that
+        best = max((player.score, -player.deck_size) for player in players)
+        self.winners = [player.seat for player in players if (player.score, -player.deck_size) == best]
+
+
+class Rules:
+    """Everything parsed from the card data that a game needs, built once"""
+
+    __slots__ = ('cards', 'rhythm_deck', 'judges')
+
+    def __init__(self, card_set):
+        self.cards = CardTable(card_set)
+        self.rhythm_deck = compile_rhythm_table(card_set.rhythms).deck()
+        self.judges = list(compile_judge_rules(card_set.judges))
+
+
+class Game:
+    """One game from setup to final scoring; call play() once"""
+
+    __slots__ = ('rules', 'cards', 'rng', 'seed', 'players', 'pool', 'pool_discard',
+                 'rhythm_rows', 'judges', 'round', 'beat', 'rhythm', 'starter_set', 'seen')
+
+    def __init__(self, rules, policies, seed):
+        if len(policies) not in JUDGES_OUT:
+            raise ValueError(f'Beat by Beat is for 2-4 players, got {len(policies)}')
+        self.rules = rules
+        self.cards = rules.cards
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.players = [Player(seat, policy, len(self.cards)) for seat, policy in enumerate(policies)]
+        self.starter_set = frozenset(self.cards.starter_ids)
+        self.round = 0
+        self.beat = 0
+        self.rhythm = NO_EFFECT
+        self.seen = 0
+
+    # Costs -------------------------------------------------------------------
+
+    def discount(self, player, card):
+        """Energy toward `card`'s Technique: free energy, chain, crowd favor, effects"""
+        op, amount, types, min_cost = self.rhythm
+        energy = 1 + player.chain + player.crowd_energy
+        if player.chain and op == R_CHAIN_BONUS:
+            energy += amount
+        if op == R_COST and self.cards.type_bits[card] & types and self.cards.cost[card] >= min_cost:
+            energy += amount
+        if player.cost_types & self.cards.type_bits[card]:
+            energy += 1
+        return energy
+
+    def discards_needed(self, player, card):
+        """Cards to discard to execute `card` this beat"""
+        need = self.cards.cost[card] - self.discount(player, card)
+        return need if need > 0 else 0
+
+    # Card movement -----------------------------------------------------------
+
+    def draw(self, player, count):
+        deck, hand = player.deck, player.hand
+        for _ in range(count):
+            if not deck:
+                if not player.discard:
+                    return
+                deck.extend(player.discard)
+                player.discard.clear()
+                self.rng.shuffle(deck)
+            hand.append(deck.pop())
+
+    def draw_pool(self, count):
+        drawn = []
+        for _ in range(count):
+            if not self.pool:
+                if not self.pool_discard:
+                    break
+                self.pool.extend(self.pool_discard)
+                self.pool_discard.clear()
+                self.rng.shuffle(self.pool)
+            card = self.pool.pop()
+            self.seen |= 1 << card
+            drawn.append(card)
+        return drawn
+
+    def draft(self, player, draw, keep):
+        """Offer `draw` pool cards; kept cards go to the player's discard pile"""
+        offered = self.draw_pool(draw)
+        kept = player.policy.choose_draft(self, player, offered, min(keep, len(offered)))
+        for card in kept:
+            offered.remove(card)
+        player.discard.extend(kept)
+        self.pool_discard.extend(offered)
+
+    def trash(self, player):
+        """Refinement: remove a card from hand or discard permanently"""
+        card = player.policy.choose_trash(self, player)
+        if card is None:
+            return
+        if card in player.hand:
+            player.hand.remove(card)
+        else:
+            player.discard.remove(card)
+        # Pool cards return to the common discard; starters and stumbles leave play
+        if card not in self.starter_set and card != STUMBLE:
+            self.pool_discard.append(card)
+
+    # Game flow ---------------------------------------------------------------
+
+    def setup(self):
+        rng = self.rng
+        rhythm_deck = list(self.rules.rhythm_deck)
+        rng.shuffle(rhythm_deck)
+        self.rhythm_rows = [rhythm_deck[r * BEATS:(r + 1) * BEATS] for r in range(ROUNDS)]
+        self.judges = rng.sample(self.rules.judges, JUDGES_OUT[len(self.players)])
+        self.pool = list(self.cards.pool_ids)
+        rng.shuffle(self.pool)
+        self.pool_discard = []
+
+        for player in self.players:
+            player.deck = list(self.cards.starter_ids)
+        for player in self.players:
+            self.draft(player, *INITIAL_DRAFT)
+        for player in self.players:
+            player.deck.extend(player.discard)
+            player.discard.clear()
+            rng.shuffle(player.deck)
+            self.draw(player, HAND_SIZE)
+
+    def play(self):
+        """Play all six rounds and return the GameResult"""
+        self.setup()
+        for self.round in range(ROUNDS):
+            for player in self.players:
+                player.start_round()
+            for self.beat in range(BEATS):
+                self.rhythm = self.rhythm_rows[self.round][self.beat]
+                self.play_beat()
+            self.end_round()
+        return GameResult(self.seed, self.players, self.seen)
+
+    def play_beat(self):
+        cards = self.cards
+        cost, type_bits, style_bits = cards.cost, cards.type_bits, cards.style_bits
+        op, amount, types, min_cost = self.rhythm
+        players = self.players
+
+        # Select: everyone commits a card before anything is revealed
+        plays = []
+        for player in players:
+            if player.hand:
+                plays.append(player.hand.pop(player.policy.choose_play(self, player)))
+            else:
+                plays.append(STUMBLE)
+
+        # Execute
+        succeeded = []
+        for player, card in zip(players, plays):
+            player.plays[card] += 1
+            if card == STUMBLE:
+                player.chain = 0
+                player.crowd_energy = 0
+                player.failed += 1
+                continue
+            need = self.discards_needed(player, card)
+            hand = player.hand
+            if need > len(hand):
+                player.chain = 0
+                player.failed += 1
+            else:
+                if need:
+                    for i in sorted(player.policy.choose_discards(self, player, need), reverse=True):
+                        player.discard.append(hand.pop(i))
+                player.chain = cost[card]
+                player.counts.add(cost[card], cards.type_index[card], cards.style_indices[card])
+                succeeded.append((player, card))
+
+                bonus = cards.bonus[card]
+                if type_bits[card] & types and cost[card] >= min_cost:
+                    if op == R_BONUS:
+                        bonus += amount
+                    elif op == R_BONUS_NEW_STYLE and style_bits[card] & ~player.styles_played:
+                        bonus += amount
+                if player.bonus_styles & style_bits[card]:
+                    bonus += 1
+                if player.bonus_types & type_bits[card]:
+                    bonus += 1
+                player.round_bonus += bonus
+                player.successes[card] += 1
+                player.points[card] += bonus
+                player.styles_played |= style_bits[card]
+            player.crowd_energy = 0
+
+        # Crowd favor
+        if succeeded:
+            techniques = [cost[card] for _, card in succeeded]
+            target = min(techniques) if op == R_CROWD_UNDERDOG else max(techniques)
+            leaders = [(player, card) for player, card in succeeded if cost[card] == target]
+            winners = []
+            if op == R_CROWD_MIN_COST and target < amount:
+                pass
+            elif len(leaders) == 1:
+                winner = leaders[0][0]
+                winner.crowd_energy = 1
+                winner.counts.outright += 1
+                winners = leaders
+            elif op == R_CROWD_TIES:
+                winners = leaders
+            if winners:
+                winning_styles = 0
+                for _, card in winners:
+                    winning_styles |= style_bits[card]
+                for player, card in succeeded:
+                    if (player, card) in winners or style_bits[card] & winning_styles:
+                        player.wins += 1
+                        player.favor[card] += 1
+                        if player.showstopper:
+                            player.round_bonus += 1
+                            player.points[card] += 1
+
+        # Recovery
+        for player, card in zip(players, plays):
+            action = cards.recovery[card]
+            actions = [action]
+            if op == R_EXTRA_ACTION:
+                actions.append(amount)
+            elif op == R_DUAL_ACTION and action != DRAW_ONE:
+                actions.append(player.policy.choose_second_action(self, player, action))
+            actions.sort()
+            for action in actions:
+                if action == STAMINA:
+                    self.draw(player, amount if op == R_STAMINA_DRAW else 2)
+                elif action == REFINEMENT:
+                    self.trash(player)
+                    self.draw(player, 2)
+                elif action == INSPIRATION:
+                    self.draft(player, *INSPIRATION_DRAFT)
+                else:
+                    self.draw(player, 1)
+            player.discard.append(card)
+
+    def end_round(self):
+        players = self.players
+
+        for player in players:
+            player.score += player.round_bonus
+            player.game_styles |= player.styles_played
+            if player.machine and player.counts.executed == BEATS:
+                player.score += 4
+
+        # Crowd favor placement: 8 / 4 / 2, ties split the places they span
+        ranked = sorted(players, key=lambda player: player.wins, reverse=True)
+        place = 0
+        while place < len(ranked):
+            tied = [player for player in ranked if player.wins == ranked[place].wins]
+            points = sum(PLACEMENT_POINTS[place:place + len(tied)])
+            for player in tied:
+                player.score += points / len(tied)
+            place += len(tied)
+
+        # Judges: each open judge goes to the qualifying player with the most
+        # crowd favor this round (then the lower seat)
+        for judge in list(self.judges):
+            qualified = [player for player in players if judge.is_met(player.counts, player.polyglot)]
+            if qualified:
+                winner = max(qualified, key=lambda player: (player.wins, -player.seat))
+                winner.claim(judge)
+                self.judges.remove(judge)
+
+        # Reset: hand and discard shuffle back into the deck
+        for player in players:
+            player.deck.extend(player.hand)
+            player.deck.extend(player.discard)
+            player.hand.clear()
+            player.discard.clear()
+            self.rng.shuffle(player.deck)
+            extra = 2 if player.minimalist and player.counts.max_cost < 4 else 0
+            self.draw(player, HAND_SIZE + extra)
+
+
+def load_rules(data_dir=None):
+    """Rules built from card-data/ (or `data_dir`)"""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / 'card-data'
+    return Rules(load_card_set(data_dir))
+
+
+def game_seed(seed, index):
+    """Seed of game `index` in a run seeded with `seed`
+
+    Runs with different seeds never share games, and game `index` is the
+    same game however a run is split up.
+    """
+    return (seed << 32) | index
+
+
+def play_game(rules, policies, seed):
+    """Play one game with the given policy instances and return its GameResult"""
+    return Game(rules, policies, seed).play()
+
+
+class Tally:
+    """Running per-seat score totals and win shares over many games"""
+
+    def __init__(self, players):
+        self.games = 0
+        self.totals = [0.0] * players
+        self.wins = [0.0] * players
+
+    def add(self, result):
+        self.games += 1
+        for seat, score in enumerate(result.scores):
+            self.totals[seat] += score
+        for seat in result.winners:
+            self.wins[seat] += 1 / len(result.winners)
+
+    def report(self, names):
+        """Lines of average score and win percentage per seat"""
+        games = self.games or 1
+        return [f'  Seat {seat + 1} ({name:>6}): avg score {self.totals[seat] / games:6.1f}, '
+                f'wins {100 * self.wins[seat] / games:5.1f}%'
+                for seat, name in enumerate(names)]
+
+
+def seat_policies(players, policy_names):
+    """Policy names per seat, cycling through `policy_names` to fill the table"""
+    return [policy_names[seat % len(policy_names)] for seat in range(players)]
+
+
+def main(games=1000, players=4, policy_names=('greedy',), seed=0):
+    """Simulate `games` games and report throughput, scores and seat win shares"""
+    rules = load_rules()
+    names = seat_policies(players, policy_names)
+    policies = [POLICIES[name]() for name in names]
+
+    print('🎲 Beat by Beat - Game Simulator')
+    print('=' * 50)
+    print()
+    print(f'{games} games, {players} players: {", ".join(names)}')
+    print()
+
+    tally = Tally(players)
+    start = time.perf_counter()
+    for index in range(games):
+        tally.add(play_game(rules, policies, game_seed(seed, index)))
+    elapsed = time.perf_counter() - start
+
+    print('\n'.join(tally.report(names)))
+    print()
+    print(f'⏱️  {games / elapsed:,.0f} games/sec ({elapsed:.2f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate Beat by Beat games with bot policies')
+    parser.add_argument('--games', '-n', type=int, default=1000, help='games to play (default: 1000)')
+    parser.add_argument('--players', '-p', type=int, choices=sorted(JUDGES_OUT), default=4,
+                        help='players per game (default: 4)')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES),
+                        help='policy per seat, repeated to fill the table (default: greedy)')
+    parser.add_argument('--seed', type=int, default=0, help='run seed (default: 0)')
+    args = parser.parse_args()
+    sys.exit(main(args.games, args.players, tuple(args.policy or ['greedy']), args.seed))
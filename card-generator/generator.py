@@ -4,9 +4,14 @@ Beat by Beat Card Generator
 Generates printable HTML sheets of cards from CSV data
 """
 
-import csv
+import argparse
 import os
+import sys
 from pathlib import Path
+from build_cache import BuildManifest
+from card_model import load_card_set
+from judge_rules import compile_judge_rules
+from rhythm_effects import R_NONE, compile_rhythm_table, parse_rhythm_effect
 
 # Color scheme for styles
 COLORS = {
@@ -90,6 +95,27 @@ RECOVERY_ACTIONS = {
 }
 
 
+# Stumble card icons
+STUMBLE_ICON = '''<svg viewBox="0 0 100 100" class="type-icon">
+        <line x1="20" y1="20" x2="80" y2="80" stroke="currentColor" stroke-width="8"/>
+        <line x1="80" y1="20" x2="20" y2="80" stroke="currentColor" stroke-width="8"/>
+        <circle cx="50" cy="50" r="35" fill="none" stroke="currentColor" stroke-width="6"/>
+    </svg>'''
+
+STUMBLE_RECOVERY_ICON = '''<svg viewBox="0 0 100 100" class="recovery-icon">
+        <circle cx="50" cy="50" r="35" fill="none" stroke="currentColor" stroke-width="6"/>
+        <path d="M50,35 L50,65" stroke="currentColor" stroke-width="6"/>
+    </svg>'''
+
+# Card back colors
+BACK_COLORS = {
+    'move': '#2C3E50',
+    'rhythm': '#8E44AD',
+    'judge': '#C0392B',
+    'stumble': '#34495E',
+}
+
+
 def get_style_color(style):
     """Get the color for a style (or blend colors for multi-style)"""
     if not style:
@@ -107,23 +133,22 @@ def get_style_color(style):
 
 def generate_move_card(move, card_num):
     """Generate HTML for a single move card"""
-    style_bg = get_style_color(move['style'])
+    style_bg = get_style_color(move.style)
     is_gradient = 'gradient' in style_bg
 
     style_attr = f'background: {style_bg};' if is_gradient else f'background-color: {style_bg};'
 
-    type_icon = TYPE_ICONS.get(move['type'], '')
-    recovery_action = move.get('recovery_action', 'Stamina')
-    recovery_data = RECOVERY_ACTIONS.get(recovery_action, RECOVERY_ACTIONS['Stamina'])
+    type_icon = TYPE_ICONS.get(move.type, '')
+    recovery_data = RECOVERY_ACTIONS.get(move.recovery_action, RECOVERY_ACTIONS['Stamina'])
     recovery_icon = recovery_data['icon']
     recovery_desc = recovery_data['description']
 
-    style_display = move['style'] if move['style'] else 'Basic'
+    style_display = move.style if move.style else 'Basic'
 
     return f'''
     <div class="card move-card">
         <div class="card-header" style="{style_attr}">
-            <div class="card-name">{move['name']}</div>
+            <div class="card-name">{move.name}</div>
         </div>
         <div class="card-body">
             <div class="card-image">
@@ -132,11 +157,11 @@ def generate_move_card(move, card_num):
             <div class="card-stats">
                 <div class="stat-row technique-row">
                     <span class="stat-label">Technique</span>
-                    <span class="stat-value technique-value">{move['cost']}</span>
+                    <span class="stat-value technique-value">{move.cost}</span>
                 </div>
                 <div class="stat-row">
                     <span class="stat-label">Type</span>
-                    <span class="stat-value">{move['type']}</span>
+                    <span class="stat-value">{move.type}</span>
                 </div>
                 <div class="stat-row">
                     <span class="stat-label">Style</span>
@@ -144,7 +169,7 @@ def generate_move_card(move, card_num):
                 </div>
                 <div class="stat-row bonus-row">
                     <span class="stat-label">Bonus</span>
-                    <span class="stat-value bonus-value">+{move['bonus']}</span>
+                    <span class="stat-value bonus-value">+{move.bonus}</span>
                 </div>
                 <div class="stat-row recovery-row">
                     <span class="stat-label-recovery">{recovery_icon}</span>
@@ -157,44 +182,44 @@ def generate_move_card(move, card_num):
 
 def generate_rhythm_card(rhythm):
     """Generate HTML for a single rhythm card"""
-    is_blank = not rhythm['effect']
+    is_blank = parse_rhythm_effect(rhythm).op == R_NONE
 
     return f'''
     <div class="card rhythm-card {'blank-rhythm' if is_blank else ''}">
         <div class="card-header rhythm-header">
-            <div class="card-name">{rhythm['name']}</div>
+            <div class="card-name">{rhythm.name}</div>
         </div>
         <div class="card-body rhythm-body">
-            {f'<div class="rhythm-effect">{rhythm["effect"]}</div>' if rhythm['effect'] else ''}
-            {f'<div class="rhythm-condition">{rhythm["condition"]}</div>' if rhythm['condition'] else ''}
-            {f'<div class="rhythm-flavor">{rhythm["flavor_text"]}</div>' if rhythm.get('flavor_text') else ''}
+            {f'<div class="rhythm-effect">{rhythm.effect}</div>' if rhythm.effect else ''}
+            {f'<div class="rhythm-condition">{rhythm.condition}</div>' if rhythm.condition else ''}
+            {f'<div class="rhythm-flavor">{rhythm.flavor_text}</div>' if rhythm.flavor_text else ''}
         </div>
     </div>'''
 
 
 def generate_judge_card(judge):
     """Generate HTML for a single judge card"""
-    stars = '★' * int(judge['difficulty'])
+    stars = '★' * judge.difficulty
 
     return f'''
     <div class="card judge-card">
         <div class="card-header judge-header">
-            <div class="judge-name">{judge['name']}</div>
-            <div class="judge-title">{judge['title']}</div>
+            <div class="judge-name">{judge.name}</div>
+            <div class="judge-title">{judge.title}</div>
             <div class="judge-difficulty">{stars}</div>
         </div>
         <div class="card-body judge-body">
-            <div class="judge-quote">"{judge['flavor_quote']}"</div>
+            <div class="judge-quote">"{judge.flavor_quote}"</div>
             <div class="judge-requirement">
                 <strong>Requirement:</strong><br/>
-                {judge['requirement']}
+                {judge.requirement}
             </div>
             <div class="judge-reward">
-                <strong>Reward:</strong> +{judge['reward_points']} points
+                <strong>Reward:</strong> +{judge.reward_points} points
             </div>
             <div class="judge-ongoing">
                 <strong>Ongoing:</strong><br/>
-                {judge['ongoing_effect']}
+                {judge.ongoing_effect}
             </div>
         </div>
     </div>'''
@@ -202,17 +227,6 @@ def generate_judge_card(judge):
 
 def generate_stumble_card():
     """Generate HTML for a stumble card - matches move card layout"""
-    stumble_icon = '''<svg viewBox="0 0 100 100" class="type-icon">
-        <line x1="20" y1="20" x2="80" y2="80" stroke="currentColor" stroke-width="8"/>
-        <line x1="80" y1="20" x2="20" y2="80" stroke="currentColor" stroke-width="8"/>
-        <circle cx="50" cy="50" r="35" fill="none" stroke="currentColor" stroke-width="6"/>
-    </svg>'''
-
-    recovery_icon = '''<svg viewBox="0 0 100 100" class="recovery-icon">
-        <circle cx="50" cy="50" r="35" fill="none" stroke="currentColor" stroke-width="6"/>
-        <path d="M50,35 L50,65" stroke="currentColor" stroke-width="6"/>
-    </svg>'''
-
     return f'''
     <div class="card move-card stumble-card">
         <div class="card-header stumble-header">
@@ -220,7 +234,7 @@ def generate_stumble_card():
         </div>
         <div class="card-body">
             <div class="card-image">
-                {stumble_icon}
+                {STUMBLE_ICON}
             </div>
             <div class="card-stats">
                 <div class="stat-row technique-row">
@@ -240,7 +254,7 @@ def generate_stumble_card():
                     <span class="stat-value bonus-value stumble-text">+0</span>
                 </div>
                 <div class="stat-row recovery-row stumble-recovery-row">
-                    <span class="stat-label-recovery">{recovery_icon}</span>
+                    <span class="stat-label-recovery">{STUMBLE_RECOVERY_ICON}</span>
                     <span class="stat-value recovery-value">Draw 1</span>
                 </div>
             </div>
@@ -250,15 +264,8 @@ def generate_stumble_card():
 
 def generate_card_back(card_type):
     """Generate HTML for a card back"""
-    back_colors = {
-        'move': '#2C3E50',
-        'rhythm': '#8E44AD',
-        'judge': '#C0392B',
-        'stumble': '#34495E',
-    }
-
     return f'''
-    <div class="card card-back {card_type}-back" style="background-color: {back_colors[card_type]};">
+    <div class="card card-back {card_type}-back" style="background-color: {BACK_COLORS[card_type]};">
         <div class="back-content">
             <div class="back-title">Beat by Beat</div>
             <div class="back-type">{card_type.title()}</div>
@@ -597,17 +604,13 @@ body {
 '''
 
 
-def generate_html_document(all_sheets, card_type):
-    """Generate a complete HTML document with multiple sheets"""
-    css = generate_css()
+def iter_html_document(sheets, card_type, css):
+    """Yield an HTML document with multiple sheets as a stream of text chunks
 
-    sheets_html = []
-    for sheet_cards in all_sheets:
-        sheets_html.append(f'''    <div class="sheet">
-        {''.join(sheet_cards)}
-    </div>''')
-
-    return f'''<!DOCTYPE html>
+    `sheets` may be any iterable (e.g. paginate() over a generator), and is
+    consumed one sheet at a time.
+    """
+    yield f'''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -615,12 +618,118 @@ def generate_html_document(all_sheets, card_type):
     <style>{css}</style>
 </head>
 <body>
-{''.join(sheets_html)}
+'''
+    for sheet_cards in sheets:
+        yield f'''    <div class="sheet">
+        {''.join(sheet_cards)}
+    </div>'''
+    yield '''
 </body>
 </html>'''
 
 
-def main():
+def generate_html_document(all_sheets, card_type):
+    """Generate a complete HTML document with multiple sheets"""
+    return ''.join(iter_html_document(all_sheets, card_type, generate_css()))
+
+
+# Output HTML file and document title for each deck, in generation order
+DECK_FILES = {
+    'starter': ('starter-cards.html', 'starter-move'),
+    'pool': ('pool-cards.html', 'pool-move'),
+    'rhythm': ('rhythm-cards.html', 'rhythm'),
+    'judge': ('judge-cards.html', 'judge'),
+    'stumble': ('stumble-cards.html', 'stumble'),
+}
+
+# Card back designs (stumbles share the move back in TTS)
+BACK_TYPES = ['move', 'rhythm', 'judge', 'stumble']
+
+
+def iter_deck_rows(card_set, deck):
+    """Yield the card record behind each printed card of one deck (see DECK_FILES)
+
+    `card_set` comes from card_model.load_card_set(). Rhythm and stumble
+    records are repeated by their copy count.
+    """
+    if deck == 'starter':
+        yield from card_set.starter_moves
+    elif deck == 'pool':
+        yield from card_set.pool_moves
+    elif deck == 'rhythm':
+        # Rhythm cards - expanded by their copy count
+        for rhythm in card_set.rhythms:
+            for _ in range(rhythm.copies):
+                yield rhythm
+    elif deck == 'judge':
+        yield from card_set.judges
+    else:
+        # Stumble cards for the shared supply - expanded by their copy count
+        for stumble in card_set.stumbles:
+            for _ in range(stumble.copies):
+                yield stumble
+
+
+def load_deck_rows(card_set):
+    """Card records behind every printed card, grouped by deck
+
+    Returns a dict of deck name (see DECK_FILES) -> list of card records.
+    """
+    return {deck: list(iter_deck_rows(card_set, deck)) for deck in DECK_FILES}
+
+
+def generate_deck_card(deck, row, card_num=0):
+    """Generate HTML for one card of the given deck from its card record"""
+    if deck in ('starter', 'pool'):
+        return generate_move_card(row, card_num)
+    if deck == 'rhythm':
+        return generate_rhythm_card(row)
+    if deck == 'judge':
+        return generate_judge_card(row)
+    return generate_stumble_card()
+
+
+def iter_deck_cards(card_set, deck):
+    """Yield the HTML fragment for each printed card of one deck"""
+    for card_num, row in enumerate(iter_deck_rows(card_set, deck)):
+        yield generate_deck_card(deck, row, card_num)
+
+
+def load_deck_cards(card_set):
+    """Build the HTML fragment for every printed card, grouped by deck
+
+    Returns a dict of deck name (see DECK_FILES) -> list of card HTML strings.
+    Used by tts_generator for sprite sheets; main() streams instead.
+    """
+    return {deck: list(iter_deck_cards(card_set, deck)) for deck in DECK_FILES}
+
+
+def paginate(cards, cards_per_sheet=9):
+    """Group card fragments into sheets, padding the last sheet with empty cells
+
+    Accepts any iterable and yields one sheet at a time, so only a single
+    sheet of cards is held in memory.
+    """
+    sheet_cards = []
+    for card in cards:
+        sheet_cards.append(card)
+        if len(sheet_cards) == cards_per_sheet:
+            yield sheet_cards
+            sheet_cards = []
+    if sheet_cards:
+        sheet_cards.extend(['<div></div>'] * (cards_per_sheet - len(sheet_cards)))
+        yield sheet_cards
+
+
+def write_html_file(manifest, output_file, sheets, card_type, css):
+    """Stream an HTML document to disk, replacing it only if its content changed
+
+    Returns True if the file was (re)written.
+    """
+    return manifest.write_stream(output_file, iter_html_document(sheets, card_type, css))
+
+
+def main(force=False):
     """Main generator function"""
     base_dir = Path(__file__).parent.parent
     data_dir = base_dir / 'card-data'
@@ -629,122 +738,60 @@ def main():
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    manifest = BuildManifest(base_dir / 'output', force=force)
+    css = generate_css()
+    card_set = load_card_set(data_dir)
+    # Fail before writing anything if a rhythm effect or judge can't be compiled
+    compile_rhythm_table(card_set.rhythms)
+    compile_judge_rules(card_set.judges)
+
     cards_per_sheet = 9
 
-    # Generate move cards - separate starter and pool cards
-    starter_cards = []
-    pool_cards = []
-    with open(data_dir / 'moves.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['deck_type'] == 'starter':
-                # Generate single copy of starter cards
-                starter_cards.append(generate_move_card(row, len(starter_cards)))
-            else:
-                pool_cards.append(generate_move_card(row, len(pool_cards)))
-
-    # Generate starter cards file
-    starter_sheets = []
-    for i in range(0, len(starter_cards), cards_per_sheet):
-        sheet_cards = starter_cards[i:i + cards_per_sheet]
-        while len(sheet_cards) < cards_per_sheet:
-            sheet_cards.append('<div></div>')
-        starter_sheets.append(sheet_cards)
-
-    html = generate_html_document(starter_sheets, 'starter-move')
-    output_file = output_dir / 'starter-cards.html'
-    with open(output_file, 'w') as f:
-        f.write(html)
-    print(f'Generated: {output_file.name} ({len(starter_sheets)} sheets, {len(starter_cards)} cards)')
-
-    # Generate pool move cards file
-    pool_sheets = []
-    for i in range(0, len(pool_cards), cards_per_sheet):
-        sheet_cards = pool_cards[i:i + cards_per_sheet]
-        while len(sheet_cards) < cards_per_sheet:
-            sheet_cards.append('<div></div>')
-        pool_sheets.append(sheet_cards)
-
-    html = generate_html_document(pool_sheets, 'pool-move')
-    output_file = output_dir / 'pool-cards.html'
-    with open(output_file, 'w') as f:
-        f.write(html)
-    print(f'Generated: {output_file.name} ({len(pool_sheets)} sheets, {len(pool_cards)} cards)')
-
-    # Generate rhythm cards
-    rhythm_cards = []
-    with open(data_dir / 'rhythm-cards.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            copies = int(row.get('copies', 1))
-            for _ in range(copies):
-                rhythm_cards.append(generate_rhythm_card(row))
-
-    rhythm_sheets = []
-    for i in range(0, len(rhythm_cards), cards_per_sheet):
-        sheet_cards = rhythm_cards[i:i + cards_per_sheet]
-        while len(sheet_cards) < cards_per_sheet:
-            sheet_cards.append('<div></div>')
-        rhythm_sheets.append(sheet_cards)
-
-    html = generate_html_document(rhythm_sheets, 'rhythm')
-    output_file = output_dir / 'rhythm-cards.html'
-    with open(output_file, 'w') as f:
-        f.write(html)
-    print(f'Generated: {output_file.name} ({len(rhythm_sheets)} sheets)')
-
-    # Generate judge cards
-    judge_cards = []
-    with open(data_dir / 'judge-cards.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            judge_cards.append(generate_judge_card(row))
-
-    judge_sheets = []
-    for i in range(0, len(judge_cards), cards_per_sheet):
-        sheet_cards = judge_cards[i:i + cards_per_sheet]
-        while len(sheet_cards) < cards_per_sheet:
-            sheet_cards.append('<div></div>')
-        judge_sheets.append(sheet_cards)
-
-    html = generate_html_document(judge_sheets, 'judge')
-    output_file = output_dir / 'judge-cards.html'
-    with open(output_file, 'w') as f:
-        f.write(html)
-    print(f'Generated: {output_file.name} ({len(judge_sheets)} sheets)')
-
-    # Generate stumble cards
-    stumble_cards = [generate_stumble_card() for _ in range(30)]
-
-    stumble_sheets = []
-    for i in range(0, len(stumble_cards), cards_per_sheet):
-        sheet_cards = stumble_cards[i:i + cards_per_sheet]
-        while len(sheet_cards) < cards_per_sheet:
-            sheet_cards.append('<div></div>')
-        stumble_sheets.append(sheet_cards)
-
-    html = generate_html_document(stumble_sheets, 'stumble')
-    output_file = output_dir / 'stumble-cards.html'
-    with open(output_file, 'w') as f:
-        f.write(html)
-    print(f'Generated: {output_file.name} ({len(stumble_sheets)} sheets)')
+    # Cards are counted as they stream past, since no deck is held in memory
+    totals = {}
+
+    def counted(deck, cards):
+        totals[deck] = 0
+        for card in cards:
+            totals[deck] += 1
+            yield card
+
+    # Generate one HTML file per deck, streaming card records -> HTML -> sheets -> file
+    for deck, (filename, card_type) in DECK_FILES.items():
+        sheets = paginate(counted(deck, iter_deck_cards(card_set, deck)), cards_per_sheet)
+        output_file = output_dir / filename
+        if write_html_file(manifest, output_file, sheets, card_type, css):
+            num_sheets = -(-totals[deck] // cards_per_sheet)
+            print(f'Generated: {output_file.name} ({num_sheets} sheets, {totals[deck]} cards)')
+        else:
+            print(f'Up to date: {output_file.name}')
 
     # Generate card backs (one sheet for each type)
-    for card_type in ['move', 'rhythm', 'judge', 'stumble']:
+    for card_type in BACK_TYPES:
         backs = [generate_card_back(card_type) for _ in range(cards_per_sheet)]
-        html = generate_html_document([backs], f'{card_type}-back')
         output_file = output_dir / f'{card_type}-backs.html'
-        with open(output_file, 'w') as f:
-            f.write(html)
-        print(f'Generated: {output_file.name}')
-
-    print(f'\nTotal starter cards: {len(starter_cards)}')
-    print(f'Total pool cards: {len(pool_cards)}')
-    print(f'Total rhythm cards: {len(rhythm_cards)}')
-    print(f'Total judge cards: {len(judge_cards)}')
-    print(f'Total stumble cards: {len(stumble_cards)}')
+        if write_html_file(manifest, output_file, [backs], f'{card_type}-back', css):
+            print(f'Generated: {output_file.name}')
+        else:
+            print(f'Up to date: {output_file.name}')
+
+    manifest.save()
+
+    print(f'\nTotal starter cards: {totals["starter"]}')
+    print(f'Total pool cards: {totals["pool"]}')
+    print(f'Total rhythm cards: {totals["rhythm"]}')
+    print(f'Total judge cards: {totals["judge"]}')
+    print(f'Total stumble cards: {totals["stumble"]}')
     print(f'\nAll cards generated in: {output_dir}')
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Generate printable HTML card sheets')
+    parser.add_argument('--force', action='store_true',
+                        help='rewrite every file even if its inputs are unchanged')
+    args = parser.parse_args()
+    try:
+        main(force=args.force)
+    except ValueError as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Judge Rules for Beat by Beat
+Compiles judge requirement and ongoing effect text into count vectors over
+styles and move types, and checks them against per-round counts that
+players update as they execute moves
+
+A round's executed moves are never rescanned: RoundCounts is updated once
+per successful execution, and JudgeRule.is_met() compares a handful of
+counters, so end-of-round checks cost O(styles + types) per judge.
+"""
+
+import argparse
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from card_model import MOVE_TYPES, STYLES, load_card_set
+from rhythm_effects import STYLE_BITS, type_mask
+
+
+STYLE_INDEX = {style: i for i, style in enumerate(STYLES)}
+TYPE_INDEX = {move_type: i for i, move_type in enumerate(MOVE_TYPES)}
+
+
+class RoundCounts:
+    """One player's successfully executed moves this round, as counters
+
+    `types` and `styles` count moves per type and per style index, where
+    `styles` only counts single-style moves and `any_styles` counts every
+    move listing the style. Multi-style moves are also kept in `flex` as
+    tuples of style indices, for requirements needing several styles.
+    """
+
+    __slots__ = ('executed', 'max_cost', 'outright', 'types', 'styles', 'any_styles', 'flex')
+
+    def __init__(self):
+        self.executed = 0
+        self.max_cost = 0
+        self.outright = 0
+        self.types = [0] * len(MOVE_TYPES)
+        self.styles = [0] * len(STYLES)
+        self.any_styles = [0] * len(STYLES)
+        self.flex = []
+
+    def add(self, cost, type_index, style_indices):
+        """Count one successful execution"""
+        self.executed += 1
+        if cost > self.max_cost:
+            self.max_cost = cost
+        self.types[type_index] += 1
+        if len(style_indices) == 1:
+            style = style_indices[0]
+            self.styles[style] += 1
+            self.any_styles[style] += 1
+        elif style_indices:
+            for style in style_indices:
+                self.any_styles[style] += 1
+            self.flex.append(style_indices)
+
+
+class JudgeRule:
+    """A judge's round requirement and ongoing benefit, compiled from its text
+
+    The requirement is `total` successful executions, of which
+    `style_checks` and `type_checks` give (index, count) minimums. `max_cost`
+    caps every executed move's Technique (0: no cap), and `outright_wins`
+    replaces the execution requirements for crowd favor judges.
+    """
+
+    __slots__ = ('index', 'name', 'reward', 'style_checks', 'type_checks', 'total', 'max_cost',
+                 'outright_wins', 'bonus_styles', 'bonus_types', 'cost_types',
+                 'polyglot', 'minimalist', 'machine', 'showstopper')
+
+    def __init__(self, judge, index):
+        self.index = index
+        self.name = judge.name
+        self.reward = judge.reward_points
+        self.style_checks = ()
+        self.type_checks = ()
+        self.total = 0
+        self.max_cost = 0
+        self.outright_wins = 0
+        self.bonus_styles = 0
+        self.bonus_types = 0
+        self.cost_types = 0
+        self.polyglot = self.minimalist = self.machine = self.showstopper = False
+        self._parse_requirement(judge.requirement)
+        self._parse_ongoing(judge.ongoing_effect)
+
+    @property
+    def style_vector(self):
+        """Moves required per style, in STYLES order"""
+        return self._vector(self.style_checks, len(STYLES))
+
+    @property
+    def type_vector(self):
+        """Moves required per move type, in MOVE_TYPES order"""
+        return self._vector(self.type_checks, len(MOVE_TYPES))
+
+    @staticmethod
+    def _vector(checks, size):
+        vector = [0] * size
+        for index, count in checks:
+            vector[index] = count
+        return tuple(vector)
+
+    def _parse_requirement(self, text):
+        match = re.search(r'Win crowd favor \(outright not style-matched\) (\d+) times', text)
+        if match:
+            self.outright_wins = int(match.group(1))
+            return
+        match = re.search(r'Execute (\d+) moves all cost (\d+) or less', text)
+        if match:
+            self.total, self.max_cost = int(match.group(1)), int(match.group(2))
+            return
+        match = re.search(r'Execute (\d+) moves successfully', text)
+        if match:
+            self.total = int(match.group(1))
+            return
+        if f'each of the {len(STYLES)} styles' in text:
+            extra = re.search(r'\+ (\d+) any', text)
+            self.style_checks = tuple((index, 1) for index in range(len(STYLES)))
+            self.total = len(STYLES) + (int(extra.group(1)) if extra else 0)
+            return
+
+        terms = re.findall(r'(\d+) (\w+)', text.split('(')[0])
+        if not terms:
+            raise ValueError(f'Unrecognized judge requirement on "{self.name}": {text!r}')
+        style_checks, type_checks = [], []
+        for count, word in terms:
+            count = int(count)
+            self.total += count
+            if word in STYLE_INDEX:
+                style_checks.append((STYLE_INDEX[word], count))
+            elif word in TYPE_INDEX:
+                type_checks.append((TYPE_INDEX[word], count))
+            elif word != 'Any':
+                raise ValueError(f'Unrecognized judge requirement on "{self.name}": {text!r}')
+        self.style_checks, self.type_checks = tuple(style_checks), tuple(type_checks)
+
+    def _parse_ongoing(self, text):
+        if 'gain +1 bonus score' in text:
+            match = re.search(r'Your (\w+) moves', text)
+            if match and match.group(1) in STYLE_BITS:
+                self.bonus_styles = STYLE_BITS[match.group(1)]
+            else:
+                self.bonus_types = type_mask(text)
+        elif 'cost -1' in text:
+            self.cost_types = type_mask(text)
+        elif 'count as ALL their listed styles' in text:
+            self.polyglot = True
+        elif 'played no cost 4+ moves draw 2' in text:
+            self.minimalist = True
+        elif 'execute all 8 moves' in text:
+            self.machine = True
+        elif 'win crowd favor' in text:
+            self.showstopper = True
+        else:
+            raise ValueError(f'Unrecognized judge ongoing effect on "{self.name}": {text!r}')
+        if not (self.bonus_styles or self.bonus_types or self.cost_types or self.polyglot
+                or self.minimalist or self.machine or self.showstopper):
+            raise ValueError(f'Unrecognized judge ongoing effect on "{self.name}": {text!r}')
+
+    def is_met(self, counts, polyglot=False):
+        """True if a player's RoundCounts satisfy this judge
+
+        With `polyglot` (The Polyglot's ongoing effect) multi-style moves
+        count as all of their styles instead of one of the player's choice.
+        """
+        if self.outright_wins:
+            return counts.outright >= self.outright_wins
+        if counts.executed < self.total:
+            return False
+        if self.max_cost and counts.max_cost > self.max_cost:
+            return False
+        types = counts.types
+        for index, count in self.type_checks:
+            if types[index] < count:
+                return False
+        if not self.style_checks:
+            return True
+        # With one style needed, every move listing it can count toward it
+        if polyglot or len(self.style_checks) == 1:
+            any_styles = counts.any_styles
+            return all(any_styles[index] >= count for index, count in self.style_checks)
+        styles = counts.styles
+        short = {index: count - styles[index] for index, count in self.style_checks if styles[index] < count}
+        return not short or _assign_styles(short, counts.flex)
+
+
+def _assign_styles(short, flex, start=0):
+    """Can the multi-style moves flex[start:] cover the style counts in `short`?
+
+    Each move counts as one of its styles. There are only a few
+    multi-style moves in a round, so this backtracks.
+    """
+    if not short:
+        return True
+    if sum(short.values()) > len(flex) - start:
+        return False
+    for style in flex[start]:
+        if style in short:
+            rest = dict(short)
+            rest[style] -= 1
+            if not rest[style]:
+                del rest[style]
+            if _assign_styles(rest, flex, start + 1):
+                return True
+    return _assign_styles(short, flex, start + 1)
+
+
+@lru_cache(maxsize=None)
+def compile_judge_rules(judges):
+    """Compile a tuple of judge records (CardSet.judges) into JudgeRules
+
+    Cached per card set. Raises ValueError listing every judge whose text
+    can't be compiled, by its line in judge-cards.csv.
+    """
+    rules, errors = [], []
+    for index, judge in enumerate(judges):
+        try:
+            rules.append(JudgeRule(judge, index))
+        except ValueError as e:
+            errors.append(f'judge-cards.csv:{index + 2}: {e}')
+    if errors:
+        raise ValueError('\n'.join(errors))
+    return tuple(rules)
+
+
+def main():
+    """Print every judge's compiled requirement vectors"""
+    card_set = load_card_set(Path(__file__).parent.parent / 'card-data')
+
+    print('⚖️  Beat by Beat - Judge Rules')
+    print('=' * 50)
+    print()
+    print(f'{"Judge":24} {"total":>5}  {"styles " + "/".join(s[:3] for s in STYLES):26}  '
+          f'{"types " + "/".join(t[:3] for t in MOVE_TYPES):30}  other')
+    for rule in compile_judge_rules(card_set.judges):
+        other = []
+        if rule.max_cost:
+            other.append(f'all cost <= {rule.max_cost}')
+        if rule.outright_wins:
+            other.append(f'{rule.outright_wins} outright wins')
+        print(f'{rule.name:24} {rule.total:5}  {" ".join(map(str, rule.style_vector)):26}  '
+              f'{" ".join(map(str, rule.type_vector)):30}  {", ".join(other)}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show every judge's compiled requirements")
+    parser.parse_args()
+    try:
+        sys.exit(main())
+    except ValueError as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
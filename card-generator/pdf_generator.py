@@ -4,16 +4,35 @@ PDF Generator for Beat by Beat Cards
 Converts HTML files to print-ready PDFs using Playwright
 """
 
+import argparse
 import asyncio
+import time
 from pathlib import Path
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from build_cache import BuildManifest, hash_inputs
 
 
-async def html_to_pdf(html_path, pdf_path):
-    """Convert an HTML file to PDF using Playwright"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
+# Print settings passed to page.pdf() (also part of each PDF's cache key)
+PDF_OPTIONS = {
+    'format': 'Letter',
+    'print_background': True,
+    'margin': {
+        'top': '0',
+        'right': '0',
+        'bottom': '0',
+        'left': '0'
+    },
+    'prefer_css_page_size': True,
+}
+
+
+async def html_to_pdf(pool, html_path, pdf_path):
+    """Convert an HTML file to PDF using a page borrowed from the browser pool
+
+    Returns the seconds spent rendering, not counting time waiting for a page.
+    """
+    async with pool.page() as page:
+        start = time.perf_counter()
 
         # Load the HTML file
         await page.goto(f'file://{html_path.absolute()}')
@@ -22,25 +41,24 @@ async def html_to_pdf(html_path, pdf_path):
         await page.wait_for_load_state('networkidle')
 
         # Generate PDF with print settings
-        await page.pdf(
-            path=str(pdf_path),
-            format='Letter',
-            print_background=True,
-            margin={
-                'top': '0',
-                'right': '0',
-                'bottom': '0',
-                'left': '0'
-            },
-            prefer_css_page_size=True
-        )
-
-        await browser.close()
-        print(f'Generated: {pdf_path.name}')
-
-
-async def main():
-    """Generate PDFs for all card HTML files"""
+        await page.pdf(path=str(pdf_path), **PDF_OPTIONS)
+
+        return time.perf_counter() - start
+
+
+async def main(pool=None, jobs=1, force=False):
+    """Generate PDFs for all card HTML files, rendering up to `jobs` at once
+
+    PDFs whose HTML and print settings are unchanged since the last build are
+    skipped unless `force` is set.
+    """
+    if jobs < 1:
+        raise ValueError(f'--jobs must be at least 1, got {jobs}')
+
+    if pool is None:
+        async with BrowserPool(jobs) as pool:
+            return await main(pool, jobs, force)
+
     base_dir = Path(__file__).parent.parent
     output_dir = base_dir / 'output' / 'html'
     pdf_dir = base_dir / 'output' / 'pdf'
@@ -48,6 +66,8 @@ async def main():
     # Create PDF directory
     pdf_dir.mkdir(parents=True, exist_ok=True)
 
+    manifest = BuildManifest(base_dir / 'output', force=force)
+
     # List of HTML files to convert
     html_files = [
         'starter-cards.html',
@@ -64,16 +84,45 @@ async def main():
     print('=' * 40)
     print()
 
-    # Convert each HTML file to PDF
+    # Start every conversion at once; the semaphore (and the pool's own
+    # context limit) keeps at most `jobs` pages rendering at the same time
+    slots = asyncio.Semaphore(jobs)
+
+    async def convert(html_path, pdf_path, key, digest):
+        async with slots:
+            elapsed = await html_to_pdf(pool, html_path, pdf_path)
+        manifest.record(key, digest)
+        return elapsed
+
+    wall_start = time.perf_counter()
+    tasks = []
     for html_file in html_files:
         html_path = output_dir / html_file
         if html_path.exists():
-            pdf_name = html_file.replace('.html', '.pdf')
-            pdf_path = pdf_dir / pdf_name
-            await html_to_pdf(html_path, pdf_path)
+            pdf_path = pdf_dir / html_file.replace('.html', '.pdf')
+            key = manifest.key(pdf_path)
+            digest = hash_inputs('pdf', PDF_OPTIONS, html_path)
+            if manifest.is_fresh(key, digest, [pdf_path]):
+                tasks.append((pdf_path, None))
+            else:
+                tasks.append((pdf_path, asyncio.create_task(convert(html_path, pdf_path, key, digest))))
         else:
             print(f'Warning: {html_file} not found, skipping...')
 
+    # Report in list order so output is stable whatever finishes first
+    rendered = 0
+    for pdf_path, task in tasks:
+        if task is None:
+            print(f'Up to date: {pdf_path.name}')
+            continue
+        elapsed = await task
+        rendered += 1
+        print(f'Generated: {pdf_path.name} ({elapsed:.2f}s)')
+
+    manifest.save()
+
+    print()
+    print(f'⏱  {rendered} PDFs in {time.perf_counter() - wall_start:.2f}s ({jobs} job(s))')
     print()
     print(f'✅ All PDFs generated in: {pdf_dir}')
     print()
@@ -87,4 +136,10 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Convert card HTML files to print-ready PDFs')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='number of PDFs to render concurrently (default: 1)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every PDF even if its inputs are unchanged')
+    args = parser.parse_args()
+    asyncio.run(main(jobs=args.jobs, force=args.force))
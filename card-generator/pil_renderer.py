@@ -0,0 +1,649 @@
+#!/usr/bin/env python3
+"""
+Pillow Card Renderer for Beat by Beat
+Draws move, rhythm, judge, stumble and back cards straight from card records,
+following the layout in generator.generate_css(), with no browser needed
+"""
+
+import argparse
+import io
+import re
+import sys
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFont, ImageStat
+from card_model import load_card_set
+import generator
+
+
+# Layout units are CSS pixels at 96 DPI, matching generate_css()
+CARD_WIDTH = 240   # 2.5in
+CARD_HEIGHT = 336  # 3.5in
+BORDER = 2
+RADIUS = 0.15 * 96
+LINE_HEIGHT = 1.15  # CSS "line-height: normal" for Arial
+
+# Cards are drawn at this multiple of the target size, then downsampled,
+# which antialiases edges, icons and text
+SUPERSAMPLE = 2
+
+# Body background from generate_css() shows through the rounded corners
+PAGE_BACKGROUND = '#f0f0f0'
+
+# Candidate font files per (bold, italic), Arial first to match the CSS
+FONT_FILES = {
+    (False, False): ['Arial.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf', 'DejaVuSans.ttf'],
+    (True, False): ['Arial Bold.ttf', 'arialbd.ttf', 'LiberationSans-Bold.ttf', 'DejaVuSans-Bold.ttf'],
+    (False, True): ['Arial Italic.ttf', 'ariali.ttf', 'LiberationSans-Italic.ttf', 'DejaVuSans-Oblique.ttf'],
+    (True, True): ['Arial Bold Italic.ttf', 'arialbi.ttf', 'LiberationSans-BoldItalic.ttf',
+                   'DejaVuSans-BoldOblique.ttf'],
+}
+
+# Mean absolute per-channel difference (0-255) allowed over a whole image,
+# and within any one card tile, so one missing card can't hide in the average
+DEFAULT_TOLERANCE = 6.0
+DEFAULT_TILE_TOLERANCE = 24.0
+
+
+def pt(points):
+    """Convert a CSS point size to CSS pixels"""
+    return points * 96 / 72
+
+
+def inch(inches):
+    """Convert a CSS inch length to CSS pixels"""
+    return inches * 96
+
+
+def tile_size(scale_factor):
+    """Pixel size of one card rendered at `scale_factor`"""
+    return round(CARD_WIDTH * scale_factor), round(CARD_HEIGHT * scale_factor)
+
+
+@lru_cache(maxsize=None)
+def load_font(size_px, bold=False, italic=False):
+    """Load the best available font at a pixel size (cached)"""
+    size = max(1, round(size_px))
+    for name in FONT_FILES[(bold, italic)]:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+# --- SVG icons ---------------------------------------------------------------
+
+_PATH_TOKEN = re.compile(r'[MLHVCQTZmlhvcqtz]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+def _quadratic(p0, p1, p2, steps=16):
+    return [((1 - t) ** 2 * p0[0] + 2 * (1 - t) * t * p1[0] + t ** 2 * p2[0],
+             (1 - t) ** 2 * p0[1] + 2 * (1 - t) * t * p1[1] + t ** 2 * p2[1])
+            for t in (i / steps for i in range(1, steps + 1))]
+
+
+def _cubic(p0, p1, p2, p3, steps=16):
+    points = []
+    for i in range(1, steps + 1):
+        t = i / steps
+        a, b, c, d = (1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2, t ** 3
+        points.append((a * p0[0] + b * p1[0] + c * p2[0] + d * p3[0],
+                       a * p0[1] + b * p1[1] + c * p2[1] + d * p3[1]))
+    return points
+
+
+def parse_path(d):
+    """Flatten SVG path data into a list of (points, closed) subpaths"""
+    tokens = _PATH_TOKEN.findall(d)
+    subpaths = []
+    points = []
+    current = (0.0, 0.0)
+    start = current
+    control = None  # Last quadratic control point, for T
+    command = None
+    i = 0
+
+    def number():
+        nonlocal i
+        value = float(tokens[i])
+        i += 1
+        return value
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+        relative = command.islower()
+        op = command.upper()
+        ox, oy = current if relative else (0.0, 0.0)
+
+        if op == 'Z':
+            if points:
+                subpaths.append((points, True))
+            points = []
+            current = start
+            control = None
+            continue
+
+        if op == 'M':
+            if points:
+                subpaths.append((points, False))
+            current = (ox + number(), oy + number())
+            start = current
+            points = [current]
+            # Extra coordinate pairs after M are implicit L commands
+            command = 'l' if relative else 'L'
+            control = None
+        elif op == 'L':
+            current = (ox + number(), oy + number())
+            points.append(current)
+            control = None
+        elif op == 'H':
+            current = ((ox if relative else 0.0) + number(), current[1])
+            points.append(current)
+            control = None
+        elif op == 'V':
+            current = (current[0], (oy if relative else 0.0) + number())
+            points.append(current)
+            control = None
+        elif op == 'Q':
+            control = (ox + number(), oy + number())
+            end = (ox + number(), oy + number())
+            points.extend(_quadratic(current, control, end))
+            current = end
+        elif op == 'T':
+            if control is None:
+                control = current
+            else:
+                control = (2 * current[0] - control[0], 2 * current[1] - control[1])
+            end = (ox + number(), oy + number())
+            points.extend(_quadratic(current, control, end))
+            current = end
+        elif op == 'C':
+            c1 = (ox + number(), oy + number())
+            c2 = (ox + number(), oy + number())
+            end = (ox + number(), oy + number())
+            points.extend(_cubic(current, c1, c2, end))
+            current = end
+            control = None
+        else:
+            raise ValueError(f'Unsupported SVG path command: {command}')
+
+    if points:
+        subpaths.append((points, False))
+    return subpaths
+
+
+def _paint(value, color):
+    if value is None or value == 'none':
+        return None
+    return color if value == 'currentColor' else ImageColor.getrgb(value)
+
+
+@lru_cache(maxsize=None)
+def rasterize_svg(svg, size_px, color, opacity=1.0):
+    """Rasterize one of the generator's icon SVGs to an RGBA image (cached)
+
+    Supports the subset the icons use: path, circle, line and rect with
+    fill, stroke, stroke-width, rx and opacity; currentColor becomes `color`.
+    """
+    root = ET.fromstring(svg)
+    _, _, view_width, view_height = (float(v) for v in root.get('viewBox').split())
+    scale = size_px / max(view_width, view_height)
+    icon = Image.new('RGBA', (size_px, size_px), (0, 0, 0, 0))
+
+    for element in root:
+        tag = element.tag.split('}')[-1]
+        # SVG fills shapes black unless told otherwise; lines never fill
+        fill = _paint(element.get('fill', None if tag == 'line' else '#000000'), color)
+        stroke = _paint(element.get('stroke'), color)
+        width = float(element.get('stroke-width', 1)) * scale
+        alpha = round(255 * opacity * float(element.get('opacity', 1)))
+
+        layer = Image.new('RGBA', icon.size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        fill_rgba = fill + (alpha,) if fill else None
+        stroke_rgba = stroke + (alpha,) if stroke else None
+
+        def xy(x, y):
+            return (float(x) * scale, float(y) * scale)
+
+        if tag == 'path':
+            for points, closed in parse_path(element.get('d')):
+                scaled = [xy(x, y) for x, y in points]
+                if fill_rgba and len(scaled) > 2:
+                    draw.polygon(scaled, fill=fill_rgba)
+                if stroke_rgba and len(scaled) > 1:
+                    if closed:
+                        scaled = scaled + [scaled[0]]
+                    draw.line(scaled, fill=stroke_rgba, width=max(1, round(width)), joint='curve')
+        elif tag == 'circle':
+            cx, cy = xy(element.get('cx'), element.get('cy'))
+            r = float(element.get('r')) * scale
+            if fill_rgba:
+                draw.ellipse([cx - r, cy - r, cx + r, cy + r], fill=fill_rgba)
+            if stroke_rgba:
+                # SVG strokes are centred on the outline; Pillow draws inward
+                outer = r + width / 2
+                draw.ellipse([cx - outer, cy - outer, cx + outer, cy + outer],
+                             outline=stroke_rgba, width=max(1, round(width)))
+        elif tag == 'line':
+            start = xy(element.get('x1'), element.get('y1'))
+            end = xy(element.get('x2'), element.get('y2'))
+            if stroke_rgba:
+                draw.line([start, end], fill=stroke_rgba, width=max(1, round(width)))
+        elif tag == 'rect':
+            x, y = xy(element.get('x'), element.get('y'))
+            w = float(element.get('width')) * scale
+            h = float(element.get('height')) * scale
+            radius = float(element.get('rx', 0)) * scale
+            if fill_rgba:
+                draw.rounded_rectangle([x, y, x + w, y + h], radius, fill=fill_rgba)
+            if stroke_rgba:
+                half = width / 2
+                draw.rounded_rectangle([x - half, y - half, x + w + half, y + h + half], radius + half,
+                                       outline=stroke_rgba, width=max(1, round(width)))
+        else:
+            raise ValueError(f'Unsupported SVG element: {tag}')
+
+        icon = Image.alpha_composite(icon, layer)
+
+    return icon
+
+
+# --- Text layout -------------------------------------------------------------
+
+class CardCanvas:
+    """Drawing surface for one card, addressed in CSS pixels"""
+
+    def __init__(self, scale_factor, background='white'):
+        self.k = scale_factor * SUPERSAMPLE
+        self.target_size = tile_size(scale_factor)
+        self.image = Image.new('RGB', (self.px(CARD_WIDTH), self.px(CARD_HEIGHT)), background)
+        self.draw = ImageDraw.Draw(self.image)
+
+    def px(self, value):
+        return round(value * self.k)
+
+    def box(self, left, top, right, bottom):
+        return [self.px(left), self.px(top), self.px(right) - 1, self.px(bottom) - 1]
+
+    def rect(self, left, top, right, bottom, fill, radius=0):
+        if radius:
+            self.draw.rounded_rectangle(self.box(left, top, right, bottom), self.px(radius), fill=fill)
+        else:
+            self.draw.rectangle(self.box(left, top, right, bottom), fill=fill)
+
+    def gradient(self, left, top, right, bottom, color1, color2, diagonal):
+        """Fill a box with a 135deg (diagonal) or top-to-bottom linear gradient"""
+        box = self.box(left, top, right, bottom)
+        width, height = box[2] - box[0] + 1, box[3] - box[1] + 1
+        ramp = Image.linear_gradient('L')
+        if diagonal:
+            # For 135deg the gradient position is (x + y) / (width + height)
+            across = ramp.rotate(90).resize((width, height)).point(lambda v: v * width / (width + height))
+            down = ramp.resize((width, height)).point(lambda v: v * height / (width + height))
+            mask = ImageChops.add(across, down)
+        else:
+            mask = ramp.resize((width, height))
+        blend = Image.composite(Image.new('RGB', (width, height), color2),
+                                Image.new('RGB', (width, height), color1), mask)
+        self.image.paste(blend, (box[0], box[1]))
+
+    def icon(self, svg, left, top, size, color, opacity=1.0):
+        rgba = rasterize_svg(svg, self.px(size), color, opacity)
+        self.image.paste(rgba, (self.px(left), self.px(top)), rgba)
+
+    def font(self, size, bold=False, italic=False):
+        return load_font(size * self.k, bold, italic)
+
+    def wrap(self, text, size, width, bold=False, italic=False):
+        """Greedy word wrap to a width in CSS pixels"""
+        font = self.font(size, bold, italic)
+        limit = width * self.k
+        lines = []
+        for paragraph in text.split('\n'):
+            line = ''
+            for word in paragraph.split():
+                candidate = f'{line} {word}' if line else word
+                if line and self.draw.textlength(candidate, font=font) > limit:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+    def text(self, lines, left, top, width, size, fill, bold=False, italic=False,
+             align='left', line_height=LINE_HEIGHT, letter_spacing=0):
+        """Draw wrapped lines in a box; returns the height used in CSS pixels"""
+        font = self.font(size, bold, italic)
+        ascent, descent = font.getmetrics()
+        step = size * line_height
+        for index, line in enumerate(lines):
+            # Centre the glyphs in the CSS line box (half-leading)
+            y = self.px(top + index * step) + round((step * self.k - ascent - descent) / 2)
+            line_width = self.draw.textlength(line, font=font) + letter_spacing * self.k * len(line)
+            if align == 'center':
+                x = self.px(left + width / 2) - line_width / 2
+            elif align == 'right':
+                x = self.px(left + width) - line_width
+            else:
+                x = self.px(left)
+            if letter_spacing:
+                for char in line:
+                    self.draw.text((x, y), char, font=font, fill=fill)
+                    x += self.draw.textlength(char, font=font) + letter_spacing * self.k
+            else:
+                self.draw.text((x, y), line, font=font, fill=fill)
+        return len(lines) * step
+
+    def finish(self):
+        """Clip to the rounded card shape, draw the border and downsample"""
+        page = Image.new('RGB', self.image.size, PAGE_BACKGROUND)
+        mask = Image.new('L', self.image.size, 0)
+        ImageDraw.Draw(mask).rounded_rectangle(self.box(0, 0, CARD_WIDTH, CARD_HEIGHT), self.px(RADIUS), fill=255)
+        page.paste(self.image, (0, 0), mask)
+        ImageDraw.Draw(page).rounded_rectangle(self.box(0, 0, CARD_WIDTH, CARD_HEIGHT), self.px(RADIUS),
+                                               outline='#333333', width=self.px(BORDER))
+        return page.resize(self.target_size, Image.LANCZOS)
+
+
+def _blend(color, background, opacity):
+    """Flatten a color drawn at `opacity` over a solid background"""
+    fg, bg = ImageColor.getrgb(color), ImageColor.getrgb(background)
+    return tuple(round(f * opacity + b * (1 - opacity)) for f, b in zip(fg, bg))
+
+
+# --- Card layouts ------------------------------------------------------------
+
+INNER_LEFT = BORDER
+INNER_RIGHT = CARD_WIDTH - BORDER
+INNER_WIDTH = CARD_WIDTH - 2 * BORDER
+
+
+def _header(canvas, name, size, background, min_height=0, gradient=None):
+    """Centred header band; returns its bottom edge"""
+    padding = inch(0.15)
+    lines = canvas.wrap(name, size, INNER_WIDTH - 2 * padding, bold=True)
+    height = max(min_height, len(lines) * size * LINE_HEIGHT + 2 * padding)
+    bottom = BORDER + height
+    if gradient:
+        canvas.gradient(INNER_LEFT, BORDER, INNER_RIGHT, bottom, gradient[0], gradient[1], diagonal=True)
+    else:
+        canvas.rect(INNER_LEFT, BORDER, INNER_RIGHT, bottom, background)
+    text_top = BORDER + (height - len(lines) * size * LINE_HEIGHT) / 2
+    if size == pt(14):
+        # .move-card .card-name has a soft text shadow
+        canvas.text(lines, INNER_LEFT + 1, text_top + 1, INNER_WIDTH, size, (150, 150, 150),
+                    bold=True, align='center')
+    canvas.text(lines, INNER_LEFT, text_top, INNER_WIDTH, size, 'white', bold=True, align='center')
+    return bottom
+
+
+def _stat_rows(canvas, rows, type_icon, header_bottom, stumble=False):
+    """Move-card body: centred type icon above the stat rows"""
+    pad = inch(0.08)
+    row_pad_y, row_pad_x = inch(0.04), inch(0.08)
+    gap = inch(0.05)
+    left, right = INNER_LEFT + pad, INNER_RIGHT - pad
+
+    heights = []
+    for row in rows:
+        if row['kind'] == 'recovery':
+            content = max(inch(0.25) + 0.2 * pt(9), pt(8) * LINE_HEIGHT)
+        else:
+            content = max(pt(9), row.get('value_size', pt(9))) * LINE_HEIGHT
+        heights.append(content + 2 * row_pad_y)
+
+    top = CARD_HEIGHT - BORDER - pad - sum(heights) - gap * (len(rows) - 1)
+
+    # Icon centred in the space between header and stats
+    image_top = header_bottom + pad + inch(0.05)
+    image_bottom = top - inch(0.05)
+    icon_size = inch(0.8)
+    canvas.icon(type_icon, CARD_WIDTH / 2 - icon_size / 2,
+                (image_top + image_bottom) / 2 - icon_size / 2, icon_size, (0, 0, 0), 0.7)
+
+    y = top
+    for row, height in zip(rows, heights):
+        canvas.rect(left, y, right, y + height, row['background'], radius=inch(0.05))
+        inner_left, inner_width = left + row_pad_x, right - left - 2 * row_pad_x
+        if row['kind'] == 'recovery':
+            icon = inch(0.25)
+            canvas.icon(row['icon'], inner_left, y + (height - icon) / 2, icon, ImageColor.getrgb('#1976d2'))
+            canvas.text([row['value']], inner_left + icon + inch(0.05), y + (height - pt(8) * LINE_HEIGHT) / 2,
+                        inner_width, pt(8), '#1565c0', bold=True)
+        else:
+            canvas.text([row['label']], inner_left, y + row_pad_y, inner_width, pt(9), '#555555', bold=True)
+            canvas.text([row['value']], inner_left, y + row_pad_y, inner_width, row.get('value_size', pt(9)),
+                        row['color'], bold=row.get('bold', False), align='right')
+        y += height + gap
+
+
+def render_move_card(move, scale_factor):
+    """Draw a starter or pool move card"""
+    canvas = CardCanvas(scale_factor)
+    style = move.style
+    styles = move.styles
+    colors = [generator.COLORS.get(s, generator.COLORS['Styleless']) for s in styles] or [generator.COLORS['Styleless']]
+    gradient = (colors[0], colors[1]) if len(colors) > 1 else None
+    header_bottom = _header(canvas, move.name, pt(14), colors[0], min_height=inch(0.5), gradient=gradient)
+
+    recovery = generator.RECOVERY_ACTIONS.get(move.recovery_action,
+                                              generator.RECOVERY_ACTIONS['Stamina'])
+    rows = [
+        {'kind': 'stat', 'label': 'Technique', 'value': str(move.cost), 'background': '#e8e8e8',
+         'value_size': pt(12), 'color': '#c0392b', 'bold': True},
+        {'kind': 'stat', 'label': 'Type', 'value': move.type, 'background': '#f8f8f8', 'color': '#222222'},
+        {'kind': 'stat', 'label': 'Style', 'value': style or 'Basic', 'background': '#f8f8f8', 'color': '#222222'},
+        {'kind': 'stat', 'label': 'Bonus', 'value': f'+{move.bonus}', 'background': '#e8f5e9',
+         'value_size': pt(11), 'color': '#27ae60', 'bold': True},
+        {'kind': 'recovery', 'icon': recovery['icon'], 'value': recovery['description'], 'background': '#e3f2fd'},
+    ]
+    _stat_rows(canvas, rows, generator.TYPE_ICONS.get(move.type, '<svg viewBox="0 0 100 100"/>'), header_bottom)
+    return canvas.finish()
+
+
+def render_stumble_card(scale_factor):
+    """Draw a stumble card (move layout with greyed-out stats)"""
+    canvas = CardCanvas(scale_factor)
+    header_bottom = _header(canvas, 'Stumble', pt(14), '#5A5A5A', min_height=inch(0.5))
+    rows = [
+        {'kind': 'stat', 'label': 'Technique', 'value': '0', 'background': '#e8e8e8',
+         'value_size': pt(12), 'color': '#c0392b', 'bold': True},
+        {'kind': 'stat', 'label': 'Type', 'value': '—', 'background': '#f8f8f8', 'color': '#999999'},
+        {'kind': 'stat', 'label': 'Style', 'value': '—', 'background': '#f8f8f8', 'color': '#999999'},
+        {'kind': 'stat', 'label': 'Bonus', 'value': '+0', 'background': '#f0f0f0',
+         'value_size': pt(11), 'color': '#999999', 'bold': True},
+        {'kind': 'recovery', 'icon': generator.STUMBLE_RECOVERY_ICON, 'value': 'Draw 1', 'background': '#e3f2fd'},
+    ]
+    _stat_rows(canvas, rows, generator.STUMBLE_ICON, header_bottom)
+    return canvas.finish()
+
+
+def render_rhythm_card(rhythm, scale_factor):
+    """Draw a rhythm card: effect, condition and flavor text"""
+    canvas = CardCanvas(scale_factor)
+    header_bottom = _header(canvas, rhythm.name, pt(12), '#8E44AD')
+
+    padding = inch(0.15)
+    gap = inch(0.1)
+    left, width = INNER_LEFT + padding, INNER_WIDTH - 2 * padding
+    y = header_bottom + padding
+    bottom = CARD_HEIGHT - BORDER - padding
+
+    if rhythm.effect:
+        lines = canvas.wrap(rhythm.effect, pt(14), width, bold=True)
+        y += canvas.text(lines, left, y, width, pt(14), '#8E44AD', bold=True, align='center') + gap
+    if rhythm.condition:
+        lines = canvas.wrap(rhythm.condition, pt(9), width, italic=True)
+        y += canvas.text(lines, left, y, width, pt(9), '#555555', italic=True, align='center') + gap
+
+    if rhythm.flavor_text:
+        # Flavor fills the remaining space and is centred within it
+        size = pt(12) if not rhythm.effect else pt(10)
+        inner_width = width - 2 * padding
+        lines = canvas.wrap(rhythm.flavor_text, size, inner_width, italic=True)
+        height = len(lines) * size * LINE_HEIGHT
+        top = y + (bottom - y - height) / 2
+        canvas.text(lines, left + padding, top, inner_width, size, '#666666', italic=True, align='center')
+
+    return canvas.finish()
+
+
+def render_judge_card(judge, scale_factor):
+    """Draw a judge card: header, quote, requirement, reward and ongoing effect"""
+    canvas = CardCanvas(scale_factor)
+    canvas.gradient(0, 0, CARD_WIDTH, CARD_HEIGHT, '#ffffff', '#fef9f0', diagonal=False)
+
+    padding = inch(0.15)
+    left, width = INNER_LEFT + padding, INNER_WIDTH - 2 * padding
+    name_lines = canvas.wrap(judge.name, pt(13), width, bold=True)
+    title_lines = canvas.wrap(judge.title, pt(9), width, italic=True)
+    height = (2 * padding + len(name_lines) * pt(13) * LINE_HEIGHT + len(title_lines) * pt(9) * LINE_HEIGHT
+              + inch(0.05) + pt(10) * LINE_HEIGHT)
+    canvas.rect(INNER_LEFT, BORDER, INNER_RIGHT, BORDER + height, '#C0392B')
+
+    y = BORDER + padding
+    y += canvas.text(name_lines, left, y, width, pt(13), 'white', bold=True)
+    y += canvas.text(title_lines, left, y, width, pt(9), _blend('#ffffff', '#C0392B', 0.9), italic=True)
+    y += inch(0.05)
+    canvas.text(['★' * judge.difficulty], left, y, width, pt(10), 'white')
+
+    body_padding = inch(0.12)
+    gap = inch(0.08)
+    left, width = INNER_LEFT + body_padding, INNER_WIDTH - 2 * body_padding
+    y = BORDER + height + body_padding
+
+    lines = canvas.wrap(f'"{judge.flavor_quote}"', pt(8), width, italic=True)
+    y += canvas.text(lines, left, y, width, pt(8), '#666666', italic=True, align='center') + inch(0.08)
+    canvas.rect(left, y, left + width, y + 1, '#dddddd')
+    y += 1 + gap
+
+    for label, text in (('Requirement:', judge.requirement),):
+        y += canvas.text([label], left, y, width, pt(8), 'black', bold=True, line_height=1.3)
+        lines = canvas.wrap(text, pt(8), width)
+        y += canvas.text(lines, left, y, width, pt(8), 'black', line_height=1.3) + gap
+
+    lines = canvas.wrap(f'Reward: +{judge.reward_points} points', pt(9), width, bold=True)
+    y += canvas.text(lines, left, y, width, pt(9), '#27ae60', bold=True) + gap
+
+    y += canvas.text(['Ongoing:'], left, y, width, pt(8), 'black', bold=True, line_height=1.3)
+    lines = canvas.wrap(judge.ongoing_effect, pt(8), width)
+    canvas.text(lines, left, y, width, pt(8), 'black', line_height=1.3)
+
+    return canvas.finish()
+
+
+def render_back(card_type, scale_factor):
+    """Draw a card back for one of generator.BACK_TYPES"""
+    canvas = CardCanvas(scale_factor, background=generator.BACK_COLORS[card_type])
+    title, label = pt(18), pt(14)
+    height = title * LINE_HEIGHT + inch(0.2) + label * LINE_HEIGHT
+    top = (CARD_HEIGHT - height) / 2
+    canvas.text(['Beat by Beat'], 0, top, CARD_WIDTH, title, 'white', bold=True, align='center')
+    canvas.text([card_type.title().upper()], 0, top + title * LINE_HEIGHT + inch(0.2), CARD_WIDTH, label,
+                'white', align='center', letter_spacing=inch(0.05))
+    return canvas.finish()
+
+
+def render_empty(scale_factor):
+    """Draw the blank filler used to pad the last sprite sheet of a deck"""
+    return CardCanvas(scale_factor).finish()
+
+
+def render_card(deck, row, scale_factor):
+    """Draw one card of a deck from its card record (see generator.load_deck_rows)"""
+    if deck in ('starter', 'pool'):
+        return render_move_card(row, scale_factor)
+    if deck == 'rhythm':
+        return render_rhythm_card(row, scale_factor)
+    if deck == 'judge':
+        return render_judge_card(row, scale_factor)
+    return render_stumble_card(scale_factor)
+
+
+def mean_difference(image_a, image_b, columns=1, rows=1):
+    """Mean absolute per-channel difference (0-255) between two same-sized images
+
+    Returns (whole image, worst tile) with the images split into a
+    `columns` x `rows` grid of tiles.
+    """
+    diff = ImageChops.difference(image_a.convert('RGB'), image_b.convert('RGB'))
+    width, height = diff.size
+    worst = 0.0
+    for row in range(rows):
+        for column in range(columns):
+            box = (column * width // columns, row * height // rows,
+                   (column + 1) * width // columns, (row + 1) * height // rows)
+            worst = max(worst, sum(ImageStat.Stat(diff.crop(box)).mean) / 3)
+    return sum(ImageStat.Stat(diff).mean) / 3, worst
+
+
+def main(tolerance=DEFAULT_TOLERANCE, tile_tolerance=DEFAULT_TILE_TOLERANCE):
+    """Compare Pillow-rendered sheets and backs against browser output in output/tts
+
+    Returns 1 if any image differs by more than `tolerance` overall or
+    `tile_tolerance` within any one card.
+    """
+    # Imported here: tts_generator imports this module for --renderer pillow
+    import tts_generator
+
+    base_dir = Path(__file__).parent.parent
+    tts_dir = base_dir / 'output' / 'tts'
+    sprites = tts_generator.SpriteManifest(tts_dir)
+    decks = generator.load_deck_rows(load_card_set(base_dir / 'card-data'))
+
+    print('🎭 Beat by Beat - Pillow vs browser pixel diff')
+    print('=' * 50)
+    print()
+
+    checks = []
+    _, _, scale_factor, final_width, final_height = tts_generator.sheet_geometry(tts_generator.SHEET_WIDTH)
+    for deck, rows in decks.items():
+        stem = generator.DECK_FILES[deck][0].replace('.html', '')
+        for filename, sheet_rows in tts_generator.split_sheets(rows, tts_dir / stem, None):
+            checks.append((filename, (tts_generator.CARDS_PER_ROW, tts_generator.CARDS_PER_COL),
+                           lambda deck=deck, sheet_rows=sheet_rows: Image.open(io.BytesIO(
+                               tts_generator.composite_pillow_sheet(deck, sheet_rows, scale_factor,
+                                                                    (final_width, final_height))))))
+    for card_type in ['move', 'rhythm', 'judge']:
+        checks.append((f'{card_type}-backs.png', (1, 1),
+                       lambda card_type=card_type: render_back(card_type, tts_generator.BACK_SCALE_FACTOR)))
+
+    failures = 0
+    for filename, grid, render in checks:
+        reference = sprites.sheet_path(filename)
+        if not reference.exists():
+            print(f'  skip  {filename} (no browser render)')
+            continue
+        expected = Image.open(reference)
+        actual = render()
+        if actual.size != expected.size:
+            print(f'  FAIL  {filename}: size {actual.size} != {expected.size}')
+            failures += 1
+            continue
+        diff, worst = mean_difference(actual, expected, *grid)
+        ok = diff <= tolerance and worst <= tile_tolerance
+        failures += not ok
+        print(f'  {"ok  " if ok else "FAIL"}  {filename}: mean diff {diff:.2f}, worst card {worst:.2f}')
+
+    print()
+    if failures:
+        print(f'❌ {failures} image(s) over tolerance {tolerance} (per card {tile_tolerance})')
+        return 1
+    print(f'✅ All images within tolerance {tolerance} (per card {tile_tolerance})')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pixel-diff the Pillow renderer against browser sprites')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'max mean per-channel difference, 0-255 (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--tile-tolerance', type=float, default=DEFAULT_TILE_TOLERANCE,
+                        help=f'max mean per-channel difference within any one card (default: {DEFAULT_TILE_TOLERANCE})')
+    args = parser.parse_args()
+    sys.exit(main(args.tolerance, args.tile_tolerance))
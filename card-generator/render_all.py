@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Combined PDF + TTS Renderer for Beat by Beat Cards
+Runs both browser-based generators against one shared Chromium instance
+"""
+
+import argparse
+import asyncio
+from browser_pool import BrowserPool, DEFAULT_POOL_SIZE
+import pdf_generator
+import tts_generator
+
+
+async def main(pool_size=DEFAULT_POOL_SIZE, force=False, composite=False, renderer='browser', workers=None):
+    """Render PDFs and TTS sprite sheets with a single browser launch"""
+    async with BrowserPool(pool_size) as pool:
+        await pdf_generator.main(pool, jobs=pool_size, force=force)
+        print()
+        # The Pillow renderer brings its own worker processes instead
+        tts_pool = pool if renderer == 'browser' else None
+        await tts_generator.main(tts_pool, force=force, composite=composite, renderer=renderer,
+                                 workers=workers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render PDFs and TTS sprites with one browser')
+    parser.add_argument('--contexts', type=int, default=DEFAULT_POOL_SIZE,
+                        help=f'browser contexts open at once (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render everything even if inputs are unchanged')
+    parser.add_argument('--composite', action='store_true',
+                        help='composite TTS sheets from per-card tiles (needs Pillow)')
+    parser.add_argument('--renderer', choices=tts_generator.RENDERERS, default='browser',
+                        help='draw TTS sprites in Chromium (default) or with Pillow')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes for --renderer pillow (default: one per CPU)')
+    args = parser.parse_args()
+    asyncio.run(main(args.contexts, args.force, args.composite, args.renderer, args.workers))
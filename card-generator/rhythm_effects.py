@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Rhythm Effects for Beat by Beat
+Compiles rhythm card effect and condition text into a table of integer
+opcodes and predicates, and evaluates execution costs and bonuses for many
+moves, beats and rhythm cards at once with NumPy
+
+The same compiled effects drive generate_rhythm_card(), the game engine and
+the batched evaluator, so the printed card, the simulated rules and the
+analytics never disagree. A row whose text can't be compiled fails the
+build instead of silently doing nothing.
+"""
+
+import argparse
+import re
+import sys
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+from card_model import MOVE_TYPES, STYLES, load_card_set
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batched evaluation (the "stats" extra)
+    np = None
+
+
+TYPE_BITS = {move_type: 1 << i for i, move_type in enumerate(MOVE_TYPES)}
+STYLE_BITS = {style: 1 << i for i, style in enumerate(STYLES)}
+ALL_TYPES = (1 << len(MOVE_TYPES)) - 1
+
+# Recovery actions, in resolution order (Stamina -> Refinement -> Inspiration);
+# DRAW_ONE is the Stumble card's recovery
+DRAW_ONE, STAMINA, REFINEMENT, INSPIRATION = range(4)
+ACTIONS = {'Stamina': STAMINA, 'Refinement': REFINEMENT, 'Inspiration': INSPIRATION}
+
+# Effect opcodes
+(R_NONE, R_COST, R_BONUS, R_BONUS_NEW_STYLE, R_EXTRA_ACTION, R_DUAL_ACTION, R_STAMINA_DRAW,
+ R_CROWD_MIN_COST, R_CROWD_TIES, R_CROWD_UNDERDOG, R_CHAIN_BONUS, R_CHAIN_ALWAYS) = range(12)
+
+
+class RhythmEffect(NamedTuple):
+    """A rhythm card's effect as integers
+
+    Cost and bonus effects (R_COST, R_BONUS, R_BONUS_NEW_STYLE) apply
+    `amount` to moves whose type bit is in `type_mask` and whose Technique
+    is at least `min_cost`. For the other opcodes `amount` is the action,
+    card count or Technique the effect names.
+    """
+
+    op: int
+    amount: int = 0
+    type_mask: int = 0
+    min_cost: int = 0
+
+
+NO_EFFECT = RhythmEffect(R_NONE)
+
+
+def style_mask(styles):
+    """Bitmask of a move's styles"""
+    mask = 0
+    for style in styles:
+        mask |= STYLE_BITS[style]
+    return mask
+
+
+def type_mask(text):
+    """Bitmask of every move type named in `text`, or 0"""
+    mask = 0
+    for move_type, bit in TYPE_BITS.items():
+        if re.search(rf'\b{move_type}\b', text):
+            mask |= bit
+    return mask
+
+
+def _parse_condition(name, condition):
+    """(type mask, minimum Technique, new style only) of a rhythm card's condition text
+
+    Only the condition forms the card data uses are accepted, so a typo or a
+    new kind of condition fails the build instead of applying to every move.
+    """
+    if condition in ('', 'All moves', 'Unconditional'):
+        return ALL_TYPES, 0, False
+    # "Step moves (33% of pool)"
+    match = re.fullmatch(r'(\w+) moves(?: \([^)]*\))?', condition)
+    if match and match.group(1) in TYPE_BITS:
+        return TYPE_BITS[match.group(1)], 0, False
+    # "Cost 4+ moves only"; Technique tops out at 5, so "Cost 5 moves only" is the same as 5+
+    match = re.fullmatch(r'Cost (\d+)\+? moves only', condition)
+    if match:
+        return ALL_TYPES, int(match.group(1)), False
+    if condition == "Moves with a style you haven't played this round":
+        return ALL_TYPES, 0, True
+    raise ValueError(f'Unrecognized rhythm condition on "{name}": {condition!r}')
+
+
+@lru_cache(maxsize=None)
+def parse_rhythm_effect(rhythm):
+    """Parse a rhythm card's effect and condition text into a RhythmEffect
+
+    Cached per record. Raises ValueError naming the card if the effect or
+    condition text is not recognized.
+    """
+    effect, condition = rhythm.effect.strip(), rhythm.condition.strip()
+    types, min_cost, new_style = _parse_condition(rhythm.name, condition)
+    if not effect:
+        return NO_EFFECT
+
+    match = re.fullmatch(r'-(\d+) cost', effect)
+    if match and not new_style:
+        return RhythmEffect(R_COST, int(match.group(1)), types, min_cost)
+    match = re.fullmatch(r'\+(\d+) bonus', effect)
+    if match:
+        op = R_BONUS_NEW_STYLE if new_style else R_BONUS
+        return RhythmEffect(op, int(match.group(1)), types, min_cost)
+    match = re.fullmatch(r'Bonus (\w+) action', effect)
+    if match and match.group(1) in ACTIONS:
+        return RhythmEffect(R_EXTRA_ACTION, ACTIONS[match.group(1)])
+    if effect.startswith('Take 2 different recovery actions'):
+        return RhythmEffect(R_DUAL_ACTION)
+    match = re.fullmatch(r'Draw (\d+) instead of 2 for Stamina', effect)
+    if match:
+        return RhythmEffect(R_STAMINA_DRAW, int(match.group(1)))
+    match = re.fullmatch(r'Crowd favor requires cost (\d+)\+ to win', effect)
+    if match:
+        return RhythmEffect(R_CROWD_MIN_COST, int(match.group(1)))
+    if effect.startswith('Ties all win crowd favor'):
+        return RhythmEffect(R_CROWD_TIES)
+    if effect.startswith('Lowest cost among successful moves wins'):
+        return RhythmEffect(R_CROWD_UNDERDOG)
+    match = re.fullmatch(r'\+(\d+) chain discount', effect)
+    if match:
+        return RhythmEffect(R_CHAIN_BONUS, int(match.group(1)))
+    if effect.startswith('Chain discount applies even if'):
+        # Under the v2.1 rules the chain always applies after a success
+        return RhythmEffect(R_CHAIN_ALWAYS)
+    raise ValueError(f'Unrecognized rhythm effect on "{rhythm.name}": {effect!r}')
+
+
+class RhythmTable:
+    """Every rhythm card compiled to parallel integer columns
+
+    Row i describes the i-th rhythm record: `op`, `amount`, `type_mask`,
+    `min_cost` and `copies` are array('i') columns, so effects apply with
+    integer comparisons and NumPy can read the columns directly.
+    """
+
+    __slots__ = ('names', 'effects', 'op', 'amount', 'type_mask', 'min_cost', 'copies')
+
+    def __init__(self, names, effects, copies):
+        self.names = tuple(names)
+        self.effects = tuple(effects)
+        columns = list(zip(*self.effects)) or [()] * 4
+        self.op, self.amount, self.type_mask, self.min_cost = (array('i', column) for column in columns)
+        self.copies = array('i', copies)
+
+    def __len__(self):
+        return len(self.effects)
+
+    def deck(self):
+        """The rhythm deck as a list of RhythmEffects, one per physical card"""
+        return [effect for effect, copies in zip(self.effects, self.copies) for _ in range(copies)]
+
+
+@lru_cache(maxsize=None)
+def compile_rhythm_table(rhythms):
+    """Compile a tuple of rhythm records (CardSet.rhythms) into a RhythmTable
+
+    Cached per card set. Raises ValueError listing every row whose effect
+    can't be compiled, by its line in rhythm-cards.csv.
+    """
+    effects, errors = [], []
+    for line, rhythm in enumerate(rhythms, start=2):
+        try:
+            effects.append(parse_rhythm_effect(rhythm))
+        except ValueError as e:
+            errors.append(f'rhythm-cards.csv:{line}: {e}')
+    if errors:
+        raise ValueError('\n'.join(errors))
+    return RhythmTable((rhythm.name for rhythm in rhythms), effects, (rhythm.copies for rhythm in rhythms))
+
+
+# --- Batched evaluation ------------------------------------------------------
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('Batched rhythm evaluation needs NumPy: uv sync --extra stats')
+
+
+class CostTable(NamedTuple):
+    """Results of evaluate(), each shaped (moves, beats, rhythms)"""
+
+    discards: 'np.ndarray'
+    bonus: 'np.ndarray'
+
+
+def evaluate(cost, types, styles, effects, chain=0, crowd=0, played_styles=0, cost_types=0):
+    """Discards required and bonus points for every move × beat × rhythm
+
+    `cost`, `types` and `styles` describe the moves (Technique, type bit,
+    style bitmask). `chain` (previous move's Technique, 0 after a failure),
+    `crowd` (1 after an outright crowd favor win) and `played_styles` (styles
+    executed so far this round) describe the beats, as scalars or arrays.
+    `effects` are the RhythmEffects to try (or a RhythmTable, whose
+    columns are used directly), and `cost_types` is a type
+    bitmask of judge cost discounts. The execution formula is
+
+        max(0, Technique - 1 - chain - crowd bonus - rhythm discount)
+
+    `bonus` holds only the rhythm's adjustment, not the printed bonus.
+    """
+    _require_numpy()
+    cost = np.asarray(cost, dtype=np.int64)[:, None, None]
+    types = np.asarray(types, dtype=np.int64)[:, None, None]
+    styles = np.asarray(styles, dtype=np.int64)[:, None, None]
+    chain = np.atleast_1d(np.asarray(chain, dtype=np.int64))[None, :, None]
+    crowd = np.atleast_1d(np.asarray(crowd, dtype=np.int64))[None, :, None]
+    played_styles = np.atleast_1d(np.asarray(played_styles, dtype=np.int64))[None, :, None]
+
+    if isinstance(effects, RhythmTable):
+        columns = (effects.op, effects.amount, effects.type_mask, effects.min_cost)
+    else:
+        columns = tuple(zip(*effects)) if effects else ((),) * 4
+    op, amount, type_masks, min_cost = (np.asarray(column, dtype=np.int64)[None, None, :] for column in columns)
+
+    applies = ((types & type_masks) != 0) & (cost >= min_cost)
+    discount = 1 + chain + crowd
+    discount = discount + np.where(applies & (op == R_COST), amount, 0)
+    discount = discount + np.where((op == R_CHAIN_BONUS) & (chain > 0), amount, 0)
+    discount = discount + ((types & cost_types) != 0)
+    discards = np.maximum(cost - discount, 0)
+
+    new_style = (styles & ~played_styles) != 0
+    bonus = np.where(applies & ((op == R_BONUS) | ((op == R_BONUS_NEW_STYLE) & new_style)), amount, 0)
+    return CostTable(discards, np.broadcast_to(bonus, discards.shape))
+
+
+def main(deck='pool', chain=0, crowd=0):
+    """Print the average discards and bonus of a deck's moves under each rhythm card"""
+    card_set = load_card_set(Path(__file__).parent.parent / 'card-data')
+    moves = [move for move in card_set.moves if deck is None or move.deck_type == deck]
+    table = compile_rhythm_table(card_set.rhythms)
+    names = ['(no effect)'] + [name for name, op in zip(table.names, table.op) if op != R_NONE]
+    effects = [NO_EFFECT] + [effect for effect in table.effects if effect.op != R_NONE]
+
+    table = evaluate([move.cost for move in moves], [TYPE_BITS[move.type] for move in moves],
+                     [style_mask(move.styles) for move in moves], effects, chain, crowd)
+    discards = table.discards[:, 0, :].mean(axis=0)
+    free = (table.discards[:, 0, :] == 0).mean(axis=0)
+    bonus = table.bonus[:, 0, :].mean(axis=0)
+
+    print('🎵 Beat by Beat - Rhythm Effects')
+    print('=' * 50)
+    print()
+    print(f'{len(moves)} {deck or "all"} moves, chain {chain}, crowd bonus {crowd}')
+    print()
+    print(f'{"Rhythm":20} {"discards":>8} {"free":>6} {"bonus":>6}')
+    for name, avg, share, extra in zip(names, discards.tolist(), free.tolist(), bonus.tolist()):
+        print(f'{name:20} {avg:8.2f} {100 * share:5.0f}% {extra:6.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate execution costs under every rhythm card')
+    parser.add_argument('--deck', choices=['starter', 'pool', 'all'], default='pool',
+                        help='which moves to evaluate (default: pool)')
+    parser.add_argument('--chain', type=int, default=0, help="previous move's Technique (default: 0)")
+    parser.add_argument('--crowd', type=int, choices=[0, 1], default=0,
+                        help='crowd favor bonus from the previous beat (default: 0)')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(None if args.deck == 'all' else args.deck, args.chain, args.crowd))
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
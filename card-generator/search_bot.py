@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Search Bot for Beat by Beat
+A game_engine policy that looks ahead within the current round with
+depth-limited expectimax, choosing which card to play and which recovery
+action to take under the round's face-up rhythm cards
+
+The bot plans only its own cards: opponents appear through an estimated
+chance of winning crowd favor. Card draws are chance nodes, sampled with a
+generator seeded from the state's key, so a state's value depends only on
+the state. That makes cached values safe to reuse across beats and games,
+and keeps simulations bit-reproducible however games are sharded.
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import OrderedDict
+from game_engine import (BEATS, JUDGES_OUT, POLICIES, STUMBLE, GreedyPolicy, Tally, game_seed, load_rules,
+                         play_game, seat_policies)
+from rhythm_effects import (DRAW_ONE, INSPIRATION, REFINEMENT, STAMINA, R_BONUS, R_BONUS_NEW_STYLE,
+                            R_CHAIN_BONUS, R_COST, R_CROWD_MIN_COST, R_CROWD_UNDERDOG, R_DUAL_ACTION,
+                            R_EXTRA_ACTION, R_STAMINA_DRAW)
+
+
+DEFAULT_DEPTH = 2
+DEFAULT_SAMPLES = 3
+DEFAULT_TABLE_ENTRIES = 200_000
+
+MASK64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """Bounded map from state key to value with least-recently-used eviction"""
+
+    def __init__(self, max_entries=DEFAULT_TABLE_ENTRIES):
+        if max_entries < 1:
+            raise ValueError(f'Transposition table needs at least 1 entry, got {max_entries}')
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the value stored under `key`, or None"""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        # Mark as recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store `value` under `key`, evicting the oldest entry if full"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class Zobrist:
+    """64-bit keys for card multisets and the scalars of a search state
+
+    Each (zone, card) pair gets a random 64-bit number, and a zone's key is
+    the sum of its cards' numbers modulo 2**64. Sums, unlike XOR, keep
+    duplicate copies distinct and ignore card order, since only the
+    composition of a hand, deck or discard pile matters.
+
+    `max_chain` (the highest card cost) and `max_depth` size the chain and
+    depth tables; the other scalars are bounded by the rules.
+    """
+
+    def __init__(self, num_cards, max_chain=0, max_depth=0, seed=0x5EED):
+        rng = random.Random(seed)
+        self.cards = [[rng.getrandbits(64) for _ in range(num_cards)] for _ in range(3)]
+        # Card zones are hand, deck and discard; scalars are chain, crowd energy
+        # (0-1), beat (0-8), styles played (5 bits) and search depth. Chain and
+        # depth tables grow past 64 numbers only if the cards or search need it,
+        # so keys below 64 stay the same
+        self.scalars = [[rng.getrandbits(64) for _ in range(64)] for _ in range(5)]
+        for table, size in ((self.scalars[0], max_chain + 1), (self.scalars[4], max_depth + 1)):
+            table.extend(rng.getrandbits(64) for _ in range(size - len(table)))
+
+    def key(self, hand, deck, discard, chain, energy, beat, styles, depth, context):
+        hand_keys, deck_keys, discard_keys = self.cards
+        scalars = self.scalars
+        key = (sum(map(hand_keys.__getitem__, hand)) + sum(map(deck_keys.__getitem__, deck))
+               + sum(map(discard_keys.__getitem__, discard)))
+        key ^= scalars[0][chain] ^ scalars[1][energy] ^ scalars[2][beat] ^ scalars[3][styles] ^ scalars[4][depth]
+        return (key ^ context) & MASK64
+
+
+class SearchPolicy(GreedyPolicy):
+    """Expectimax over the rest of the round, with a transposition table
+
+    `depth` is how many beats to look ahead, `samples` how many draws to
+    sample at each chance node, and `table_entries` bounds the table.
+    Drafting uses GreedyPolicy's heuristic. Values count expected bonus
+    points, plus estimated crowd favor, successful executions, cards in
+    hand at the horizon and deck thinning.
+    """
+
+    name = 'search'
+
+    # Heuristic weights, in points
+    FAVOR_VALUE = 2.0      # Outright crowd favor win, before the win chance
+    EXECUTION_VALUE = 0.5  # Any successful execution (judges, chains)
+    HAND_VALUE = 0.6       # Each card in hand at the search horizon
+    CHAIN_VALUE = 0.15     # Each point of chain energy at the search horizon
+    TRASH_VALUE = 0.5      # Removing a Stumble or starter with Refinement
+    DRAFT_VALUE = 1.0      # Inspiration's two new pool cards
+
+    def __init__(self, depth=DEFAULT_DEPTH, samples=DEFAULT_SAMPLES, table_entries=DEFAULT_TABLE_ENTRIES):
+        if depth < 1:
+            raise ValueError(f'Search depth must be at least 1, got {depth}')
+        self.depth = depth
+        self.samples = samples
+        self.table = TranspositionTable(table_entries)
+        self._zobrist = None
+        self._zobrist_shape = None
+        self._second_action = None
+
+    # Policy decisions ----------------------------------------------------------
+
+    def choose_play(self, game, player):
+        search = _RoundSearch(self, game, player)
+        hand = player.hand
+        best, best_value = 0, None
+        for card in sorted(set(hand)):
+            value, second = search.play_value(card, player.chain, player.crowd_energy, game.beat,
+                                              player.styles_played, tuple(sorted(hand)),
+                                              search.deck, search.discard, self.depth)
+            if best_value is None or value > best_value:
+                best, best_value, self._second_action = hand.index(card), value, second
+        return best
+
+    def choose_second_action(self, game, player, first):
+        if self._second_action is not None and self._second_action != first:
+            return self._second_action
+        return super().choose_second_action(game, player, first)
+
+    def zobrist(self, cards):
+        """Zobrist keys sized for the card table `cards` and this policy's depth"""
+        shape = (len(cards), max(cards.cost))
+        if self._zobrist is None or self._zobrist_shape != shape:
+            self._zobrist = Zobrist(*shape, self.depth)
+            self._zobrist_shape = shape
+        return self._zobrist
+
+
+class _RoundSearch:
+    """One decision's view of the round: fixed rhythms, the bot's cards and effects"""
+
+    def __init__(self, policy, game, player):
+        self.policy = policy
+        self.table = policy.table
+        self.cards = game.cards
+        self.zobrist = policy.zobrist(game.cards)
+        self.rhythms = game.rhythm_rows[game.round]
+        self.starters = game.starter_set
+        self.player = player
+        self.deck = tuple(sorted(player.deck))
+        self.discard = tuple(sorted(player.discard))
+        # Everything else a value depends on: the round's rhythms and the player's judge effects
+        self.context = hash((tuple(self.rhythms), player.bonus_styles, player.bonus_types, player.cost_types,
+                             player.showstopper, policy.samples)) & MASK64
+
+    def value(self, hand, deck, discard, chain, energy, beat, styles, depth):
+        """Expected value of playing on from the start of `beat`"""
+        if depth == 0 or beat >= BEATS:
+            return self.policy.HAND_VALUE * len(hand) + self.policy.CHAIN_VALUE * chain
+        key = self.zobrist.key(hand, deck, discard, chain, energy, beat, styles, depth, self.context)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        candidates = sorted(set(hand)) if hand else [STUMBLE]
+        best = max(self.play_value(card, chain, energy, beat, styles, hand, deck, discard, depth)[0]
+                   for card in candidates)
+        self.table.put(key, best)
+        return best
+
+    def play_value(self, card, chain, energy, beat, styles, hand, deck, discard, depth):
+        """(expected value, best Dancer's Choice action) of playing `card` at `beat`"""
+        cards, policy = self.cards, self.policy
+        cost = cards.cost
+        op, amount, types, min_cost = self.rhythms[beat]
+
+        hand = list(hand)
+        if card != STUMBLE:
+            hand.remove(card)
+        discard = list(discard)
+        reward = 0.0
+        next_chain = 0
+        if card != STUMBLE:
+            energy_total = 1 + chain + energy
+            if chain and op == R_CHAIN_BONUS:
+                energy_total += amount
+            applies = cards.type_bits[card] & types and cost[card] >= min_cost
+            if op == R_COST and applies:
+                energy_total += amount
+            if self.player.cost_types & cards.type_bits[card]:
+                energy_total += 1
+            need = max(cost[card] - energy_total, 0)
+            if need <= len(hand):
+                # Pay with the cheapest cards, as Policy.choose_discards does
+                hand.sort(key=cost.__getitem__)
+                discard.extend(hand[:need])
+                del hand[:need]
+                next_chain = cost[card]
+                bonus = cards.bonus[card]
+                if applies and (op == R_BONUS or (op == R_BONUS_NEW_STYLE and cards.style_bits[card] & ~styles)):
+                    bonus += amount
+                if self.player.bonus_styles & cards.style_bits[card]:
+                    bonus += 1
+                if self.player.bonus_types & cards.type_bits[card]:
+                    bonus += 1
+                reward += bonus + policy.EXECUTION_VALUE + self.favor_value(cost[card], op, amount)
+                styles |= cards.style_bits[card]
+        discard.append(card)
+
+        action = cards.recovery[card]
+        if op == R_DUAL_ACTION and action != DRAW_ONE:
+            options = [(action, second) for second in (STAMINA, REFINEMENT, INSPIRATION) if second != action]
+        elif op == R_EXTRA_ACTION:
+            options = [(action, amount)]
+        else:
+            options = [(action,)]
+
+        best, best_second = None, None
+        for actions in options:
+            value = reward + self.recover(sorted(actions), hand, deck, discard, next_chain, beat, styles, depth,
+                                          stamina_draw=amount if op == R_STAMINA_DRAW else 2)
+            if best is None or value > best:
+                best, best_second = value, actions[1] if len(actions) > 1 else None
+        return best, best_second
+
+    def favor_value(self, technique, op, amount):
+        """Estimated crowd favor value of executing a move of `technique`"""
+        if op == R_CROWD_MIN_COST and technique < amount:
+            return 0.0
+        if op == R_CROWD_UNDERDOG:
+            technique = 6 - technique
+        # The Showstopper scores a bonus point per crowd favor win
+        win_value = self.policy.FAVOR_VALUE + (1 if self.player.showstopper else 0)
+        return win_value * (technique / 5) ** 2
+
+    def recover(self, actions, hand, deck, discard, chain, beat, styles, depth, stamina_draw):
+        """Expected value after recovery actions, averaging over sampled draws"""
+        policy = self.policy
+        reward = 0.0
+        draws = 0
+        for action in actions:
+            if action == STAMINA:
+                draws += stamina_draw
+            elif action == REFINEMENT:
+                trashed = self.trash(hand, discard)
+                reward += policy.TRASH_VALUE if trashed else 0.0
+                draws += 2
+            elif action == INSPIRATION:
+                reward += policy.DRAFT_VALUE
+            else:
+                draws += 1
+
+        deck = list(deck)
+        if not draws or not (deck or discard):
+            return reward + self.value(tuple(sorted(hand)), tuple(deck), tuple(sorted(discard)), chain, 0,
+                                       beat + 1, styles, depth - 1)
+
+        # Seeded from the state, so the same state always samples the same draws
+        seed = self.zobrist.key(tuple(hand), tuple(deck), tuple(discard), chain, 0, beat, styles, depth,
+                                self.context)
+        rng = random.Random(seed)
+        total = 0.0
+        for _ in range(policy.samples):
+            sample_hand, sample_deck, sample_discard = list(hand), list(deck), list(discard)
+            rng.shuffle(sample_deck)
+            for _ in range(draws):
+                if not sample_deck:
+                    if not sample_discard:
+                        break
+                    sample_deck, sample_discard = sample_discard, []
+                    rng.shuffle(sample_deck)
+                sample_hand.append(sample_deck.pop())
+            total += self.value(tuple(sorted(sample_hand)), tuple(sorted(sample_deck)), tuple(sorted(sample_discard)),
+                                chain, 0, beat + 1, styles, depth - 1)
+        return reward + total / policy.samples
+
+    def trash(self, hand, discard):
+        """Refinement as Policy.choose_trash does it: a Stumble, else the cheapest starter"""
+        for pile in (hand, discard):
+            if STUMBLE in pile:
+                pile.remove(STUMBLE)
+                return True
+        starters = [card for card in hand + discard if card in self.starters]
+        if not starters:
+            return False
+        card = min(starters, key=self.cards.cost.__getitem__)
+        (hand if card in hand else discard).remove(card)
+        return True
+
+
+POLICIES[SearchPolicy.name] = SearchPolicy
+
+
+def main(games=50, players=2, policy_names=('search', 'greedy'), seed=0, depth=DEFAULT_DEPTH,
+         samples=DEFAULT_SAMPLES, table_entries=DEFAULT_TABLE_ENTRIES):
+    """Play search bots against other policies and report results and table use"""
+    rules = load_rules()
+    names = seat_policies(players, policy_names)
+    policies = [SearchPolicy(depth, samples, table_entries) if name == 'search' else POLICIES[name]()
+                for name in names]
+
+    print('🤖 Beat by Beat - Search Bot')
+    print('=' * 50)
+    print()
+    print(f'{games} games, {players} players: {", ".join(names)} (depth {depth}, {samples} samples)')
+    print()
+
+    tally = Tally(players)
+    start = time.perf_counter()
+    for index in range(games):
+        tally.add(play_game(rules, policies, game_seed(seed, index)))
+    elapsed = time.perf_counter() - start
+
+    print('\n'.join(tally.report(names)))
+    print()
+    for seat, policy in enumerate(policies):
+        if isinstance(policy, SearchPolicy):
+            table = policy.table
+            lookups = (table.hits + table.misses) or 1
+            print(f'  Seat {seat + 1} table: {len(table):,} entries, {100 * table.hits / lookups:.0f}% hit rate')
+    print()
+    print(f'⏱️  {games / elapsed:,.1f} games/sec ({elapsed:.2f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play the lookahead search bot against other policies')
+    parser.add_argument('--games', '-n', type=int, default=50, help='games to play (default: 50)')
+    parser.add_argument('--players', '-p', type=int, choices=sorted(JUDGES_OUT), default=2,
+                        help='players per game (default: 2)')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES),
+                        help='policy per seat, repeated to fill the table (default: search, greedy)')
+    parser.add_argument('--seed', type=int, default=0, help='run seed (default: 0)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'beats to look ahead (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                        help=f'draws sampled per chance node (default: {DEFAULT_SAMPLES})')
+    parser.add_argument('--table-entries', type=int, default=DEFAULT_TABLE_ENTRIES,
+                        help=f'transposition table size cap (default: {DEFAULT_TABLE_ENTRIES})')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(args.games, args.players, tuple(args.policy or ['search', 'greedy']), args.seed,
+                      args.depth, args.samples, args.table_entries))
+    except ValueError as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Batch Simulation Runner for Beat by Beat
+Spreads many game_engine games across worker processes in fixed seed shards
+and merges the results back in game order
+
+Game `i` of a run always uses game_seed(seed, i), whichever worker plays
+it, so a run gives identical results for any worker count or shard size,
+on any machine with the same card data.
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from game_engine import JUDGES_OUT, POLICIES, Tally, game_seed, load_rules, play_game, seat_policies
+from search_bot import SearchPolicy  # noqa: F401 (registers the 'search' policy)
+from sim_store import DEFAULT_CHUNK_GAMES, ResultStore, check_chunk_games, check_seed
+import strategies  # noqa: F401 (registers the strategy policies)
+
+
+DEFAULT_SHARD_SIZE = 250
+# Shards queued per worker, so workers never idle while the merge catches up
+SHARDS_IN_FLIGHT = 4
+
+# Rules and policy instances of a worker process, set by _init_worker()
+_worker = None
+
+
+def _init_worker(policy_names):
+    global _worker
+    _worker = (load_rules(), [POLICIES[name]() for name in policy_names])
+
+
+def run_shard(seed, start, stop):
+    """Play games start..stop-1 of a run in this worker and return their results"""
+    rules, policies = _worker
+    return [play_game(rules, policies, game_seed(seed, index)) for index in range(start, stop)]
+
+
+def shards(games, shard_size):
+    """(start, stop) game ranges covering range(games)"""
+    for start in range(0, games, shard_size):
+        yield start, min(start + shard_size, games)
+
+
+def imap_ordered(fn, tasks, workers=None, initializer=None, initargs=()):
+    """Yield fn(*task) for every task, in task order, computed on a process pool
+
+    Tasks are handed to `workers` processes (default: one per CPU) as
+    workers free up, with a bounded number queued, and each result is
+    yielded as soon as every earlier one has been. With one worker the
+    tasks run in this process. `initializer(*initargs)` sets up each worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f'Batch runner needs at least 1 worker, got {workers}')
+    tasks = iter(tasks)
+
+    if workers == 1:
+        if initializer:
+            initializer(*initargs)
+        for task in tasks:
+            yield fn(*task)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+
+        def submit_next():
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(executor.submit(fn, *task))
+
+        try:
+            for _ in range(workers * SHARDS_IN_FLIGHT):
+                submit_next()
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def iter_results(games, policy_names, seed=0, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Play `games` games and yield every GameResult in game order
+
+    `policy_names` gives one policy per seat. Games are played in shards
+    of `shard_size` by imap_ordered().
+    """
+    if shard_size < 1:
+        raise ValueError(f'Shard size must be at least 1, got {shard_size}')
+    tasks = ((seed, start, stop) for start, stop in shards(games, shard_size))
+    for results in imap_ordered(run_shard, tasks, workers, _init_worker, (tuple(policy_names),)):
+        yield from results
+
+
+def update_digest(digest, result):
+    """Fold a result's seed, scores and winners into a running hash
+
+    Two runs reproduce each other exactly when their final digests match.
+    """
+    digest.update(repr((result.seed, result.scores, result.winners)).encode())
+
+
+def main(games=10000, players=4, policy_names=('greedy',), seed=0, workers=None, shard_size=DEFAULT_SHARD_SIZE,
+         store_path=None, chunk_games=DEFAULT_CHUNK_GAMES):
+    """Simulate `games` games across worker processes and report the results
+
+    With `store_path`, every game is also appended to that result store.
+    """
+    names = seat_policies(players, policy_names)
+    workers = workers or os.cpu_count() or 1
+    store = None
+    if store_path:
+        check_chunk_games(players, chunk_games)
+        check_seed(seed)
+        store = ResultStore.create(store_path, load_rules(), players, names, seed)
+
+    print('🎲 Beat by Beat - Batch Simulation')
+    print('=' * 50)
+    print()
+    print(f'{games} games, {players} players: {", ".join(names)}')
+    print(f'Seed {seed}, {workers} worker(s), {shard_size} games per shard')
+    print()
+
+    tally = Tally(players)
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    with store.writer(chunk_games) if store else nullcontext() as writer:
+        for result in iter_results(games, names, seed, workers, shard_size):
+            tally.add(result)
+            update_digest(digest, result)
+            if writer:
+                writer.add(result)
+    if store:
+        store.finish(seed)
+    elapsed = time.perf_counter() - start
+
+    print('\n'.join(tally.report(names)))
+    print()
+    print(f'🔑 Result digest: {digest.hexdigest()}')
+    if store:
+        print(f'💾 Stored in {store.path} ({len(store.chunk_dirs())} chunks)')
+    print(f'⏱️  {games / elapsed:,.0f} games/sec ({elapsed:.2f}s, {3600 * games / elapsed:,.0f} games/hour)')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate many Beat by Beat games across all cores')
+    parser.add_argument('--games', '-n', type=int, default=10000, help='games to play (default: 10000)')
+    parser.add_argument('--players', '-p', type=int, choices=sorted(JUDGES_OUT), default=4,
+                        help='players per game (default: 4)')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES),
+                        help='policy per seat, repeated to fill the table (default: greedy)')
+    parser.add_argument('--seed', type=int, default=0, help='run seed (default: 0)')
+    parser.add_argument('--workers', '-j', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'games per worker task (default: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--store', help='append every game to this result store directory (needs NumPy)')
+    parser.add_argument('--chunk-games', type=int, default=DEFAULT_CHUNK_GAMES,
+                        help=f'games per result store chunk (default: {DEFAULT_CHUNK_GAMES})')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(args.games, args.players, tuple(args.policy or ['greedy']), args.seed,
+                      args.workers, args.shard_size, args.store, args.chunk_games))
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Simulation Result Store for Beat by Beat
+Append-only columnar storage of simulated games, with streaming win-rate
+aggregation by card, style and judge
+
+A store is a directory holding meta.json and numbered chunk directories.
+Each chunk holds one .npy file per column of two tables:
+
+  players  one row per seat per game: game (its seed), seat, score, won (win share,
+           split between tied winners), styles (bitmask of styles executed),
+           judges (bitmask of judge indices claimed)
+  cards    one row per card a seat played in a game: player (row index in
+           the chunk's players table), card (game_engine card ID), plays,
+           successes, favor (crowd favor wins), points (bonus points scored)
+
+Chunks are written to a temporary directory and renamed into place, so a
+reader never sees a partial chunk. They are read memory-mapped one at a
+time, so aggregating a store needs memory for one chunk, not the whole run.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from card_model import STYLES
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for result stores (the "stats" extra)
+    np = None
+
+
+STORE_FORMAT = 1
+META_NAME = 'meta.json'
+CHUNK_PREFIX = 'chunk-'
+
+# Column dtypes per table; player row indices are 16-bit within a chunk
+PLAYER_COLUMNS = {
+    'game': 'int64',
+    'seat': 'uint8',
+    'score': 'float32',
+    'won': 'float32',
+    'styles': 'uint8',
+    'judges': 'uint32',
+}
+CARD_COLUMNS = {
+    'player': 'uint16',
+    'card': 'uint16',
+    'plays': 'uint8',
+    'successes': 'uint8',
+    'favor': 'uint8',
+    'points': 'int16',
+}
+MAX_CHUNK_ROWS = 1 << 16
+
+# Game seeds are game_seed(seed, index) = (seed << 32) | index in the int64
+# game column, so run seeds must fit in 32 signed bits
+MIN_SEED = -(1 << 31)
+MAX_SEED = (1 << 31) - 1
+
+DEFAULT_CHUNK_GAMES = 10000
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('Simulation result stores need NumPy: uv sync --extra stats')
+
+
+def check_chunk_games(players, chunk_games):
+    """Raise ValueError unless chunks of `chunk_games` games fit the 16-bit player row index"""
+    limit = MAX_CHUNK_ROWS // players
+    if not 1 <= chunk_games <= limit:
+        raise ValueError(f'Games per chunk must be 1-{limit} for {players} players, got {chunk_games}')
+
+
+def check_seed(seed):
+    """Raise ValueError unless a run's game seeds fit the store's int64 game column"""
+    if not MIN_SEED <= seed <= MAX_SEED:
+        raise ValueError(f'Seeds of stored runs must be {MIN_SEED} to {MAX_SEED}, got {seed}')
+
+
+def run_seed(game):
+    """Seed of the run that played a stored game (inverse of game_engine.game_seed)"""
+    return int(game) >> 32
+
+
+class ResultStore:
+    """A directory of simulated games, appended to one chunk at a time
+
+    `meta` records the card, judge and style names that IDs and bitmask
+    bits refer to, plus the players and policies per game, so a store only
+    ever holds games of one setup. It also lists the seed of every run
+    appended, since a run's games are fixed by its seed alone: `seeds` for
+    finished runs and `incomplete` for runs started but not finished.
+    """
+
+    def __init__(self, path):
+        _require_numpy()
+        self.path = Path(path)
+        meta_path = self.path / META_NAME
+        self.meta = json.loads(meta_path.read_text()) if meta_path.exists() else None
+
+    @classmethod
+    def create(cls, path, rules, players, policy_names, seed):
+        """Open the store at `path`, starting it if it doesn't exist yet
+
+        Raises ValueError if an existing store was written for different
+        cards or a different table, or already holds the finished run of
+        `seed` (its games would be stored twice). The run is recorded as
+        incomplete until finish(seed); if an earlier run of `seed` never
+        finished, its chunks are dropped so the run starts over.
+        """
+        check_seed(seed)
+        store = cls(path)
+        meta = {
+            'format': STORE_FORMAT,
+            'players': players,
+            'policies': list(policy_names),
+            'seeds': [],
+            'incomplete': [seed],
+            'cards': rules.cards.names,
+            'judges': [judge.name for judge in rules.judges],
+            'styles': list(STYLES),
+        }
+        if len(meta['judges']) > 32:
+            raise ValueError(f'Result stores track at most 32 judges, got {len(meta["judges"])}')
+        if store.meta is None:
+            store.path.mkdir(parents=True, exist_ok=True)
+        else:
+            for key in ('format', 'players', 'policies', 'cards', 'judges', 'styles'):
+                if store.meta.get(key) != meta[key]:
+                    raise ValueError(f'{store.path}: existing store has different {key}, use a new directory')
+            if seed in store.meta['seeds']:
+                raise ValueError(f'{store.path}: already holds the games of seed {seed}, use another --seed')
+            meta['seeds'] = store.meta['seeds']
+            incomplete = store.meta.get('incomplete', [])
+            if seed in incomplete:
+                store._drop_run(seed)
+            meta['incomplete'] = incomplete if seed in incomplete else incomplete + [seed]
+        store._write_meta(meta)
+        return store
+
+    def finish(self, seed):
+        """Record that every game of the run of `seed` has been appended"""
+        meta = dict(self.meta)
+        meta['incomplete'] = [s for s in meta['incomplete'] if s != seed]
+        meta['seeds'] = meta['seeds'] + [seed]
+        self._write_meta(meta)
+
+    def _drop_run(self, seed):
+        # Each chunk holds games of one run, so dropping its first game's run is exact
+        for chunk_dir in self.chunk_dirs():
+            if run_seed(np.load(chunk_dir / 'players.game.npy', mmap_mode='r')[0]) == seed:
+                shutil.rmtree(chunk_dir)
+
+    def _write_meta(self, meta):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp_path, self.path / META_NAME)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.meta = meta
+
+    def chunk_dirs(self):
+        return sorted(self.path.glob(f'{CHUNK_PREFIX}*[0-9]'))
+
+    def append(self, results):
+        """Write a list of GameResults as the next chunk"""
+        players = self.meta['players']
+        check_chunk_games(players, len(results))
+
+        player_rows = {name: [] for name in PLAYER_COLUMNS}
+        card_rows = {name: [] for name in CARD_COLUMNS}
+        for result in results:
+            shares = {seat: 1 / len(result.winners) for seat in result.winners}
+            for seat in range(players):
+                row = len(player_rows['game'])
+                player_rows['game'].append(result.seed)
+                player_rows['seat'].append(seat)
+                player_rows['score'].append(result.scores[seat])
+                player_rows['won'].append(shares.get(seat, 0.0))
+                player_rows['styles'].append(result.styles[seat])
+                player_rows['judges'].append(result.judges[seat])
+                for stats in result.card_stats[seat]:
+                    card_rows['player'].append(row)
+                    for name, value in zip(('card', 'plays', 'successes', 'favor', 'points'), stats):
+                        card_rows[name].append(value)
+
+        chunk_dirs = self.chunk_dirs()
+        index = int(chunk_dirs[-1].name[len(CHUNK_PREFIX):]) + 1 if chunk_dirs else 0
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.path, prefix='.tmp-'))
+        try:
+            for table, columns, rows in (('players', PLAYER_COLUMNS, player_rows),
+                                         ('cards', CARD_COLUMNS, card_rows)):
+                for name, dtype in columns.items():
+                    np.save(tmp_dir / f'{table}.{name}.npy', np.array(rows[name], dtype=dtype))
+            os.replace(tmp_dir, self.path / f'{CHUNK_PREFIX}{index:06d}')
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def writer(self, chunk_games=DEFAULT_CHUNK_GAMES):
+        return ChunkWriter(self, chunk_games)
+
+    def chunks(self):
+        """Yield (players, cards) per chunk, each a dict of memory-mapped columns"""
+        for chunk_dir in self.chunk_dirs():
+            yield tuple({name: np.load(chunk_dir / f'{table}.{name}.npy', mmap_mode='r') for name in columns}
+                        for table, columns in (('players', PLAYER_COLUMNS), ('cards', CARD_COLUMNS)))
+
+
+class ChunkWriter:
+    """Buffers GameResults and appends them to a store a chunk at a time"""
+
+    def __init__(self, store, chunk_games):
+        check_chunk_games(store.meta['players'], chunk_games)
+        self.store = store
+        self.chunk_games = chunk_games
+        self.games = 0
+        self._buffer = []
+
+    def add(self, result):
+        self._buffer.append(result)
+        if len(self._buffer) >= self.chunk_games:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            # Taken off the buffer first, so a chunk that fails to write
+            # isn't tried again when the writer closes
+            buffer, self._buffer = self._buffer, []
+            self.store.append(buffer)
+            self.games += len(buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Games buffered when a run fails are still worth keeping; the run
+        # stays incomplete until the caller finishes it
+        self.flush()
+
+
+class Aggregate:
+    """Running totals over a store, per card ID, style and judge index
+
+    Card totals count each seat-game that played the card once
+    (`appearances`) and sum that seat's win share (`wins`), alongside the
+    plays, successes, crowd favor wins and points of the card itself.
+    Style and judge totals count seat-games that executed the style or
+    claimed the judge.
+    """
+
+    def __init__(self, meta):
+        num_cards, num_judges = len(meta['cards']), len(meta['judges'])
+        self.meta = meta
+        self.games = 0
+        self.seat_wins = np.zeros(meta['players'])
+        self.card_totals = {name: np.zeros(num_cards) for name in
+                            ('appearances', 'wins', 'plays', 'successes', 'favor', 'points')}
+        self.style_games = np.zeros(len(meta['styles']))
+        self.style_wins = np.zeros(len(meta['styles']))
+        self.judge_games = np.zeros(num_judges)
+        self.judge_wins = np.zeros(num_judges)
+
+    def add_chunk(self, players, cards):
+        won = np.asarray(players['won'], dtype=np.float64)
+        self.games += len(won) // self.meta['players']
+        self.seat_wins += np.bincount(players['seat'], weights=won, minlength=len(self.seat_wins))
+
+        num_cards = len(self.card_totals['plays'])
+        card_ids = np.asarray(cards['card'], dtype=np.intp)
+        totals = self.card_totals
+        totals['appearances'] += np.bincount(card_ids, minlength=num_cards)
+        totals['wins'] += np.bincount(card_ids, weights=won[cards['player']], minlength=num_cards)
+        for name in ('plays', 'successes', 'favor', 'points'):
+            totals[name] += np.bincount(card_ids, weights=cards[name], minlength=num_cards)
+
+        styles = np.asarray(players['styles'])
+        for bit in range(len(self.style_games)):
+            mask = (styles >> bit) & 1 == 1
+            self.style_games[bit] += mask.sum()
+            self.style_wins[bit] += won[mask].sum()
+        judges = np.asarray(players['judges'])
+        for bit in range(len(self.judge_games)):
+            mask = (judges >> bit) & 1 == 1
+            self.judge_games[bit] += mask.sum()
+            self.judge_wins[bit] += won[mask].sum()
+
+    @staticmethod
+    def _rates(wins, games):
+        return np.divide(wins, games, out=np.full(len(wins), np.nan), where=games > 0)
+
+    @property
+    def card_win_rates(self):
+        return self._rates(self.card_totals['wins'], self.card_totals['appearances'])
+
+    @property
+    def style_win_rates(self):
+        return self._rates(self.style_wins, self.style_games)
+
+    @property
+    def judge_win_rates(self):
+        return self._rates(self.judge_wins, self.judge_games)
+
+
+def aggregate(store):
+    """Stream every chunk of `store` into an Aggregate"""
+    if store.meta is None:
+        raise ValueError(f'{store.path}: not a result store')
+    totals = Aggregate(store.meta)
+    for players, cards in store.chunks():
+        totals.add_chunk(players, cards)
+    return totals
+
+
+def main(path, top=10):
+    """Print win rates by card, style and judge for the store at `path`"""
+    totals = aggregate(ResultStore(path))
+    meta = totals.meta
+    baseline = 1 / meta['players']
+
+    print('📈 Beat by Beat - Simulation Results')
+    print('=' * 50)
+    print()
+    print(f'{totals.games:,} games of {meta["players"]} players ({", ".join(meta["policies"])}), '
+          f'baseline win rate {100 * baseline:.1f}%')
+    if meta.get('incomplete'):
+        print(f'⚠️  Includes unfinished runs of seed {", ".join(map(str, meta["incomplete"]))}: '
+              f'rerun them with sim_batch.py to complete them')
+    print()
+
+    print('Win rate by style:')
+    for name, rate, games in zip(meta['styles'], totals.style_win_rates, totals.style_games):
+        print(f'  {name:10} {100 * rate:5.1f}%  ({int(games):,} seat-games)')
+    print()
+
+    print('Win rate by judge claimed:')
+    for name, rate, games in zip(meta['judges'], totals.judge_win_rates, totals.judge_games):
+        print(f'  {name:26} {100 * rate:5.1f}%  ({int(games):,} claims)')
+    print()
+
+    rates = totals.card_win_rates
+    appearances = totals.card_totals['appearances']
+    played = [card for card in np.argsort(-np.nan_to_num(rates, nan=-1.0)).tolist() if appearances[card]]
+    for title, selection in ((f'Top {top} cards by win rate:', played[:top]),
+                             (f'Bottom {top} cards by win rate:', played[-top:][::-1])):
+        print(title)
+        for card in selection:
+            plays = totals.card_totals['plays'][card]
+            success = totals.card_totals['successes'][card] / plays
+            print(f'  {meta["cards"][card]:24} {100 * rates[card]:5.1f}%  '
+                  f'({int(appearances[card]):,} seat-games, {100 * success:.0f}% executed)')
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report win rates from a simulation result store')
+    parser.add_argument('store', help='result store directory (sim_batch.py --store)')
+    parser.add_argument('--top', type=int, default=10, help='cards listed at each end (default: 10)')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(args.store, args.top))
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Deck-Building Strategies for Beat by Beat
+game_engine policies that each commit to one plan, for pitting plans
+against each other in tournament.py
+
+  stamina, refinement, inspiration  play and draft for one recovery action
+  chain                             climb Technique, paying a discard to keep rising
+  judge                             chase the styles or types an open judge asks for
+
+Importing this module registers every strategy in game_engine.POLICIES.
+"""
+
+from game_engine import POLICIES, STUMBLE, GreedyPolicy, Policy
+from rhythm_effects import INSPIRATION, REFINEMENT, STAMINA
+
+
+class RecoveryPolicy(GreedyPolicy):
+    """Greedy play that favors one recovery action
+
+    Among affordable moves, plays one whose recovery is `action` when it
+    can, drafts those moves first and picks `action` for Dancer's Choice.
+    """
+
+    action = None
+
+    def play_key(self, game, player, card):
+        need = game.discards_needed(player, card)
+        cost = game.cards.cost[card]
+        affordable = need <= len(player.hand) - 1
+        return (affordable, game.cards.recovery[card] == self.action, need == 0, cost if affordable else -cost)
+
+    def draft_key(self, game, player, card):
+        return (game.cards.recovery[card] == self.action, super().draft_key(game, player, card))
+
+    def choose_second_action(self, game, player, first):
+        if first != self.action:
+            return self.action
+        return super().choose_second_action(game, player, first)
+
+
+class StaminaPolicy(RecoveryPolicy):
+    name = 'stamina'
+    action = STAMINA
+
+
+class RefinementPolicy(RecoveryPolicy):
+    name = 'refinement'
+    action = REFINEMENT
+
+
+class InspirationPolicy(RecoveryPolicy):
+    name = 'inspiration'
+    action = INSPIRATION
+
+
+class ChainPolicy(GreedyPolicy):
+    """Climb Technique every beat to keep the chain discount as high as possible
+
+    Pays up to one discard for a bigger move, drafts on Technique alone and
+    takes Stamina for Dancer's Choice to keep the hand fed.
+    """
+
+    name = 'chain'
+
+    def play_key(self, game, player, card):
+        need = game.discards_needed(player, card)
+        cost = game.cards.cost[card]
+        affordable = need <= len(player.hand) - 1
+        return (affordable, need <= 1, cost if affordable else -cost, need == 0)
+
+    def draft_key(self, game, player, card):
+        return (game.cards.cost[card], game.cards.bonus[card])
+
+    def choose_second_action(self, game, player, first):
+        return STAMINA if first != STAMINA else Policy.choose_second_action(self, game, player, first)
+
+
+class JudgeFocusPolicy(GreedyPolicy):
+    """Build toward one open judge's style or type requirement
+
+    Targets the open judge with style or type checks that the player's
+    cards already match best, retargeting once it's claimed. Plays and
+    drafts matching moves first and trashes non-matching starters.
+    """
+
+    name = 'judge'
+
+    def __init__(self):
+        self._game = None
+        # Seat -> (judge, style bitmask, type bitmask) for the current game
+        self._targets = {}
+
+    def _target(self, game, player):
+        if self._game is not game:
+            self._game = game
+            self._targets = {}
+        target = self._targets.get(player.seat)
+        if target is None or target[0] not in game.judges:
+            target = self._pick_target(game, player)
+            self._targets[player.seat] = target
+        return target
+
+    def _pick_target(self, game, player):
+        cards = game.cards
+        owned = player.deck + player.hand + player.discard
+        best, best_key = (None, 0, 0), None
+        for judge in game.judges:
+            styles = sum(1 << index for index, _ in judge.style_checks)
+            types = sum(1 << index for index, _ in judge.type_checks)
+            if not (styles or types):
+                continue
+            matched = sum(1 for card in owned if cards.style_bits[card] & styles or cards.type_bits[card] & types)
+            key = (matched, judge.reward, -judge.index)
+            if best_key is None or key > best_key:
+                best, best_key = (judge, styles, types), key
+        return best
+
+    def matches(self, game, player, card):
+        """True if `card` counts toward the player's target judge"""
+        _, styles, types = self._target(game, player)
+        return bool(game.cards.style_bits[card] & styles or game.cards.type_bits[card] & types)
+
+    def play_key(self, game, player, card):
+        need = game.discards_needed(player, card)
+        cost = game.cards.cost[card]
+        affordable = need <= len(player.hand) - 1
+        return (affordable, self.matches(game, player, card), need == 0, cost if affordable else -cost)
+
+    def draft_key(self, game, player, card):
+        return (self.matches(game, player, card), super().draft_key(game, player, card))
+
+    def choose_trash(self, game, player):
+        for pile in (player.hand, player.discard):
+            if STUMBLE in pile:
+                return STUMBLE
+        starters = [card for card in player.hand + player.discard
+                    if card in game.starter_set and not self.matches(game, player, card)]
+        if starters:
+            return min(starters, key=game.cards.cost.__getitem__)
+        return super().choose_trash(game, player)
+
+
+STRATEGIES = (StaminaPolicy, RefinementPolicy, InspirationPolicy, ChainPolicy, JudgeFocusPolicy)
+
+POLICIES.update((policy.name, policy) for policy in STRATEGIES)
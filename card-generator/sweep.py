@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Card Sweep for Beat by Beat
+Measures how changing one move's cost, bonus or recovery action shifts its
+win rate, re-simulating only the games that drew the card
+
+Every game records which pool cards it drew (GameResult.seen). A pool card
+that was never drawn can't have changed any decision, so under an edit to
+it that game plays out exactly as before and its baseline result is reused.
+Re-simulated games keep their baseline seeds, so baseline and edited runs
+share every deal (common random numbers) and the change in win rate is
+measured game by game, with far less noise than two independent runs.
+
+Baselines are cached per card data, engine source, table and seed in
+runs/sweep-cache/, so sweeping a card through several values simulates the full run once.
+Starter moves are in every deck, so editing one re-simulates every game.
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+from pathlib import Path
+from build_cache import hash_inputs
+from card_model import CardSet, load_card_set
+from game_engine import JUDGES_OUT, POLICIES, Rules, game_seed, play_game, seat_policies
+from rhythm_effects import ACTIONS
+from sim_batch import DEFAULT_SHARD_SIZE, imap_ordered, iter_results
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for sweeps (the "stats" extra)
+    np = None
+
+
+DATA_DIR = Path(__file__).parent.parent / 'card-data'
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / 'runs' / 'sweep-cache'
+CACHE_FORMAT = 1
+
+# Modules whose changes can change the games a baseline was simulated from
+ENGINE_MODULES = ('game_engine', 'strategies', 'search_bot', 'rhythm_effects', 'judge_rules')
+
+# Editable moves.csv columns, by the name used on the command line
+EDIT_FIELDS = {'cost': 'cost', 'bonus': 'bonus', 'recovery': 'recovery_action'}
+
+# Base card set and per-edit (rules, policies) of a worker process, set by _init_worker()
+_worker = None
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError('Card sweeps need NumPy: uv sync --extra stats')
+
+
+def parse_edits(text):
+    """Parse "cost=3" or "cost=3,recovery=Inspiration" into a tuple of (field, value)"""
+    edits = []
+    for term in text.split(','):
+        field, _, value = term.partition('=')
+        field, value = field.strip(), value.strip()
+        if field not in EDIT_FIELDS or not value:
+            raise ValueError(f'Edits look like cost=3, bonus=1 or recovery=Inspiration, got {term!r}')
+        if field == 'recovery':
+            if value not in ACTIONS:
+                raise ValueError(f'Recovery action must be one of {", ".join(ACTIONS)}, got {value!r}')
+        else:
+            try:
+                value = int(value)
+            except ValueError:
+                raise ValueError(f'{field} must be a whole number, got {value!r}') from None
+        edits.append((EDIT_FIELDS[field], value))
+    return tuple(edits)
+
+
+def find_move(card_set, card):
+    """Index in card_set.moves of `card`, a move name or a moves.csv line number
+
+    Raises ValueError if no move matches, or if the name belongs to more
+    than one move (e.g. a starter and a pool card share it).
+    """
+    if card.isdigit():
+        index = int(card) - 2
+        if not 0 <= index < len(card_set.moves):
+            raise ValueError(f'moves.csv has no move on line {card}')
+        return index
+    lines = [line for line, move in enumerate(card_set.moves, start=2) if move.name == card]
+    if not lines:
+        raise ValueError(f'No move named {card!r} in moves.csv')
+    if len(lines) > 1:
+        raise ValueError(f'{card!r} names {len(lines)} moves (moves.csv lines {", ".join(map(str, lines))}), '
+                         f'pass the line number of the one to sweep')
+    return lines[0] - 2
+
+
+def edit_card_set(card_set, index, edits):
+    """A copy of `card_set` with card_set.moves[index] changed by `edits`"""
+    moves = list(card_set.moves)
+    moves[index] = dataclasses.replace(moves[index], **dict(edits))
+    return CardSet(moves, card_set.rhythms, card_set.judges, card_set.stumbles)
+
+
+def _init_worker(policy_names):
+    global _worker
+    _worker = (load_card_set(DATA_DIR), tuple(policy_names), {})
+
+
+def run_games(move_index, edits, seed, indices):
+    """Play the games at `indices` of a run with card_set.moves[move_index] edited, and return their results"""
+    card_set, policy_names, variants = _worker
+    if edits not in variants:
+        # Fresh policies per variant: search bots cache values computed under the old numbers
+        variants[edits] = (Rules(edit_card_set(card_set, move_index, edits)),
+                           [POLICIES[p]() for p in policy_names])
+    rules, policies = variants[edits]
+    return [play_game(rules, policies, game_seed(seed, index)) for index in indices]
+
+
+class Baseline:
+    """Per-game win shares, cards played and pool cards drawn for one run
+
+    `won` is (games, players) win shares; `played` and `seen` are bit
+    arrays over card IDs, packed with np.packbits along the last axis:
+    (games, players, bytes) for cards each seat played, (games, bytes)
+    for pool cards drawn.
+    """
+
+    def __init__(self, won, played, seen):
+        self.won = won
+        self.played = played
+        self.seen = seen
+
+    @classmethod
+    def from_results(cls, results, players, num_cards):
+        won, played, seen = [], [], []
+        for result in results:
+            shares = [0.0] * players
+            for seat in result.winners:
+                shares[seat] = 1 / len(result.winners)
+            won.append(shares)
+            seats = np.zeros((players, num_cards), dtype=bool)
+            for seat, stats in enumerate(result.card_stats):
+                seats[seat, [card for card, *_ in stats]] = True
+            played.append(np.packbits(seats, axis=-1, bitorder='little'))
+            seen.append(np.packbits(_bits(result.seen, num_cards), bitorder='little'))
+        return cls(np.array(won, dtype=np.float32).reshape(-1, players),
+                   np.array(played, dtype=np.uint8).reshape(len(won), players, -1),
+                   np.array(seen, dtype=np.uint8).reshape(len(won), -1))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['format']) != CACHE_FORMAT:
+                raise ValueError(f'{path}: old sweep cache format, delete it to rebuild')
+            return cls(data['won'], data['played'], data['seen'])
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.tmp-{path.name}')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, format=CACHE_FORMAT, won=self.won, played=self.played, seen=self.seen)
+        tmp_path.replace(path)
+
+    def __len__(self):
+        return len(self.won)
+
+    def drew(self, card):
+        """Boolean per game: did the game draw pool card `card`?"""
+        return (self.seen[:, card // 8] >> (card % 8)) & 1 == 1
+
+    def holder_wins(self, card):
+        """Per game, the summed win shares of seats that played `card`, and how many did"""
+        holders = (self.played[:, :, card // 8] >> (card % 8)) & 1 == 1
+        return (self.won * holders).sum(axis=1), holders.sum(axis=1)
+
+
+def _bits(mask, size):
+    """A bitmask int as a bool array of `size` bits"""
+    return np.unpackbits(np.frombuffer(mask.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8),
+                         count=size, bitorder='little').astype(bool)
+
+
+def engine_sources():
+    """Source files whose changes invalidate cached baselines"""
+    return [Path(__file__).parent / f'{name}.py' for name in ENGINE_MODULES]
+
+
+def cache_path(cache_dir, card_set, players, policy_names, seed, games):
+    """Baseline cache file for a run; any change to the card data or game engine gives a new file"""
+    key = repr((CACHE_FORMAT, card_set.moves, card_set.rhythms, card_set.judges, card_set.stumbles,
+                players, tuple(policy_names), seed, games))
+    return Path(cache_dir) / f'baseline-{hash_inputs(key, engine_sources())[:16]}.npz'
+
+
+def load_baseline(card_set, players, policy_names, seed, games, workers=None, shard_size=DEFAULT_SHARD_SIZE,
+                  cache_dir=DEFAULT_CACHE_DIR):
+    """The run's Baseline from the cache, simulating and caching it if missing
+
+    Returns (baseline, cached).
+    """
+    path = cache_path(cache_dir, card_set, players, policy_names, seed, games)
+    if path.exists():
+        return Baseline.load(path), True
+    num_cards = len(Rules(card_set).cards)
+    baseline = Baseline.from_results(iter_results(games, policy_names, seed, workers, shard_size),
+                                     players, num_cards)
+    baseline.save(path)
+    return baseline, False
+
+
+def rerun(baseline, move_index, edits, indices, policy_names, seed, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """`baseline` with the games at `indices` re-simulated under `edits` to card_set.moves[move_index]"""
+    players, num_cards = baseline.won.shape[1], baseline.played.shape[2] * 8
+    won, played, seen = baseline.won.copy(), baseline.played.copy(), baseline.seen.copy()
+    tasks = ((move_index, edits, seed, indices[start:start + shard_size].tolist())
+             for start in range(0, len(indices), shard_size))
+    position = 0
+    for results in imap_ordered(run_games, tasks, workers, _init_worker, (tuple(policy_names),)):
+        chunk = Baseline.from_results(results, players, num_cards)
+        rows = indices[position:position + len(results)]
+        won[rows], played[rows], seen[rows] = chunk.won, chunk.played, chunk.seen
+        position += len(results)
+    return Baseline(won, played, seen)
+
+
+def compare(baseline, variant, card):
+    """Card win rate before and after, and the mean per-game change in its holders' wins
+
+    Returns (before, after, delta, margin): win rates over seat-games that
+    played the card, and the paired difference in holder win shares per
+    game with its 95% confidence half-width.
+    """
+    wins_before, holders_before = baseline.holder_wins(card)
+    wins_after, holders_after = variant.holder_wins(card)
+    before = wins_before.sum() / max(holders_before.sum(), 1)
+    after = wins_after.sum() / max(holders_after.sum(), 1)
+    diff = wins_after.astype(np.float64) - wins_before
+    margin = 1.96 * diff.std(ddof=1) / np.sqrt(len(diff)) if len(diff) > 1 else float('nan')
+    return float(before), float(after), float(diff.mean()), float(margin)
+
+
+def main(card, variants, games=10000, players=4, policy_names=('greedy',), seed=0, workers=None,
+         shard_size=DEFAULT_SHARD_SIZE, cache_dir=DEFAULT_CACHE_DIR):
+    """Sweep one move through each of `variants` (tuples of edits) and report win rate changes
+
+    `card` is the move's name, or its moves.csv line number when the name is shared.
+    """
+    _require_numpy()
+    if shard_size < 1:
+        raise ValueError(f'Shard size must be at least 1, got {shard_size}')
+    names = seat_policies(players, policy_names)
+    card_set = load_card_set(DATA_DIR)
+    rules = Rules(card_set)
+    move_index = find_move(card_set, card)
+    move = card_set.moves[move_index]
+    name = move.name
+    card = next(card_id for card_id, table_move in enumerate(rules.cards.moves) if table_move is move)
+
+    print('🔬 Beat by Beat - Card Sweep')
+    print('=' * 50)
+    print()
+    print(f'{name} (moves.csv line {move_index + 2}): cost {move.cost}, bonus {move.bonus}, '
+          f'{move.recovery_action} ({move.deck_type})')
+    print(f'{games} games, {players} players: {", ".join(names)}, seed {seed}')
+    print()
+
+    start = time.perf_counter()
+    baseline, cached = load_baseline(card_set, players, names, seed, games, workers, shard_size, cache_dir)
+    print(f'📦 Baseline {"loaded from cache" if cached else "simulated and cached"} '
+          f'({time.perf_counter() - start:.2f}s)')
+
+    if card in rules.cards.starter_ids:
+        indices = np.arange(len(baseline))
+    else:
+        indices = np.flatnonzero(baseline.drew(card))
+    print(f'🎯 {len(indices):,} of {len(baseline):,} games touched {name} '
+          f'({100 * len(indices) / max(len(baseline), 1):.0f}%)')
+    print()
+
+    for edits in variants:
+        label = ', '.join(f'{field.split("_")[0]}={value}' for field, value in edits)
+        start = time.perf_counter()
+        variant = rerun(baseline, move_index, edits, indices, names, seed, workers, shard_size)
+        elapsed = time.perf_counter() - start
+        before, after, delta, margin = compare(baseline, variant, card)
+        print(f'  {label:24} win rate {100 * before:5.1f}% -> {100 * after:5.1f}%  '
+              f'holder wins/game {delta:+.4f} ± {margin:.4f}  ({len(indices):,} games in {elapsed:.2f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure win rate changes from edits to one move's row")
+    parser.add_argument('card', help='move name, or its moves.csv line number if several moves share the name')
+    parser.add_argument('edits', nargs='+',
+                        help='one variant per argument, e.g. cost=3 bonus=1 recovery=Inspiration "cost=2,bonus=1"')
+    parser.add_argument('--games', '-n', type=int, default=10000, help='games per run (default: 10000)')
+    parser.add_argument('--players', '-p', type=int, choices=sorted(JUDGES_OUT), default=4,
+                        help='players per game (default: 4)')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES),
+                        help='policy per seat, repeated to fill the table (default: greedy)')
+    parser.add_argument('--seed', type=int, default=0, help='run seed (default: 0)')
+    parser.add_argument('--workers', '-j', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'games per worker task (default: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR,
+                        help='baseline cache directory (default: runs/sweep-cache)')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(args.card, [parse_edits(text) for text in args.edits], args.games, args.players, tuple(args.policy or ['greedy']),
+                      args.seed, args.workers, args.shard_size, args.cache))
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
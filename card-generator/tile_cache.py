@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+On-disk Raster Cache for Single Card Tiles
+Stores rendered card PNGs keyed by card HTML, CSS, size and scale factor,
+with a total size cap and least-recently-used eviction
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from build_cache import hash_inputs
+
+
+# Default size cap for the whole cache directory
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class TileCache:
+    """PNG tiles stored as <cache_dir>/<ab>/<key>.png
+
+    Reading a tile refreshes its mtime, and mtime order is the LRU order
+    used when the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._size = sum(path.stat().st_size for path in self.cache_dir.glob('*/*.png'))
+
+    @staticmethod
+    def key(card_html, css_content, size, scale_factor):
+        """Cache key for a card rendered at `size` CSS pixels and `scale_factor`"""
+        return hash_inputs('tile', card_html, css_content, list(size), scale_factor)
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.png'
+
+    def get(self, key):
+        """Return the cached PNG bytes for `key`, or None"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+        self.hits += 1
+        return data
+
+    def put(self, key, png):
+        """Store PNG bytes under `key`, evicting old tiles if over the size cap"""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+
+        # Write atomically so an interrupted build never leaves a torn PNG
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+
+        self._size += len(png) - previous
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used tiles until the cache fits its size cap"""
+        tiles = sorted(self.cache_dir.glob('*/*.png'), key=lambda path: path.stat().st_mtime)
+        for path in tiles:
+            if self._size <= self.max_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink()
+            self._size -= size
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Strategy Tournament for Beat by Beat
+Plays every pair of policies head to head across worker processes and
+rates them with Elo as results stream in, to check that no single
+deck-building strategy dominates
+
+Each pairing plays the same deals: game pair `i` uses game_seed(seed, i)
+for every pairing, once with each strategy in the first seat, so seat
+order and deal luck cancel out. Shards of every pairing are interleaved
+on the pool and merged in a fixed order, so ratings are identical for
+any worker count or shard size.
+"""
+
+import argparse
+import hashlib
+import math
+import sys
+import time
+from itertools import combinations
+from game_engine import POLICIES, game_seed, load_rules, play_game
+from sim_batch import DEFAULT_SHARD_SIZE, imap_ordered, shards
+import strategies  # noqa: F401 (registers the strategy policies)
+
+
+DEFAULT_STRATEGIES = ('greedy', 'chain', 'stamina', 'refinement', 'inspiration', 'judge')
+DEFAULT_GAMES_PER_PAIR = 2000
+DEFAULT_K = 16
+INITIAL_RATING = 1500
+# A strategy dominates if it wins at least this share against every other
+DEFAULT_DOMINANCE = 0.6
+
+# Rules and one policy instance per strategy name, set by _init_worker()
+_worker = None
+
+
+def _init_worker(names):
+    global _worker
+    _worker = (load_rules(), {name: POLICIES[name]() for name in names})
+
+
+def run_matches(seed, first, second, start, stop):
+    """Play games start..stop-1 of a pairing and return the first strategy's win shares
+
+    Even games seat `first` first and odd games swap seats on the same deal.
+    """
+    rules, policies = _worker
+    pair = (policies[first], policies[second])
+    shares = []
+    for index in range(start, stop):
+        swapped = index % 2
+        result = play_game(rules, pair[::-1] if swapped else pair, game_seed(seed, index // 2))
+        seat = 1 if swapped else 0
+        shares.append(1 / len(result.winners) if seat in result.winners else 0.0)
+    return shares
+
+
+class Elo:
+    """Elo ratings updated one game at a time"""
+
+    def __init__(self, names, k=DEFAULT_K):
+        self.k = k
+        self.ratings = {name: float(INITIAL_RATING) for name in names}
+
+    def expected(self, a, b):
+        """Expected score of `a` against `b`"""
+        return 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+
+    def update(self, a, b, score):
+        """Record a game `a` scored `score` in (1 win, 0.5 tie, 0 loss) against `b`"""
+        delta = self.k * (score - self.expected(a, b))
+        self.ratings[a] += delta
+        self.ratings[b] -= delta
+
+
+class Standings:
+    """Head-to-head win shares of every pairing"""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.games = {}
+        self.wins = {}
+
+    def add(self, a, b, score):
+        for key, share in (((a, b), score), ((b, a), 1 - score)):
+            self.games[key] = self.games.get(key, 0) + 1
+            self.wins[key] = self.wins.get(key, 0.0) + share
+
+    def win_rate(self, a, b):
+        """Share of games `a` won against `b`, with a 95% confidence half-width"""
+        games = self.games.get((a, b), 0)
+        if not games:
+            return math.nan, math.nan
+        rate = self.wins[(a, b)] / games
+        return rate, 1.96 * math.sqrt(rate * (1 - rate) / games)
+
+    def dominant(self, threshold=DEFAULT_DOMINANCE):
+        """Strategies winning at least `threshold` against every other"""
+        return [a for a in self.names
+                if all(self.win_rate(a, b)[0] >= threshold for b in self.names if b != a)]
+
+
+def iter_matches(names, games_per_pair, seed=0, workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Play every pairing of `names` and yield (first, second, score) per game
+
+    Games come out by game index, then pairing, whatever the shard size:
+    the shards of every pairing covering the same games are run together
+    and merged, so all pairings advance together while the tournament runs.
+    """
+    if shard_size < 1:
+        raise ValueError(f'Shard size must be at least 1, got {shard_size}')
+    pairs = list(combinations(names, 2))
+    tasks = ((seed, first, second, start, stop)
+             for start, stop in shards(games_per_pair, shard_size) for first, second in pairs)
+    row = []
+    for shares in imap_ordered(run_matches, tasks, workers, _init_worker, (tuple(names),)):
+        row.append(shares)
+        if len(row) == len(pairs):
+            for scores in zip(*row):
+                for (first, second), score in zip(pairs, scores):
+                    yield first, second, score
+            row = []
+
+
+def main(names=DEFAULT_STRATEGIES, games_per_pair=DEFAULT_GAMES_PER_PAIR, seed=0, workers=None,
+         shard_size=DEFAULT_SHARD_SIZE, k=DEFAULT_K, threshold=DEFAULT_DOMINANCE, check=False):
+    """Run a round-robin tournament and report win rates and Elo ratings
+
+    With `check`, returns 1 if any strategy dominates the rest.
+    """
+    names = list(dict.fromkeys(names))
+    if len(names) < 2:
+        raise ValueError('A tournament needs at least 2 strategies')
+    if games_per_pair % 2:
+        raise ValueError(f'Games per pairing must be even (each deal is played from both seats), '
+                         f'got {games_per_pair}')
+    pairs = len(names) * (len(names) - 1) // 2
+
+    print('🏆 Beat by Beat - Strategy Tournament')
+    print('=' * 50)
+    print()
+    print(f'{len(names)} strategies, {pairs} pairings, {games_per_pair} games per pairing (2 players)')
+    print(f'Seed {seed}, Elo K={k}')
+    print()
+
+    elo = Elo(names, k)
+    standings = Standings(names)
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    games = 0
+    for first, second, score in iter_matches(names, games_per_pair, seed, workers, shard_size):
+        elo.update(first, second, score)
+        standings.add(first, second, score)
+        digest.update(repr((first, second, score)).encode())
+        games += 1
+    elapsed = time.perf_counter() - start
+
+    width = max(len(name) for name in names)
+    print('Win rate of row against column (± 95% interval):')
+    print(f'  {"":{width}}  ' + '  '.join(f'{name:>11}' for name in names))
+    for a in names:
+        cells = []
+        for b in names:
+            rate, margin = standings.win_rate(a, b)
+            cells.append(f'{"-":>11}' if a == b else f'{100 * rate:5.1f}±{100 * margin:4.1f}%')
+        print(f'  {a:{width}}  ' + '  '.join(cells))
+    print()
+
+    print('Elo ratings:')
+    for name in sorted(names, key=elo.ratings.get, reverse=True):
+        print(f'  {name:{width}}  {elo.ratings[name]:6.0f}')
+    print()
+
+    dominant = standings.dominant(threshold)
+    if dominant:
+        print(f'⚠️  Dominant (wins {100 * threshold:.0f}%+ against every other): {", ".join(dominant)}')
+    else:
+        print(f'✅ No strategy wins {100 * threshold:.0f}%+ against every other')
+    print(f'🔑 Result digest: {digest.hexdigest()}')
+    print(f'⏱️  {games / elapsed:,.0f} games/sec ({elapsed:.2f}s, {games:,} games)')
+    return 1 if check and dominant else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play deck-building strategies against each other round-robin')
+    parser.add_argument('--strategy', '-s', action='append', choices=sorted(POLICIES),
+                        help=f'strategy to enter, repeated (default: {", ".join(DEFAULT_STRATEGIES)})')
+    parser.add_argument('--games-per-pair', '-n', type=int, default=DEFAULT_GAMES_PER_PAIR,
+                        help=f'games per pairing, half from each seat (default: {DEFAULT_GAMES_PER_PAIR})')
+    parser.add_argument('--seed', type=int, default=0, help='run seed (default: 0)')
+    parser.add_argument('--workers', '-j', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'games per worker task (default: {DEFAULT_SHARD_SIZE})')
+    parser.add_argument('--k', type=float, default=DEFAULT_K, help=f'Elo K factor (default: {DEFAULT_K})')
+    parser.add_argument('--dominance', type=float, default=DEFAULT_DOMINANCE,
+                        help=f'win share against every other that counts as dominant (default: {DEFAULT_DOMINANCE})')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 if a strategy dominates')
+    args = parser.parse_args()
+    try:
+        sys.exit(main(tuple(args.strategy or DEFAULT_STRATEGIES), args.games_per_pair, args.seed, args.workers,
+                      args.shard_size, args.k, args.dominance, args.check))
+    except (RuntimeError, ValueError) as e:
+        print(f'❌ Error: {e}')
+        sys.exit(1)
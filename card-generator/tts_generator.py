@@ -2,25 +2,65 @@
 """
 Tabletop Simulator Generator for Beat by Beat Cards (v2)
 Renders HTML cards directly into TTS sprite sheet layout
-This ensures perfect consistency between HTML/PDF and TTS formats
+Card HTML and CSS come straight from generator.py, so TTS sheets always
+match the HTML/PDF formats without reading back output/html
 """
 
+import argparse
 import asyncio
+import hashlib
+import io
+import json
+import os
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from playwright.async_api import async_playwright
+from browser_pool import BrowserPool
+from build_cache import BuildManifest, hash_inputs
+from card_model import load_card_set
+from tile_cache import TileCache, DEFAULT_MAX_BYTES
+import generator
+
+try:
+    from PIL import Image
+    import pil_renderer
+except ImportError:  # Pillow is only needed for --composite and --renderer pillow (the "tts" extra)
+    Image = None
+    pil_renderer = None
 
 
 # TTS requirements:
 # - 10 cards wide × 7 cards tall = 70 cards per sheet
 # - Resolution: 4096×4096 pixels for high quality (TTS recommended)
-# - Can also use 2048×2048 for smaller file sizes
+# - Can also use 2048×2048 for smaller file sizes (--sheet-size 2048)
+SHEET_SIZES = [4096, 2048]
 SHEET_WIDTH = 4096
 SHEET_HEIGHT = 4096
 CARDS_PER_ROW = 10
 CARDS_PER_COL = 7
 CARDS_PER_SHEET = 70
 
+# Natural card size at 96 DPI (2.5in × 3.5in)
+CARD_WIDTH_PX = int(2.5 * 96)  # 240px
+CARD_HEIGHT_PX = int(3.5 * 96)  # 336px
+
+# Standard TTS card back resolution (same quality as sprite sheets)
+BACK_WIDTH_PX = 410
+BACK_HEIGHT_PX = 574
+BACK_SCALE_FACTOR = BACK_WIDTH_PX / CARD_WIDTH_PX
+
+RENDERERS = ['browser', 'pillow']
+
+# Filler for empty grid cells on the last sheet of a deck
+EMPTY_CARD_HTML = '<div class="card" style="background: white; border: 2px solid #333;"></div>'
+
+# Sprite files are named <sheet>.<first 12 hex digits of the PNG's SHA-256>.png,
+# and sprites.json maps each sheet to its current file
+SPRITE_MANIFEST_NAME = 'sprites.json'
+SPRITE_HASH_LENGTH = 12
+SPRITE_FILE_RE = re.compile(r'(?P<stem>[a-z-]+)(?:_\d+)?(?:\.[0-9a-f]{%d})?\.png' % SPRITE_HASH_LENGTH)
+
 
 def create_tts_html(card_htmls, css_content):
     """Create HTML with cards in a 10x7 grid for TTS sprite sheet"""
@@ -83,140 +123,125 @@ def create_tts_html(card_htmls, css_content):
     return html
 
 
-async def extract_cards_from_html(html_path):
-    """Extract card HTML elements and CSS from an HTML file"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-
-        await page.goto(f'file://{html_path.absolute()}')
-
-        # Extract CSS
-        css_content = await page.evaluate('''() => {
-            const styleSheets = Array.from(document.styleSheets);
-            return styleSheets.map(sheet => {
-                try {
-                    return Array.from(sheet.cssRules).map(rule => rule.cssText).join('\\n');
-                } catch (e) {
-                    return '';
-                }
-            }).join('\\n');
-        }''')
-
-        # Get all card elements (excluding backs)
-        card_elements = await page.query_selector_all('.card:not(.card-back)')
-        card_htmls = []
-        for card in card_elements:
-            html = await card.evaluate('(el) => el.outerHTML')
-            card_htmls.append(html)
-
-        await browser.close()
-
-        return card_htmls, css_content
-
-
-async def extract_card_back_from_html(html_path):
-    """Extract card back HTML and CSS from an HTML file"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-
-        await page.goto(f'file://{html_path.absolute()}')
-
-        # Extract CSS
-        css_content = await page.evaluate('''() => {
-            const styleSheets = Array.from(document.styleSheets);
-            return styleSheets.map(sheet => {
-                try {
-                    return Array.from(sheet.cssRules).map(rule => rule.cssText).join('\\n');
-                } catch (e) {
-                    return '';
-                }
-            }).join('\\n');
-        }''')
-
-        # Get the card back element
-        card_back = await page.query_selector('.card-back')
-        if card_back:
-            back_html = await card_back.evaluate('(el) => el.outerHTML')
-        else:
-            back_html = None
-
-        await browser.close()
-
-        return back_html, css_content
-
-
-async def render_sprite_sheet(card_htmls, css_content, output_path):
-    """Render cards as TTS sprite sheets - always 10x7 grid at 4096x4096px"""
-    # Split into sheets of 70 cards
-    num_sheets = (len(card_htmls) + CARDS_PER_SHEET - 1) // CARDS_PER_SHEET
-
-    # IMPORTANT: TTS requires exact 10x7 grid dimensions
-    # Natural grid size at 96 DPI: 10 × 2.5in = 25in, 7 × 3.5in = 24.5in
-    # At 96 DPI: 2400px × 2352px
-    # We want 4096x4096px output for TTS
-
-    # Use 4096x4096 as target (square for TTS compatibility)
-    natural_width = int(10 * 2.5 * 96)  # 2400px
-    natural_height = int(7 * 3.5 * 96)  # 2352px
-
-    # Scale to fit 4096x4096 while maintaining aspect ratio
-    # Use the dimension that requires more scaling
-    scale_factor_x = 4096 / natural_width  # ~1.707
-    scale_factor_y = 4096 / natural_height  # ~1.741
-    scale_factor = min(scale_factor_x, scale_factor_y)  # Use smaller to fit within 4096x4096
-
-    final_width = int(natural_width * scale_factor)
-    final_height = int(natural_height * scale_factor)
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        context = await browser.new_context(
-            viewport={'width': natural_width, 'height': natural_height},
-            device_scale_factor=scale_factor
-        )
-        page = await context.new_page()
-
-        for sheet_num in range(num_sheets):
-            start_idx = sheet_num * CARDS_PER_SHEET
-            end_idx = min(start_idx + CARDS_PER_SHEET, len(card_htmls))
-            sheet_cards = card_htmls[start_idx:end_idx]
-
-            # ALWAYS pad to exactly 70 cards (10x7 grid) for consistent TTS sprite sheets
-            while len(sheet_cards) < CARDS_PER_SHEET:
-                sheet_cards.append('<div class="card" style="background: white; border: 2px solid #333;"></div>')
-
-            # Create HTML for this sheet - ALWAYS 10x7 grid
-            html = create_tts_html(sheet_cards, css_content)
-
-            # Render
-            await page.set_content(html)
-            await page.wait_for_load_state('networkidle')
-
-            # Screenshot
-            if num_sheets > 1:
-                filename = f'{output_path.stem}_{sheet_num + 1}.png'
-            else:
-                filename = f'{output_path.stem}.png'
-
-            save_path = output_path.parent / filename
-            await page.screenshot(path=str(save_path), full_page=True)
-            print(f'Generated: {filename} ({final_width}x{final_height}px, 10x7 grid)')
-
-        await browser.close()
-
-
-async def render_card_backs(html_path, output_path):
-    """Render single card back image for TTS"""
-    back_html, css_content = await extract_card_back_from_html(html_path)
-
-    if not back_html:
-        print(f'Warning: No card back found in {html_path.name}')
-        return
-
-    # Create HTML for a single card back (not a grid)
-    html = f'''<!DOCTYPE html>
+def write_if_changed(path, data):
+    """Write bytes to a file only if they differ from what is already there
+
+    Keeps unchanged PNGs byte- and mtime-identical, so git and the GitHub raw
+    URLs used by tts_json_generator see no churn.
+    """
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def hashed_name(filename, data):
+    """`pool-cards_1.png` -> `pool-cards_1.<content hash>.png` for a sheet's PNG bytes"""
+    stem, suffix = os.path.splitext(filename)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:SPRITE_HASH_LENGTH]}{suffix}'
+
+
+class SpriteManifest:
+    """Content-hashed sprite files of output/tts, by sheet
+
+    A sheet's file name changes exactly when its image does, so TTS and any
+    HTTP cache can keep a sprite forever and only fetch sheets that changed.
+    sprites.json records, for each deck stem (`pool-cards`, `move-backs`)
+    the current file of each of its sheets in order, and is what
+    tts_json_generator.find_tts_files() reads.
+    """
+
+    def __init__(self, tts_dir):
+        self.tts_dir = Path(tts_dir)
+        self.path = self.tts_dir / SPRITE_MANIFEST_NAME
+        # Deck stem -> sheet file names, for the decks built in this run
+        self.sheets = {}
+        # Sheet name (pool-cards_1.png) -> current hashed file
+        self.files = {}
+        manifest = load_sprite_manifest(self.tts_dir) or {}
+        self.previous = manifest.get('sheets', {})
+        for stem, names in self.previous.items():
+            for filename, name in zip(sheet_names(stem, len(names)), names):
+                self.files[filename] = name
+
+    def add_deck(self, stem, filenames):
+        """Record the sheets (split_sheets() file names) that make up a deck"""
+        self.sheets[stem] = list(filenames)
+
+    def sheet_path(self, filename):
+        """Path of a sheet's current file (which may not exist yet)
+
+        Sheets written before file names were hashed are found under their
+        fixed name until adopt_legacy() renames them.
+        """
+        return self.tts_dir / self.files.get(filename, filename)
+
+    def adopt_legacy(self):
+        """Give fixed-name sheets of the decks built in this run their hashed names, without re-rendering"""
+        for filenames in self.sheets.values():
+            for filename in filenames:
+                legacy = self.tts_dir / filename
+                if filename not in self.files and legacy.exists():
+                    self.write(filename, legacy.read_bytes())
+
+    def write(self, filename, data):
+        """Write a sheet's PNG bytes under their hashed name and return the path"""
+        name = hashed_name(filename, data)
+        path = self.tts_dir / name
+        write_if_changed(path, data)
+        self.files[filename] = name
+        return path
+
+    def save(self, prune=False):
+        """Write sprites.json, and with `prune` delete sprite files no sheet refers to any more
+
+        Decks not built in this run keep their entries from the last build.
+        Superseded files are kept by default, since TTS saves that were
+        already published still point at them. Pruning covers every deck in
+        the manifest, including the fixed-name sheets written before file
+        names were hashed.
+        """
+        built = {stem: [self.files.get(filename, filename) for filename in filenames]
+                 for stem, filenames in self.sheets.items()}
+        sheets = {**self.previous, **built}
+        if prune:
+            current = {name for names in sheets.values() for name in names}
+            for png_file in self.tts_dir.glob('*.png'):
+                match = SPRITE_FILE_RE.fullmatch(png_file.name)
+                if match and match.group('stem') in sheets and png_file.name not in current:
+                    png_file.unlink()
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.tts_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'format': 1, 'sheets': sheets}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def sheet_names(stem, count):
+    """File names split_sheets() gives a deck of `count` sheets"""
+    if count == 1:
+        return [f'{stem}.png']
+    return [f'{stem}_{sheet_num}.png' for sheet_num in range(1, count + 1)]
+
+
+def load_sprite_manifest(tts_dir):
+    """sprites.json of `tts_dir` as a dict, or None if there is none (or it is unreadable)"""
+    try:
+        with open(Path(tts_dir) / SPRITE_MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def create_card_html(card_html, css_content):
+    """Create HTML for a single card (used for card backs and composite tiles)"""
+    return f'''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -244,40 +269,360 @@ async def render_card_backs(html_path, output_path):
     </style>
 </head>
 <body>
-    {back_html}
+    {card_html}
 </body>
 </html>'''
 
-    # Calculate dimensions for a single card at high resolution
-    natural_width = int(2.5 * 96)  # 240px at 96 DPI
-    natural_height = int(3.5 * 96)  # 336px at 96 DPI
 
-    # Target resolution for single card (same quality as sprite sheets)
-    target_width = 410  # Standard TTS card back resolution
-    target_height = 574
-    scale_factor = target_width / natural_width
+async def render_tiles(pool, card_htmls, css_content, scale_factor, tile_cache):
+    """Rasterize each distinct card face once, reusing tiles from the cache
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        context = await browser.new_context(
-            viewport={'width': natural_width, 'height': natural_height},
+    Returns a dict of card HTML -> PIL image at `scale_factor`.
+    """
+    size = (CARD_WIDTH_PX, CARD_HEIGHT_PX)
+    pngs = {}
+    missing = []
+    for card_html in dict.fromkeys(card_htmls):
+        key = TileCache.key(card_html, css_content, size, scale_factor)
+        png = tile_cache.get(key)
+        if png is None:
+            missing.append((card_html, key))
+        else:
+            pngs[card_html] = png
+
+    if missing:
+        async with pool.page(
+            viewport={'width': CARD_WIDTH_PX, 'height': CARD_HEIGHT_PX},
             device_scale_factor=scale_factor
-        )
-        page = await context.new_page()
+        ) as page:
+            for card_html, key in missing:
+                await page.set_content(create_card_html(card_html, css_content))
+                await page.wait_for_load_state('networkidle')
+                png = await page.screenshot(full_page=True)
+                tile_cache.put(key, png)
+                pngs[card_html] = png
+
+    return {card_html: Image.open(io.BytesIO(png)).convert('RGB') for card_html, png in pngs.items()}
+
+
+def composite_sheet(sheet_cards, tiles, scale_factor, size):
+    """Paste card tiles into a 10x7 sprite sheet and return it as PNG bytes
+
+    `tiles` maps each entry of `sheet_cards` (card HTML, or any hashable
+    card key) to its PIL image.
+    """
+    sheet = Image.new('RGB', size, 'white')
+    for index, card_html in enumerate(sheet_cards):
+        row, col = divmod(index, CARDS_PER_ROW)
+        # Round each cell origin separately so fractional cell sizes never
+        # accumulate into a visible drift across the grid
+        x = round(col * CARD_WIDTH_PX * scale_factor)
+        y = round(row * CARD_HEIGHT_PX * scale_factor)
+        sheet.paste(tiles[card_html], (x, y))
+
+    buffer = io.BytesIO()
+    sheet.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def sheet_geometry(sheet_size):
+    """Natural grid size, scale factor and final pixel size of a sprite sheet
+
+    Returns (natural_width, natural_height, scale_factor, final_width, final_height).
+    """
+    # IMPORTANT: TTS requires exact 10x7 grid dimensions
+    # Natural grid size at 96 DPI: 10 × 2.5in = 25in, 7 × 3.5in = 24.5in
+    # At 96 DPI: 2400px × 2352px
+    # We want sheet_size × sheet_size output for TTS (4096 by default)
+
+    # Use a square target for TTS compatibility
+    natural_width = CARDS_PER_ROW * CARD_WIDTH_PX  # 2400px
+    natural_height = CARDS_PER_COL * CARD_HEIGHT_PX  # 2352px
+
+    # Scale to fit the square sheet while maintaining aspect ratio
+    # Use the dimension that requires more scaling
+    scale_factor_x = sheet_size / natural_width  # ~1.707 at 4096
+    scale_factor_y = sheet_size / natural_height  # ~1.741 at 4096
+    scale_factor = min(scale_factor_x, scale_factor_y)  # Use smaller to fit within the sheet
+
+    final_width = int(natural_width * scale_factor)
+    final_height = int(natural_height * scale_factor)
+    return natural_width, natural_height, scale_factor, final_width, final_height
+
 
-        await page.set_content(html)
-        await page.wait_for_load_state('networkidle')
+def split_sheets(cards, output_path, filler):
+    """Split a deck into (filename, cards) sheets of exactly 70, padded with `filler`"""
+    # Split into sheets of 70 cards
+    num_sheets = (len(cards) + CARDS_PER_SHEET - 1) // CARDS_PER_SHEET
+
+    filenames = sheet_names(output_path.stem, num_sheets)
+    sheets = []
+    for sheet_num in range(num_sheets):
+        start_idx = sheet_num * CARDS_PER_SHEET
+        end_idx = min(start_idx + CARDS_PER_SHEET, len(cards))
+        sheet_cards = cards[start_idx:end_idx]
+
+        # ALWAYS pad to exactly 70 cards (10x7 grid) for consistent TTS sprite sheets
+        while len(sheet_cards) < CARDS_PER_SHEET:
+            sheet_cards.append(filler)
+
+        sheets.append((filenames[sheet_num], sheet_cards))
+    return sheets
+
+
+async def render_sprite_sheet(pool, card_htmls, css_content, output_path, manifest, sprites,
+                              composite=False, tile_cache=None, sheet_size=SHEET_WIDTH):
+    """Render cards as TTS sprite sheets - always 10x7 grid fitted to sheet_size px
+
+    Sheets whose HTML and render size are unchanged since the last build
+    recorded in `manifest` are skipped individually. Sheets are saved
+    under content-hashed names recorded in `sprites` (a SpriteManifest).
+
+    With `composite`, each distinct card face is rasterized once (or read
+    from `tile_cache`) and the sheets are assembled from those tiles with
+    Pillow instead of screenshotting the full grid, so duplicate cards are
+    laid out and painted only once.
+    """
+    natural_width, natural_height, scale_factor, final_width, final_height = sheet_geometry(sheet_size)
+    sheets = split_sheets(card_htmls, output_path, EMPTY_CARD_HTML)
+    sprites.add_deck(output_path.stem, [filename for filename, _ in sheets])
+
+    # Each sheet is its own cache unit, so a one-card edit only re-renders
+    # the sheet holding that card and the other PNGs stay untouched on disk
+    mode = 'composite' if composite else 'grid'
+    stale = []
+    for filename, sheet_cards in sheets:
+        key = manifest.key(output_path.parent / filename)
+        # Create HTML for this sheet - ALWAYS 10x7 grid
+        html = create_tts_html(sheet_cards, css_content)
+        digest = hash_inputs('sprite', mode, natural_width, natural_height, scale_factor, html)
+        if manifest.is_fresh(key, digest, [sprites.sheet_path(filename)]):
+            print(f'  Up to date: {sprites.sheet_path(filename).name}')
+        else:
+            stale.append((filename, sheet_cards, html, key, digest))
 
-        await page.screenshot(path=str(output_path), full_page=True)
-        print(f'Generated: {output_path.name}')
+    if not stale:
+        return
 
-        await browser.close()
+    if composite:
+        stale_cards = [card for _, sheet_cards, _, _, _ in stale for card in sheet_cards]
+        tiles = await render_tiles(pool, stale_cards, css_content, scale_factor, tile_cache)
+        print(f'  Composited {len(stale_cards)} cells from {len(tiles)} unique faces')
 
+        for filename, sheet_cards, _, key, digest in stale:
+            png = composite_sheet(sheet_cards, tiles, scale_factor, (final_width, final_height))
+            save_path = sprites.write(filename, png)
+            manifest.record(key, digest)
+            print(f'Generated: {save_path.name} ({final_width}x{final_height}px, 10x7 grid, composited)')
+        return
+
+    async with pool.page(
+        viewport={'width': natural_width, 'height': natural_height},
+        device_scale_factor=scale_factor
+    ) as page:
+        for filename, _, html, key, digest in stale:
+            # Render
+            await page.set_content(html)
+            await page.wait_for_load_state('networkidle')
+
+            # Screenshot
+            png = await page.screenshot(full_page=True)
+            save_path = sprites.write(filename, png)
+            manifest.record(key, digest)
+            print(f'Generated: {save_path.name} ({final_width}x{final_height}px, 10x7 grid)')
+
+
+async def render_card_backs(pool, back_html, css_content, output_path, manifest, sprites, tile_cache):
+    """Render single card back image for TTS, unless unchanged since the last build
+
+    The back is a single tile, so it is read from `tile_cache` when possible.
+    """
+    # Create HTML for a single card back (not a grid)
+    html = create_card_html(back_html, css_content)
+
+    # Calculate dimensions for a single card at high resolution
+    natural_width = CARD_WIDTH_PX  # 240px at 96 DPI
+    natural_height = CARD_HEIGHT_PX  # 336px at 96 DPI
+    scale_factor = BACK_SCALE_FACTOR
+
+    sprites.add_deck(output_path.stem, [output_path.name])
+    key = manifest.key(output_path)
+    digest = hash_inputs('back', natural_width, natural_height, scale_factor, html)
+    if manifest.is_fresh(key, digest, [sprites.sheet_path(output_path.name)]):
+        print(f'  Up to date: {sprites.sheet_path(output_path.name).name}')
+        return
+
+    tile_key = TileCache.key(back_html, css_content, (natural_width, natural_height), scale_factor)
+    png = tile_cache.get(tile_key)
+    if png is None:
+        async with pool.page(
+            viewport={'width': natural_width, 'height': natural_height},
+            device_scale_factor=scale_factor
+        ) as page:
+            await page.set_content(html)
+            await page.wait_for_load_state('networkidle')
+            png = await page.screenshot(full_page=True)
+        tile_cache.put(tile_key, png)
+
+    save_path = sprites.write(output_path.name, png)
+    print(f'Generated: {save_path.name}')
+
+    manifest.record(key, digest)
+
+
+def composite_pillow_sheet(deck, sheet_rows, scale_factor, size):
+    """Draw each distinct card of a sheet once with Pillow and composite the sheet
+
+    Card records are frozen and hashable, so they key the tiles directly
+    (None is the empty filler card).
+    """
+    tiles = {}
+    for row in sheet_rows:
+        if row not in tiles:
+            tiles[row] = render_pillow_tile(deck, row, scale_factor)
+    return composite_sheet(sheet_rows, tiles, scale_factor, size)
+
+
+def pillow_sources():
+    """Source files whose changes invalidate Pillow-rendered artifacts"""
+    return [Path(pil_renderer.__file__), Path(generator.__file__)]
+
+
+def render_pillow_tile(deck, row, scale_factor):
+    """Draw one card face (None is the empty filler); runs in a worker process"""
+    if row is None:
+        return pil_renderer.render_empty(scale_factor)
+    return pil_renderer.render_card(deck, row, scale_factor)
+
+
+def encode_pillow_back(card_type):
+    """Draw a card back and encode it as PNG bytes; runs in a worker process"""
+    buffer = io.BytesIO()
+    pil_renderer.render_back(card_type, BACK_SCALE_FACTOR).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class PillowPool:
+    """Worker processes for the Pillow renderer, shared by every deck
+
+    The Pillow counterpart of BrowserPool. Each distinct card face is drawn
+    once in a worker, and every sheet is composited and PNG-encoded in a
+    worker as soon as its tiles are ready, so independent sheets and decks
+    keep all `workers` cores busy.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers < 1:
+            raise ValueError(f'Pillow pool needs at least 1 worker, got {self.workers}')
+        self._executor = None
+        self._tiles = {}
+
+    async def __aenter__(self):
+        self._executor = ProcessPoolExecutor(self.workers)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._executor.shutdown(cancel_futures=exc_type is not None)
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def tile(self, deck, row, scale_factor):
+        """Future for one card face, started at most once per pool"""
+        key = (deck, row, scale_factor)
+        if key not in self._tiles:
+            self._tiles[key] = self._run(render_pillow_tile, deck, row, scale_factor)
+        return self._tiles[key]
+
+    async def sheet(self, deck, sheet_rows, scale_factor, size):
+        """Render a sheet's tiles and composite them into PNG bytes"""
+        tiles = {}
+        for row in sheet_rows:
+            if row not in tiles:
+                tiles[row] = self.tile(deck, row, scale_factor)
+        images = await asyncio.gather(*tiles.values())
+        return await self._run(composite_sheet, sheet_rows, dict(zip(tiles, images)), scale_factor, size)
+
+    async def back(self, card_type):
+        """Render a card back into PNG bytes"""
+        return await self._run(encode_pillow_back, card_type)
+
+
+def schedule_pillow_sheets(pool, deck, rows, output_path, manifest, sprites, sheet_size=SHEET_WIDTH):
+    """Start rendering a deck's stale sprite sheets in the Pillow workers
+
+    Works from the deck's card records rather than card HTML, so the
+    manifest digest covers the records plus the renderer and generator
+    sources.
+    Returns (sheet file name, key, digest, task) per sheet for
+    finish_pillow_jobs(); task is None when the sheet is up to date.
+    """
+    _, _, scale_factor, final_width, final_height = sheet_geometry(sheet_size)
+
+    sheets = split_sheets(rows, output_path, None)
+    sprites.add_deck(output_path.stem, [filename for filename, _ in sheets])
+    jobs = []
+    for filename, sheet_rows in sheets:
+        key = manifest.key(output_path.parent / filename)
+        digest = hash_inputs('sprite', 'pillow', scale_factor, pillow_sources(), sheet_rows)
+        task = None
+        if not manifest.is_fresh(key, digest, [sprites.sheet_path(filename)]):
+            task = asyncio.ensure_future(pool.sheet(deck, sheet_rows, scale_factor, (final_width, final_height)))
+        jobs.append((filename, key, digest, task))
+    return jobs
+
+
+def schedule_pillow_back(pool, card_type, output_path, manifest, sprites):
+    """Start rendering a card back in the Pillow workers, unless up to date"""
+    sprites.add_deck(output_path.stem, [output_path.name])
+    key = manifest.key(output_path)
+    digest = hash_inputs('back', 'pillow', BACK_SCALE_FACTOR, pillow_sources(), card_type)
+    task = None
+    if not manifest.is_fresh(key, digest, [sprites.sheet_path(output_path.name)]):
+        task = asyncio.ensure_future(pool.back(card_type))
+    return [(output_path.name, key, digest, task)]
+
+
+async def finish_pillow_jobs(jobs, manifest, sprites, description):
+    """Write scheduled Pillow renders in order and record them in the manifests"""
+    for filename, key, digest, task in jobs:
+        if task is None:
+            print(f'  Up to date: {sprites.sheet_path(filename).name}')
+            continue
+        save_path = sprites.write(filename, await task)
+        manifest.record(key, digest)
+        print(f'Generated: {save_path.name} ({description})')
+
+
+async def main(pool=None, force=False, composite=False, sheet_size=SHEET_WIDTH,
+               tile_cache_bytes=DEFAULT_MAX_BYTES, renderer='browser', workers=None, prune=False):
+    """Generate TTS sprite sheets from the generator's card HTML
+
+    Decks and backs whose inputs are unchanged since the last build are
+    skipped unless `force` is set. `composite` assembles sheets from
+    per-face tiles with Pillow (see render_sprite_sheet). Tiles and backs
+    are kept in output/.tile-cache, capped at `tile_cache_bytes`.
+
+    With renderer='pillow', cards are drawn by pil_renderer straight from
+    the card records and no browser is launched; `pool` is then a PillowPool of
+    `workers` processes (default: one per CPU) and every stale sheet and
+    back is started up front, then written in deck order.
+
+    Sprite files replaced by a new image are kept for saves that still
+    refer to them, unless `prune` is set.
+    """
+    if (composite or renderer == 'pillow') and Image is None:
+        print('❌ Error: --composite and --renderer pillow need Pillow (uv sync --extra tts)')
+        return 1
+
+    if pool is None:
+        pool_class = PillowPool(workers) if renderer == 'pillow' else BrowserPool()
+        async with pool_class as pool:
+            return await main(pool, force, composite, sheet_size, tile_cache_bytes, renderer, workers, prune)
 
-async def main():
-    """Generate TTS sprite sheets from HTML cards"""
     base_dir = Path(__file__).parent.parent
-    output_dir = base_dir / 'output' / 'html'
+    data_dir = base_dir / 'card-data'
     tts_dir = base_dir / 'output' / 'tts'
 
     # Create TTS directory
@@ -287,65 +632,88 @@ async def main():
     print('=' * 50)
     print()
 
-    # Check if HTML files exist
-    if not output_dir.exists():
-        print('❌ Error: output/html/ directory not found')
-        print('   Run ./scripts/generate-all.sh or python card-generator/generator.py first')
-        return
+    manifest = BuildManifest(base_dir / 'output', force=force)
+    sprite_manifest = SpriteManifest(tts_dir)
+    tile_cache = TileCache(base_dir / 'output' / '.tile-cache', tile_cache_bytes)
+
+    # Build card HTML and CSS in-process from the CSV data
+    css = generator.generate_css()
+    card_set = load_card_set(data_dir)
+    decks = generator.load_deck_cards(card_set)
+    pending = {}
+    if renderer == 'pillow':
+        # Decks and sheets are independent, so start them all before
+        # reporting any, keeping every worker busy
+        rows = generator.load_deck_rows(card_set)
+        for deck, (filename, _) in generator.DECK_FILES.items():
+            stem = filename.replace('.html', '')
+            pending[deck] = schedule_pillow_sheets(pool, deck, rows[deck], tts_dir / stem, manifest, sprite_manifest,
+                                                   sheet_size)
+        for card_type in ['move', 'rhythm', 'judge']:
+            pending[f'{card_type}-backs'] = schedule_pillow_back(pool, card_type, tts_dir / f'{card_type}-backs.png',
+                                                                 manifest, sprite_manifest)
+        _, _, _, final_width, final_height = sheet_geometry(sheet_size)
+        print(f'Rendering with Pillow on {pool.workers} worker processes')
+        print()
+
+    async def sprites(deck, stem):
+        if renderer == 'pillow':
+            await finish_pillow_jobs(pending[deck], manifest, sprite_manifest,
+                                     f'{final_width}x{final_height}px, 10x7 grid, pillow')
+        else:
+            await render_sprite_sheet(pool, decks[deck], css, tts_dir / stem, manifest, sprite_manifest,
+                                      composite, tile_cache, sheet_size)
+
+    async def backs(card_type):
+        output_path = tts_dir / f'{card_type}-backs.png'
+        if renderer == 'pillow':
+            await finish_pillow_jobs(pending[f'{card_type}-backs'], manifest, sprite_manifest, 'pillow')
+        else:
+            await render_card_backs(pool, generator.generate_card_back(card_type), css, output_path,
+                                    manifest, sprite_manifest, tile_cache)
 
     # Generate starter move cards
-    starter_html = output_dir / 'starter-cards.html'
-    if starter_html.exists():
-        print('Generating starter card sprites...')
-        card_htmls, css = await extract_cards_from_html(starter_html)
-        print(f'  Found {len(card_htmls)} starter cards')
-        await render_sprite_sheet(card_htmls, css, tts_dir / 'starter-cards')
+    print('Generating starter card sprites...')
+    print(f'  Found {len(decks["starter"])} starter cards')
+    await sprites('starter', 'starter-cards')
 
     # Generate pool move cards
-    pool_html = output_dir / 'pool-cards.html'
-    if pool_html.exists():
-        print('Generating pool card sprites...')
-        card_htmls, css = await extract_cards_from_html(pool_html)
-        print(f'  Found {len(card_htmls)} pool cards')
-        await render_sprite_sheet(card_htmls, css, tts_dir / 'pool-cards')
+    print('Generating pool card sprites...')
+    print(f'  Found {len(decks["pool"])} pool cards')
+    await sprites('pool', 'pool-cards')
 
     # Generate move card backs (shared by starter, pool, and stumble)
     print('Generating move card backs...')
-    move_backs_html = output_dir / 'move-backs.html'
-    await render_card_backs(move_backs_html, tts_dir / 'move-backs.png')
+    await backs('move')
 
     # Generate rhythm cards
-    rhythm_html = output_dir / 'rhythm-cards.html'
-    if rhythm_html.exists():
-        print('\nGenerating rhythm card sprites...')
-        card_htmls, css = await extract_cards_from_html(rhythm_html)
-        print(f'  Found {len(card_htmls)} rhythm cards')
-        await render_sprite_sheet(card_htmls, css, tts_dir / 'rhythm-cards')
+    print('\nGenerating rhythm card sprites...')
+    print(f'  Found {len(decks["rhythm"])} rhythm cards')
+    await sprites('rhythm', 'rhythm-cards')
 
-        print('Generating rhythm card backs...')
-        rhythm_backs_html = output_dir / 'rhythm-backs.html'
-        await render_card_backs(rhythm_backs_html, tts_dir / 'rhythm-backs.png')
+    print('Generating rhythm card backs...')
+    await backs('rhythm')
 
     # Generate judge cards
-    judge_html = output_dir / 'judge-cards.html'
-    if judge_html.exists():
-        print('\nGenerating judge card sprites...')
-        card_htmls, css = await extract_cards_from_html(judge_html)
-        print(f'  Found {len(card_htmls)} judge cards')
-        await render_sprite_sheet(card_htmls, css, tts_dir / 'judge-cards')
+    print('\nGenerating judge card sprites...')
+    print(f'  Found {len(decks["judge"])} judge cards')
+    await sprites('judge', 'judge-cards')
 
-        print('Generating judge card backs...')
-        judge_backs_html = output_dir / 'judge-backs.html'
-        await render_card_backs(judge_backs_html, tts_dir / 'judge-backs.png')
+    print('Generating judge card backs...')
+    await backs('judge')
 
     # Generate stumble cards (use move card backs)
-    stumble_html = output_dir / 'stumble-cards.html'
-    if stumble_html.exists():
-        print('\nGenerating stumble card sprites...')
-        card_htmls, css = await extract_cards_from_html(stumble_html)
-        print(f'  Found {len(card_htmls)} stumble cards')
-        await render_sprite_sheet(card_htmls, css, tts_dir / 'stumble-cards')
-        print('  (Using move card backs for stumbles)')
+    print('\nGenerating stumble card sprites...')
+    print(f'  Found {len(decks["stumble"])} stumble cards')
+    await sprites('stumble', 'stumble-cards')
+    print('  (Using move card backs for stumbles)')
+
+    manifest.save()
+    sprite_manifest.adopt_legacy()
+    sprite_manifest.save(prune)
+
+    if renderer == 'browser':
+        print(f'\nTile cache: {tile_cache.hits} hits, {tile_cache.misses} misses')
 
     print()
     print(f'✅ TTS sprite sheets generated in: {tts_dir}')
@@ -355,4 +723,22 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Render TTS sprite sheets and card backs')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every sheet even if its inputs are unchanged')
+    parser.add_argument('--composite', action='store_true',
+                        help='rasterize each unique card once and composite sheets with Pillow')
+    parser.add_argument('--sheet-size', type=int, choices=SHEET_SIZES, default=SHEET_WIDTH,
+                        help=f'sprite sheet edge length in pixels (default: {SHEET_WIDTH})')
+    parser.add_argument('--renderer', choices=RENDERERS, default='browser',
+                        help='draw cards in Chromium (default) or with Pillow, no browser needed')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes for --renderer pillow (default: one per CPU)')
+    parser.add_argument('--tile-cache-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='size cap for output/.tile-cache before LRU eviction')
+    parser.add_argument('--prune', action='store_true',
+                        help='delete sprite files no sheet in sprites.json refers to any more')
+    args = parser.parse_args()
+    exit(asyncio.run(main(force=args.force, composite=args.composite, sheet_size=args.sheet_size,
+                          tile_cache_bytes=args.tile_cache_mb * 1024 * 1024,
+                          renderer=args.renderer, workers=args.workers, prune=args.prune)))
@@ -4,9 +4,22 @@ TTS JSON Save File Generator for Beat by Beat
 Generates a Tabletop Simulator save file with all card decks pre-configured
 """
 
+import argparse
+import copy
+import hashlib
 import json
+import os
 import re
+import tempfile
 from pathlib import Path
+from functools import lru_cache
+from card_model import Judge, Move, Rhythm, load_card_set
+from generator import iter_deck_rows
+from tts_generator import load_sprite_manifest
+
+# Top-level keys of a deck object that TTS doesn't need re-downloaded when
+# they move; a deck whose other keys are unchanged keeps its old object
+PLACEMENT_KEYS = ('GUID', 'Transform')
 
 
 def get_github_info():
@@ -41,8 +54,35 @@ def get_github_raw_url(username, repo, branch, filepath):
     return f"https://raw.githubusercontent.com/{username}/{repo}/{branch}/output/tts/{filepath}"
 
 
+# find_tts_files() keys -> sprite deck stems in sprites.json
+FRONT_STEMS = {
+    'starter_fronts': 'starter-cards',
+    'pool_fronts': 'pool-cards',
+    'rhythm_fronts': 'rhythm-cards',
+    'judge_fronts': 'judge-cards',
+    'stumble_fronts': 'stumble-cards',
+}
+BACK_STEMS = {
+    'move_back': 'move-backs',
+    'rhythm_back': 'rhythm-backs',
+    'judge_back': 'judge-backs',
+}
+
+
 def find_tts_files(tts_dir):
-    """Find all TTS sprite sheet PNG files"""
+    """Find all TTS sprite sheet PNG files
+
+    Reads the content-hashed file names from the sprites.json written by
+    tts_generator. Directories built before sprites.json existed fall back
+    to matching fixed file names.
+    """
+    manifest = load_sprite_manifest(tts_dir)
+    if manifest is not None:
+        sheets = manifest.get('sheets', {})
+        files = {key: list(sheets.get(stem, [])) for key, stem in FRONT_STEMS.items()}
+        files.update((key, (sheets.get(stem) or [None])[0]) for key, stem in BACK_STEMS.items())
+        return files
+
     files = {
         'starter_fronts': [],
         'pool_fronts': [],
@@ -85,16 +125,136 @@ def calculate_grid_size(num_cards):
     return 10, 7
 
 
-def create_deck_object(name, face_url, back_url, num_cards, position, description="", deck_id=1):
-    """Create a TTS deck object with proper configuration"""
+# Every card in a deck's ContainedObjects is a deep copy of this, stamped
+# with its own ID, sheet and metadata by create_contained_objects()
+CARD_TEMPLATE = {
+    "Name": "Card",
+    "Transform": {
+        "posX": 0.0,
+        "posY": 0.0,
+        "posZ": 0.0,
+        "rotX": 0.0,
+        "rotY": 180.0,
+        "rotZ": 180.0,
+        "scaleX": 1.0,
+        "scaleY": 1.0,
+        "scaleZ": 1.0
+    },
+    "Nickname": "",
+    "Description": "",
+    "GMNotes": "",
+    "ColorDiffuse": {
+        "r": 0.713235259,
+        "g": 0.713235259,
+        "b": 0.713235259
+    },
+    "Tags": [],
+    "LayoutGroupSortIndex": 0,
+    "Value": 0,
+    "Locked": False,
+    "Grid": True,
+    "Snap": True,
+    "IgnoreFoW": False,
+    "MeasureMovement": False,
+    "DragSelectable": True,
+    "Autoraise": True,
+    "Sticky": True,
+    "Tooltip": True,
+    "GridProjection": False,
+    "HideWhenFaceDown": True,
+    "Hands": True,
+    "CardID": 0,
+    "SidewaysCard": False,
+    "CustomDeck": {},
+    "LuaScript": "",
+    "LuaScriptState": "",
+    "XmlUI": "",
+    "GUID": ""
+}
+
+
+@lru_cache(maxsize=None)
+def card_metadata(row):
+    """(Nickname, Description, Tags) of a card record, as shown and searched in TTS
+
+    Cached per record, so repeated copies (rhythm and stumble cards) are
+    described once.
+    """
+    if isinstance(row, Move):
+        description = '\n'.join([
+            f'Cost: {row.cost}',
+            f'Type: {row.type}',
+            f'Style: {row.style or "None"}',
+            f'Bonus: +{row.bonus}',
+            f'Recovery: {row.recovery_action}',
+        ])
+        tags = ['Move', row.deck_type.title(), row.type, *row.styles, row.recovery_action]
+    elif isinstance(row, Rhythm):
+        effect = f'{row.effect} ({row.condition})' if row.condition else row.effect
+        description = effect or 'No effect'
+        tags = ['Rhythm', row.category] if row.category else ['Rhythm']
+    elif isinstance(row, Judge):
+        description = '\n'.join([
+            row.title,
+            f'Requirement: {row.requirement}',
+            f'Reward: {row.reward_points} points',
+            f'Ongoing: {row.ongoing_effect}',
+        ])
+        tags = ['Judge', f'Difficulty {row.difficulty}']
+    else:
+        return 'Stumble', row.flavor_text if row else '', ('Stumble',)
+    return row.name, description, tuple(tag for tag in tags if tag)
+
+
+def create_contained_objects(deck_name, rows, deck_ids, custom_decks):
+    """One Card object per entry of `deck_ids`, with the metadata of the matching card record
+
+    `rows` are the deck's card records in sprite sheet order, and
+    `custom_decks` the deck's CustomDeck entries, keyed by sheet number.
+    """
+    objects = []
+    for card_id, row in zip(deck_ids, rows):
+        nickname, description, tags = card_metadata(row)
+        sheet = str(card_id // 100)
+        # Deep copies, so no two cards (or a card and its deck) share a nested dict
+        card = copy.deepcopy(CARD_TEMPLATE)
+        card.update({
+            "Nickname": nickname,
+            "Description": description,
+            "Tags": list(tags),
+            "CardID": card_id,
+            "CustomDeck": {sheet: copy.deepcopy(custom_decks[sheet])},
+            "GUID": hashlib.md5(f"{deck_name}{card_id}".encode()).hexdigest()[:6]
+        })
+        objects.append(card)
+    return objects
+
+
+def create_deck_object(name, face_url, back_url, num_cards, position, description="", deck_id=1, rows=()):
+    """Create a TTS deck object with proper configuration
+
+    `rows` are the card records behind the deck's cards, for ContainedObjects.
+    """
 
     # Generate unique GUID for this deck
-    import hashlib
     guid = hashlib.md5(f"{name}{position[0]}{position[2]}".encode()).hexdigest()[:6]
 
     # Calculate proper grid dimensions
     num_width, num_height = calculate_grid_size(num_cards)
 
+    deck_ids = list(range(deck_id * 100, deck_id * 100 + num_cards))
+    custom_decks = {
+        str(deck_id): {
+            "FaceURL": face_url,
+            "BackURL": back_url,
+            "NumWidth": num_width,
+            "NumHeight": num_height,
+            "BackIsHidden": True,
+            "UniqueBack": True,
+            "Type": 0
+        }
+    }
+
     return {
         "Name": "DeckCustom",
         "Transform": {
@@ -131,18 +291,9 @@ def create_deck_object(name, face_url, back_url, num_cards, position, descriptio
         "HideWhenFaceDown": True,
         "Hands": True,
         "SidewaysCard": False,
-        "DeckIDs": list(range(deck_id * 100, deck_id * 100 + num_cards)),
-        "CustomDeck": {
-            str(deck_id): {
-                "FaceURL": face_url,
-                "BackURL": back_url,
-                "NumWidth": num_width,
-                "NumHeight": num_height,
-                "BackIsHidden": True,
-                "UniqueBack": True,
-                "Type": 0
-            }
-        },
+        "DeckIDs": deck_ids,
+        "CustomDeck": custom_decks,
+        "ContainedObjects": create_contained_objects(name, rows, deck_ids, custom_decks),
         "LuaScript": "",
         "LuaScriptState": "",
         "XmlUI": "",
@@ -150,26 +301,13 @@ def create_deck_object(name, face_url, back_url, num_cards, position, descriptio
     }
 
 
-def count_cards_in_csv(csv_path, filter_fn=None):
-    """Count cards in a CSV file with optional filter"""
-    import csv
-    count = 0
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if filter_fn is None or filter_fn(row):
-                copies = int(row.get('copies', 1))
-                count += copies
-    return count
-
+def generate_tts_save(username, repo, tts_files, branch="main", card_set=None):
+    """Generate complete TTS save file JSON
 
-def generate_tts_save(username, repo, tts_files, branch="main"):
-    """Generate complete TTS save file JSON"""
-    from pathlib import Path
-    import csv
-
-    base_dir = Path(__file__).parent.parent
-    data_dir = base_dir / 'card-data'
+    Deck sizes come from `card_set` (card_model.load_card_set() by default).
+    """
+    if card_set is None:
+        card_set = load_card_set(Path(__file__).parent.parent / 'card-data')
 
     objects = []
     deck_id_counter = 1
@@ -179,8 +317,8 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
     spacing = 4.5  # Space between decks
 
     # Count starter and pool move cards
-    starter_count = count_cards_in_csv(data_dir / 'moves.csv', lambda row: row['deck_type'] == 'starter')
-    pool_count = count_cards_in_csv(data_dir / 'moves.csv', lambda row: row['deck_type'] == 'pool')
+    starter_count = len(card_set.starter_moves)
+    pool_count = len(card_set.pool_moves)
 
     back_url = get_github_raw_url(username, repo, branch, tts_files['move_back'])
 
@@ -195,7 +333,8 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             num_cards=starter_count,
             position=[x, y, z],
             description="Starting cards - Print/duplicate 5 times for 5 players",
-            deck_id=deck_id_counter
+            deck_id=deck_id_counter,
+            rows=tuple(iter_deck_rows(card_set, 'starter'))
         )
         objects.append(starter_deck)
         x += spacing
@@ -234,7 +373,6 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             deck_id_counter += 1
 
         # Create single combined pool deck
-        import hashlib
         guid = hashlib.md5(f"pool{x}{z}".encode()).hexdigest()[:6]
 
         pool_deck = {
@@ -275,6 +413,8 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             "SidewaysCard": False,
             "DeckIDs": all_deck_ids,
             "CustomDeck": custom_decks,
+            "ContainedObjects": create_contained_objects("Pool Move Cards", iter_deck_rows(card_set, 'pool'),
+                                                         all_deck_ids, custom_decks),
             "LuaScript": "",
             "LuaScriptState": "",
             "XmlUI": "",
@@ -285,7 +425,7 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
 
     # Rhythm card deck (combined into one deck from all sheets)
     if tts_files['rhythm_fronts']:
-        rhythm_count = count_cards_in_csv(data_dir / 'rhythm-cards.csv')
+        rhythm_count = card_set.rhythm_count
         back_url = get_github_raw_url(username, repo, branch, tts_files['rhythm_back'])
 
         # Combine all rhythm card sheets into a single deck
@@ -319,7 +459,6 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             deck_id_counter += 1
 
         # Create single combined rhythm deck
-        import hashlib
         guid = hashlib.md5(f"rhythm{x}{z}".encode()).hexdigest()[:6]
 
         rhythm_deck = {
@@ -360,6 +499,8 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             "SidewaysCard": False,
             "DeckIDs": all_deck_ids,
             "CustomDeck": custom_decks,
+            "ContainedObjects": create_contained_objects("Rhythm Cards", iter_deck_rows(card_set, 'rhythm'),
+                                                         all_deck_ids, custom_decks),
             "LuaScript": "",
             "LuaScriptState": "",
             "XmlUI": "",
@@ -370,7 +511,7 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
 
     # Judge cards
     if tts_files['judge_fronts']:
-        judge_count = count_cards_in_csv(data_dir / 'judge-cards.csv')
+        judge_count = len(card_set.judges)
         face_url = get_github_raw_url(username, repo, branch, tts_files['judge_fronts'][0])
         back_url = get_github_raw_url(username, repo, branch, tts_files['judge_back'])
 
@@ -381,7 +522,8 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             num_cards=judge_count,
             position=[x, y, z],
             description="Judge cards with special requirements",
-            deck_id=deck_id_counter
+            deck_id=deck_id_counter,
+            rows=tuple(iter_deck_rows(card_set, 'judge'))
         )
         objects.append(deck)
         x += spacing
@@ -396,10 +538,11 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
             name="Stumble Cards",
             face_url=face_url,
             back_url=back_url,
-            num_cards=20,
+            num_cards=card_set.stumble_count,
             position=[x, y, z],
             description="Stumble penalty cards",
-            deck_id=deck_id_counter
+            deck_id=deck_id_counter,
+            rows=tuple(iter_deck_rows(card_set, 'stumble'))
         )
         objects.append(deck)
         deck_id_counter += 1
@@ -426,8 +569,91 @@ def generate_tts_save(username, repo, tts_files, branch="main"):
     return save_data
 
 
-def main():
-    """Generate TTS save file from GitHub-hosted sprites"""
+def load_tts_save(path):
+    """The save file at `path` as a dict, or None if it is missing or unreadable"""
+    try:
+        with open(path) as f:
+            save_data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return save_data if isinstance(save_data, dict) else None
+
+
+def _deck_content(deck):
+    return {key: value for key, value in deck.items() if key not in PLACEMENT_KEYS}
+
+
+def merge_tts_save(save_data, existing):
+    """Carry decks over from the `existing` save wherever they haven't changed
+
+    Decks are matched by Nickname. A deck whose sheet URLs, card counts,
+    card IDs and other content are unchanged is reused as it was, and a
+    changed deck keeps its old GUID and position, so TTS only re-downloads
+    the sheets that really moved. Returns (save_data, changes), where
+    `changes` maps 'unchanged', 'updated', 'added' and 'removed' to deck
+    names.
+    """
+    changes = {'unchanged': [], 'updated': [], 'added': [], 'removed': []}
+    old_decks = {}
+    for deck in (existing or {}).get('ObjectStates', []):
+        old_decks.setdefault(deck.get('Nickname'), deck)
+
+    objects = []
+    for deck in save_data['ObjectStates']:
+        old = old_decks.pop(deck['Nickname'], None)
+        if old is None:
+            changes['added'].append(deck['Nickname'])
+            objects.append(deck)
+        elif _deck_content(old) == _deck_content(deck):
+            changes['unchanged'].append(deck['Nickname'])
+            objects.append(old)
+        else:
+            changes['updated'].append(deck['Nickname'])
+            objects.append({**deck, **{key: old[key] for key in PLACEMENT_KEYS if key in old}})
+    changes['removed'] = list(old_decks)
+
+    # A new deck's GUID must not clash with one carried over
+    guids = {deck['GUID'] for deck in objects if deck['Nickname'] not in changes['added']}
+    for deck in objects:
+        if deck['Nickname'] in changes['added']:
+            while deck['GUID'] in guids:
+                deck['GUID'] = hashlib.md5(deck['GUID'].encode()).hexdigest()[:6]
+            guids.add(deck['GUID'])
+
+    return {**save_data, 'ObjectStates': objects}, changes
+
+
+def write_tts_save(save_data, path, pretty=False):
+    """Write a save file atomically, compact unless `pretty`
+
+    Returns False, leaving the file untouched, if it already holds exactly
+    these bytes.
+    """
+    path = Path(path)
+    if pretty:
+        data = json.dumps(save_data, indent=2)
+    else:
+        data = json.dumps(save_data, separators=(',', ':'))
+    data = data.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return True
+
+
+def main(pretty=False):
+    """Generate TTS save file from GitHub-hosted sprites
+
+    Decks that haven't changed since the existing save are kept as they are.
+    """
     base_dir = Path(__file__).parent.parent
     tts_dir = base_dir / 'output' / 'tts'
 
@@ -462,14 +688,18 @@ def main():
 
     # Generate save file
     print('🔨 Generating TTS save file...')
-    save_data = generate_tts_save(username, repo, tts_files)
-
-    # Write JSON
     output_file = tts_dir / 'beat-by-beat.json'
-    with open(output_file, 'w') as f:
-        json.dump(save_data, f, indent=2)
+    save_data, changes = merge_tts_save(generate_tts_save(username, repo, tts_files), load_tts_save(output_file))
+    for label, key in (('Updated', 'updated'), ('Added', 'added'), ('Removed', 'removed')):
+        if changes[key]:
+            print(f'  - {label}: {", ".join(changes[key])}')
+    print(f'  - Unchanged: {len(changes["unchanged"])} deck(s)')
 
-    print(f'✅ Generated: {output_file.name}')
+    # Write JSON
+    if write_tts_save(save_data, output_file, pretty):
+        print(f'✅ Generated: {output_file.name}')
+    else:
+        print(f'✅ Up to date: {output_file.name}')
     print()
     print('📋 To import into Tabletop Simulator:')
     print('  1. In TTS: Objects → Saved Objects → Import')
@@ -484,4 +714,7 @@ def main():
 
 
 if __name__ == '__main__':
-    exit(main())
+    parser = argparse.ArgumentParser(description='Generate the Tabletop Simulator save file')
+    parser.add_argument('--pretty', action='store_true', help='indent the JSON for reading (default: compact)')
+    args = parser.parse_args()
+    exit(main(args.pretty))
@@ -1,40 +1,30 @@
 #!/bin/bash
 # Generate all card formats (HTML, PDF, TTS)
+# Unchanged artifacts are skipped; pass --force to rebuild everything
 
 set -e  # Exit on error
 
+FORCE_FLAG=""
+if [ "$1" = "--force" ]; then
+    FORCE_FLAG="--force"
+fi
+
 echo "🎭 Beat by Beat - Complete Card Generation"
 echo "=========================================="
 echo ""
 
-# Step 1: Generate HTML cards
-echo "Step 1/4: Generating HTML cards..."
-uv run python card-generator/generator.py
-
-echo ""
-
-# Step 2: Generate PDFs
-echo "Step 2/4: Generating PDFs..."
-if ! uv run python card-generator/pdf_generator.py 2>&1; then
-    echo ""
-    echo "❌ PDF generation failed!"
-    echo ""
-    echo "💡 This usually means dependencies aren't installed."
-    echo "   Run one of these commands:"
-    echo ""
-    echo "   ./setup.sh                    # Install everything"
-    echo "   uv sync --all-extras          # Or just sync dependencies"
-    echo ""
-    exit 1
-fi
+# Step 1: Generate HTML cards (after refreshing the compiled card database)
+echo "Step 1/3: Generating HTML cards..."
+uv run python card-generator/card_model.py $FORCE_FLAG
+uv run python card-generator/generator.py $FORCE_FLAG
 
 echo ""
 
-# Step 3: Generate TTS sprites
-echo "Step 3/4: Generating TTS sprite sheets..."
-if ! uv run python card-generator/tts_generator.py 2>&1; then
+# Step 2: Render PDFs and TTS sprites (one shared browser)
+echo "Step 2/3: Rendering PDFs and TTS sprite sheets..."
+if ! uv run python card-generator/render_all.py $FORCE_FLAG 2>&1; then
     echo ""
-    echo "❌ TTS generation failed!"
+    echo "❌ PDF/TTS rendering failed!"
     echo ""
     echo "💡 This usually means dependencies aren't installed."
     echo "   Run one of these commands:"
@@ -47,8 +37,8 @@ fi
 
 echo ""
 
-# Step 4: Generate TTS JSON save file
-echo "Step 4/4: Generating TTS JSON save file..."
+# Step 3: Generate TTS JSON save file
+echo "Step 3/3: Generating TTS JSON save file..."
 if ! uv run python card-generator/tts_json_generator.py 2>&1; then
     echo ""
     echo "❌ TTS JSON generation failed!"